@@ -0,0 +1,250 @@
+"""
+Single command-line entry point:
+
+    python src/finance_vibe <command> [args...]
+    python src/finance_vibe pipeline --force     # == python src/finance_vibe/run_vibe.py --force
+    python src/finance_vibe tickers
+    python src/finance_vibe report --engine local --top 10
+
+Script commands hand their arguments to the script's own CLI and import
+it only once chosen. `tickers` and `report` read plain CSVs with the
+standard library, so they start without pandas, yfinance, yahooquery or
+pandas_ta. `selfcheck` times those short commands in fresh interpreters
+and fails when one goes over its import budget, loads a heavy module or
+creates a directory.
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import os
+import re
+import sys
+from typing import Optional
+
+# `python -m finance_vibe` (from src/) puts src/ on the path, not this folder
+HERE = os.path.dirname(os.path.abspath(__file__))
+if HERE not in sys.path:
+    sys.path.insert(0, HERE)
+
+import config  # noqa: E402
+
+
+# command: (script module, help)
+SCRIPTS = {
+    "pipeline": ("run_vibe", "Discovery -> ingestion -> both engines -> comparison"),
+    "discover": ("ticker_provider", "Refresh the active ticker list"),
+    "ingest": ("data_ingestor", "Download bars for the ticker list"),
+    "fetch": ("bulk_ingest", "Download bars for given symbols"),
+    "bars": ("bar_store", "Daily store update / resampled timeframes"),
+    "async-ingest": ("async_ingest", "Adaptive-rate download for many symbols"),
+    "standin": ("standin_server", "Local bar server with injected faults"),
+    "scan": ("analysis_engine_local", "Score every raw file (local indicators)"),
+    "vibe": ("analysis_engine", "Score the ticker list (pandas_ta)"),
+    "dashboard": ("dashboard_engine", "Last completed week's dashboard metrics for tickers"),
+    "shadow": ("shadow_compare", "Both engines on one load, divergence report"),
+    "history": ("report_history", "Past reports: ticker history, transitions, top N"),
+    "scanners": ("scanners", "Signals / volatility / mean reversion / backtest tables"),
+    "backtest": ("backtest", "Backtest one ticker or --all"),
+    "sweep": ("sweep", "Backtest parameter sweep"),
+    "stream": ("streaming", "Incremental indicator state"),
+    "store": ("raw_store", "Raw store tools (migrate)"),
+    "cache": ("feature_cache", "Feature cache stats / clear / evict"),
+    "responses": ("response_cache", "Response cache stats / purge / clear"),
+    "synthetic": ("synthetic", "Write synthetic raw files"),
+    "bench": ("benchmark", "Benchmark suite"),
+}
+
+# report kind: file prefix in LOGS_DIR
+REPORTS = {
+    "local": "vibe_report_local_",
+    "vibe": "vibe_report_",
+    "compare": "vibe_compare_",
+}
+
+# Modules a short command must not import
+HEAVY_MODULES = ("pandas", "numpy", "yfinance", "yahooquery", "pandas_ta", "pyarrow")
+# Imported by the functions that use them, never when a script module loads
+LAZY_MODULES = ("yfinance", "yahooquery", "pandas_ta")
+# Wall-clock budget for a short command, interpreter start-up included
+STARTUP_BUDGET_S = 0.5
+SELFCHECK_COMMANDS = (["--help"], ["tickers"], ["report"])
+
+
+# -----------------------------
+# Script commands
+# -----------------------------
+def run_script(module: str, args: list[str]) -> int:
+    """Runs `module` as if started as `python <module>.py args...`."""
+    import runpy
+
+    sys.argv = [os.path.join(HERE, f"{module}.py"), *args]
+    try:
+        runpy.run_module(module, run_name="__main__", alter_sys=True)
+    except SystemExit as e:
+        return e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+    return 0
+
+
+# -----------------------------
+# Short commands
+# -----------------------------
+def _read_csv(path: str) -> tuple[list[str], list[list[str]]]:
+    with open(path, newline="") as f:
+        rows = list(csv.reader(f))
+    return (rows[0], rows[1:]) if rows else ([], [])
+
+
+def _cell(value: str) -> str:
+    """Decimals to 2 places, like the engines' printed tables."""
+    if "." in value:
+        try:
+            return f"{float(value):.2f}"
+        except ValueError:
+            pass
+    return value
+
+
+def _print_table(header: list[str], rows: list[list[str]]) -> None:
+    rows = [[_cell(c) for c in r] for r in rows]
+    widths = [max([len(h)] + [len(r[i]) for r in rows if i < len(r)])
+              for i, h in enumerate(header)]
+    print("  ".join(h.ljust(w) for h, w in zip(header, widths)).rstrip())
+    print("  ".join("-" * w for w in widths))
+    for r in rows:
+        print("  ".join(c.ljust(w) for c, w in zip(r, widths)).rstrip())
+
+
+def latest_report(kind: str = "local", logs_dir: Optional[str] = None) -> Optional[str]:
+    """Newest report of `kind` (dated file name), or None."""
+    logs_dir = logs_dir or config.LOGS_DIR
+    pattern = re.compile(rf"^{REPORTS[kind]}\d{{4}}-\d{{2}}-\d{{2}}\.csv$")
+    if not os.path.isdir(logs_dir):
+        return None
+    names = sorted(n for n in os.listdir(logs_dir) if pattern.match(n))
+    return os.path.join(logs_dir, names[-1]) if names else None
+
+
+def cmd_tickers(args: list[str]) -> int:
+    parser = argparse.ArgumentParser(prog="finance_vibe tickers",
+                                     description="Print the active ticker list")
+    parser.parse_args(args)
+    if not os.path.exists(config.TICKER_LIST_PATH):
+        print(f"No ticker list at {config.TICKER_LIST_PATH} (run `discover` first)")
+        return 1
+    header, rows = _read_csv(config.TICKER_LIST_PATH)
+    col = header.index("Ticker") if "Ticker" in header else 0
+    tickers = [r[col] for r in rows if len(r) > col]
+    print(" ".join(tickers))
+    print(f"\n{len(tickers)} ticker(s) in {config.TICKER_LIST_PATH}")
+    return 0
+
+
+def cmd_report(args: list[str]) -> int:
+    parser = argparse.ArgumentParser(prog="finance_vibe report",
+                                     description="Print the latest saved report")
+    parser.add_argument("--engine", choices=list(REPORTS), default="local")
+    parser.add_argument("--top", type=int, default=20, help="Rows to print (0 = all)")
+    opts = parser.parse_args(args)
+
+    path = latest_report(opts.engine)
+    if path is None:
+        print(f"No {opts.engine} report in {config.LOGS_DIR}")
+        return 1
+    header, rows = _read_csv(path)
+    _print_table(header, rows[:opts.top] if opts.top > 0 else rows)
+    print(f"\n{len(rows)} row(s) in {path}")
+    return 0
+
+
+# -----------------------------
+# Self-check
+# -----------------------------
+def _time_run(args: list[str], cwd: str, watch: tuple[str, ...]) -> tuple[float, list[str], str]:
+    """(seconds, watched top-level modules imported, other stderr) of `python args...`."""
+    import subprocess
+    import time
+
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", *args],
+                          cwd=cwd, capture_output=True, text=True)
+    seconds = time.perf_counter() - start
+
+    imported = {line.rsplit("|", 1)[-1].strip() for line in proc.stderr.splitlines()
+                if line.startswith("import time:")}
+    found = sorted({m.strip().split(".")[0] for m in imported} & set(watch))
+    errors = "\n".join(line for line in proc.stderr.splitlines()
+                       if not line.startswith("import time:"))
+    return seconds, found, errors
+
+
+def _report(label: str, seconds: float, problems: list[str]) -> bool:
+    status = "❌ " + "; ".join(problems) if problems else "✅"
+    print(f"{label:<24} {seconds:6.3f}s  {status}")
+    return bool(problems)
+
+
+def cmd_selfcheck(args: list[str]) -> int:
+    parser = argparse.ArgumentParser(prog="finance_vibe selfcheck",
+                                     description="Start-up budget of the short commands")
+    parser.add_argument("--budget", type=float, default=STARTUP_BUDGET_S,
+                        help="Seconds allowed per command, interpreter start-up included")
+    opts = parser.parse_args(args)
+
+    import tempfile
+
+    failed = False
+    # An empty working directory: nothing on disk to read, nothing may be created
+    with tempfile.TemporaryDirectory() as cwd:
+        print("Short commands:")
+        for cmd in SELFCHECK_COMMANDS:
+            seconds, heavy, errors = _time_run([HERE, *cmd], cwd, HEAVY_MODULES)
+            problems = []
+            if seconds > opts.budget:
+                problems.append(f"over budget ({opts.budget:.2f}s)")
+            if heavy:
+                problems.append(f"imports {', '.join(heavy)}")
+            if "Traceback" in errors:
+                problems.append("crashed:\n" + errors)
+            failed |= _report(" ".join(cmd), seconds, problems)
+
+        print("\nScript imports:")
+        for module, _ in SCRIPTS.values():
+            code = f"import sys; sys.path.insert(0, {HERE!r}); import {module}"
+            seconds, lazy, errors = _time_run(["-c", code], cwd, LAZY_MODULES)
+            problems = [f"imports {', '.join(lazy)} at load"] if lazy else []
+            if "Traceback" in errors:
+                problems.append("failed:\n" + errors)
+            failed |= _report(module, seconds, problems)
+
+        created = os.listdir(cwd)
+        if created:
+            failed = True
+            print(f"❌ created on disk: {', '.join(sorted(created))}")
+    return 1 if failed else 0
+
+
+COMMANDS = {
+    "tickers": (cmd_tickers, "Print the active ticker list"),
+    "report": (cmd_report, "Print the latest saved report"),
+    "selfcheck": (cmd_selfcheck, "Check start-up time of the short commands"),
+}
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    lines = [f"  {name:<12} {help_}" for name, (_, help_) in {**COMMANDS, **SCRIPTS}.items()]
+    parser = argparse.ArgumentParser(
+        prog="finance_vibe", formatter_class=argparse.RawDescriptionHelpFormatter,
+        description="Finance-Vibe commands (`<command> --help` for each)",
+        epilog="commands:\n" + "\n".join(lines))
+    parser.add_argument("command", choices=[*COMMANDS, *SCRIPTS], metavar="command")
+    opts = parser.parse_args(argv[:1])
+
+    if opts.command in COMMANDS:
+        return COMMANDS[opts.command][0](argv[1:])
+    return run_script(SCRIPTS[opts.command][0], argv[1:])
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,30 +1,52 @@
+import argparse
+import numpy as np
 import pandas as pd
-import pandas_ta as ta
 import os
 from datetime import datetime
-from config import TICKER_LIST_PATH, get_raw_path, LOGS_DIR
+import feature_cache
+import metrics
+import raw_store
+import report_history
+import rolling_kernels
+import config
+from config import TICKER_LIST_PATH, get_raw_path
+
+MIN_ROWS = 50
+
+# Indicator parameters (part of the feature cache key)
+VIBE_PARAMS = {
+    "sma_fast": 20,
+    "sma_slow": 50,
+    "macd": (15, 30, 9),
+    "signal_len": 20,
+    "rsi": 14,
+    "cci": 20,
+}
+
+def compute_vibe_features(df, params=VIBE_PARAMS):
+    import pandas_ta as ta  # imported on first use: it dominates startup time
 
-def calculate_composite_vibe(df):
     # 1. Trend
-    df['SMA20'] = ta.sma(df['Close'], length=20)
-    df['SMA50'] = ta.sma(df['Close'], length=50)
+    df['SMA20'] = ta.sma(df['Close'], length=params['sma_fast'])
+    df['SMA50'] = ta.sma(df['Close'], length=params['sma_slow'])
 
     # 2. Momentum
-    macd = ta.macd(df['Close'], fast=15, slow=30, signal=9)
+    fast, slow, signal = params['macd']
+    macd = ta.macd(df['Close'], fast=fast, slow=slow, signal=signal)
     df['MACD_Hist'] = macd.iloc[:, 1] 
-    df['MACD_Hist_Signal'] = ta.ema(df['MACD_Hist'], length=20)
+    df['MACD_Hist_Signal'] = ta.ema(df['MACD_Hist'], length=params['signal_len'])
     
-    df['RSI'] = ta.rsi(df['Close'], length=14)
-    df['RSI_Signal'] = ta.ema(df['RSI'], length=20)
+    df['RSI'] = ta.rsi(df['Close'], length=params['rsi'])
+    df['RSI_Signal'] = ta.ema(df['RSI'], length=params['signal_len'])
 
     # 3. Volatility
     # More robust CCI version
     tp = (df['High'] + df['Low'] + df['Close']) / 3
-    sma_tp = tp.rolling(window=20).mean()
-    mad_tp = tp.rolling(window=20).apply(lambda x: (x - x.mean()).abs().mean())
-    df['CCI'] = (tp - sma_tp) / (0.015 * mad_tp)
-    df['CCI_Signal'] = ta.ema(df['CCI'], length=20)
+    df['CCI'] = rolling_kernels.cci(tp, params['cci'])  # (tp - SMA) / (0.015 * MAD)
+    df['CCI_Signal'] = ta.ema(df['CCI'], length=params['signal_len'])
+    return df
 
+def score_vibe(df):
     latest = df.iloc[-1]
     score = 0.0
 
@@ -50,30 +72,108 @@ def calculate_composite_vibe(df):
 
     return score, latest # Return both for the report
 
-def run_scanner():
-    tickers = pd.read_csv(TICKER_LIST_PATH)['Ticker'].tolist()
+def vibe_action(score):
+    """(sentiment, action) for a composite score."""
+    if score >= 8.0:
+        return "Strong Bullish", "🔥 GO ALL IN"
+    elif score >= 4.0:
+        return "Bullish", "✅ ACCUMULATE"
+    elif score >= -3.9:
+        return "Neutral", "⏳ WAIT / CASH"
+    elif score >= -7.9:
+        return "Bearish", "⚠️ DISTRIBUTE"
+    return "Strong Bearish", "🚫 AVOID"
+
+SCORE_COLUMNS = ['SMA20', 'SMA50', 'MACD_Hist', 'MACD_Hist_Signal',
+                 'RSI', 'RSI_Signal', 'CCI', 'CCI_Signal']
+
+def score_vibe_history(df):
+    """score_vibe for every row at once; rows with a missing indicator are dropped."""
+    close, s20, s50 = (df[c].to_numpy(dtype=float) for c in ('Close', 'SMA20', 'SMA50'))
+    macd_bull = df['MACD_Hist'].to_numpy(dtype=float) > df['MACD_Hist_Signal'].to_numpy(dtype=float)
+    rsi_bull = df['RSI'].to_numpy(dtype=float) > df['RSI_Signal'].to_numpy(dtype=float)
+    cci, cci_s = df['CCI'].to_numpy(dtype=float), df['CCI_Signal'].to_numpy(dtype=float)
+
+    trend = np.select([(close > s20) & (s20 > s50), close > s20, (close < s20) & (s20 < s50)],
+                      [4.0, 2.0, -4.0], 0.0)
+    momentum = np.select([macd_bull & rsi_bull, macd_bull | rsi_bull], [3.0, 1.0], -3.0)
+    stretch = np.select([(cci > cci_s) & (cci > 0), (cci < cci_s) & (cci < 0)], [3.0, -3.0], 0.0)
+
+    out = pd.DataFrame({'Date': df.index, 'Close': close, 'Score': trend + momentum + stretch})
+    return out[df[SCORE_COLUMNS].notna().all(axis=1).to_numpy()].reset_index(drop=True)
+
+def vibe_actions(scores):
+    """vibe_action for an array of scores: (sentiments, actions)."""
+    scores = np.asarray(scores)
+    bands = [scores >= 8.0, scores >= 4.0, scores >= -3.9, scores >= -7.9]
+    sentiment = np.select(bands, ["Strong Bullish", "Bullish", "Neutral", "Bearish"],
+                          "Strong Bearish").astype(object)
+    action = np.select(bands, ["🔥 GO ALL IN", "✅ ACCUMULATE", "⏳ WAIT / CASH", "⚠️ DISTRIBUTE"],
+                       "🚫 AVOID").astype(object)
+    return sentiment, action
+
+def calculate_composite_vibe(df):
+    return score_vibe(compute_vibe_features(df))
+
+def load_vibe_features(file_path):
+    # None marks a file too short to score (cached like any other result)
+    with metrics.phase("load"):
+        df = raw_store.read_raw(file_path)
+    if len(df) < MIN_ROWS:
+        return None
+    with metrics.phase("features"):
+        return compute_vibe_features(df.copy())
+
+def _ta_version():
+    # Read from the package metadata so a fully cached run never imports pandas_ta
+    from importlib import metadata
+    try:
+        return metadata.version("pandas_ta")
+    except metadata.PackageNotFoundError:
+        return ""
+
+def get_feature_cache():
+    code = feature_cache.code_version(load_vibe_features, compute_vibe_features,
+                                      rolling_kernels, _ta_version())
+    return feature_cache.FeatureCache("vibe", params=VIBE_PARAMS, code=code)
+
+def report_path(day=None):
+    day = day or datetime.now().strftime("%Y-%m-%d")
+    return os.path.join(config.LOGS_DIR, f"vibe_report_{day}.csv")
+
+def history_path(day=None):
+    day = day or datetime.now().strftime("%Y-%m-%d")
+    return os.path.join(config.LOGS_DIR, f"vibe_history_{day}.csv")
+
+def run_scanner(use_cache=True, tickers=None, profile=None):
+    with metrics.session("scan_vibe", profile_top=profile):
+        with metrics.stage("run_scanner"):
+            summary_df = _run_scanner(use_cache, tickers)
+        # Profile reruns bypass the cache so they show the real work
+        metrics.profile_slowest("vibe", lambda r: score_vibe(load_vibe_features(r["path"])))
+    return summary_df
+
+def _run_scanner(use_cache, tickers):
+    if tickers is None:
+        tickers = pd.read_csv(TICKER_LIST_PATH)['Ticker'].tolist()
     results = []
+    cache = get_feature_cache()
+    cache.enabled = cache.enabled and use_cache
 
     for ticker in tickers:
-        file_path = get_raw_path(ticker)
-        if not os.path.exists(file_path): continue
+        file_path = raw_store.resolve_path(get_raw_path(ticker))
+        if file_path is None: continue
         
-        df = pd.read_csv(file_path, index_col=0, parse_dates=True)
-        if len(df) < 50: continue
-
-        # Capture both returned values
-        score, latest = calculate_composite_vibe(df)
-
-        if score >= 8.0:
-            sentiment, action = "Strong Bullish", "🔥 GO ALL IN"
-        elif score >= 4.0:
-            sentiment, action = "Bullish", "✅ ACCUMULATE"
-        elif score >= -3.9:
-            sentiment, action = "Neutral", "⏳ WAIT / CASH"
-        elif score >= -7.9:
-            sentiment, action = "Bearish", "⚠️ DISTRIBUTE"
-        else:
-            sentiment, action = "Strong Bearish", "🚫 AVOID"
+        with metrics.ticker(ticker, "vibe", path=file_path):
+            # Unchanged files skip parsing and indicators entirely
+            df = cache.get_or_compute(file_path, load_vibe_features)
+            if df is None: continue
+
+            # Capture both returned values
+            with metrics.phase("score"):
+                score, latest = score_vibe(df)
+
+        sentiment, action = vibe_action(score)
 
         results.append({
             "Ticker": ticker,
@@ -94,12 +194,60 @@ def run_scanner():
     summary_df = pd.DataFrame(results).sort_values(by='Score', ascending=False)
     
     # Archive Logic
-    today_str = datetime.now().strftime("%Y-%m-%d")
-    archive_path = os.path.join(LOGS_DIR, f"vibe_report_{today_str}.csv")
+    config.ensure_dir(config.LOGS_DIR)
+    archive_path = report_path()
     summary_df.to_csv(archive_path, index=False)
+    report_history.record(summary_df, "vibe")
     
     print(summary_df.to_markdown(index=False))
     print(f"\n📁 Archive created: {archive_path}")
+    if cache.enabled:
+        cache.evict()
+        print(f"🗃️ Feature cache: {cache.hits} hit(s), {cache.misses} miss(es)")
+    return summary_df
+
+def run_history(use_cache=True, tickers=None):
+    """Score time series (every bar of every ticker), saved to history_path()."""
+    if tickers is None:
+        tickers = pd.read_csv(TICKER_LIST_PATH)['Ticker'].tolist()
+    parts = []
+    cache = get_feature_cache()
+    cache.enabled = cache.enabled and use_cache
+
+    with metrics.session("history_vibe"), metrics.stage("run_history"):
+        for ticker in tickers:
+            file_path = raw_store.resolve_path(get_raw_path(ticker))
+            if file_path is None: continue
+            with metrics.ticker(ticker, "vibe", path=file_path):
+                df = cache.get_or_compute(file_path, load_vibe_features)
+                if df is None: continue
+                with metrics.phase("score"):
+                    part = score_vibe_history(df)
+            part.insert(1, 'Ticker', ticker)
+            parts.append(part)
+
+        history = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(
+            columns=['Date', 'Ticker', 'Close', 'Score'])
+        history['Sentiment'], history['Action'] = vibe_actions(history['Score'])
+        config.ensure_dir(config.LOGS_DIR)
+        out_path = history_path()
+        history.to_csv(out_path, index=False)
+
+    print(f"✅ {len(history)} scored bar(s) for {len(parts)} ticker(s)")
+    print(f"\n📁 Score history: {out_path}")
+    if cache.enabled:
+        cache.evict()
+    return history
 
 if __name__ == "__main__":
-    run_scanner()
\ No newline at end of file
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--no-cache", action="store_true", help="Recompute every ticker's features")
+    parser.add_argument("--profile", type=int, default=None, metavar="N",
+                        help="Save cProfile output for the N slowest tickers")
+    parser.add_argument("--history", action="store_true",
+                        help="Score every bar and save the score time series instead")
+    args = parser.parse_args()
+    if args.history:
+        run_history(use_cache=not args.no_cache)
+    else:
+        run_scanner(use_cache=not args.no_cache, profile=args.profile)
\ No newline at end of file
@@ -1,17 +1,28 @@
 # scan_raw_fast.py
 from __future__ import annotations
 
+import argparse
 import os
 import re
+import time
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Iterable, Optional
+from typing import Callable, Iterable, Optional
 
 import numpy as np
 import pandas as pd
-from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 
 import config
+import feature_cache
+import indicators
+import metrics
+import panel_engine
+import raw_store
+import report_history
+import report_sink
+import rolling_kernels
+from indicators import cci_fast, ema, macd_hist, rsi_wilder, sma  # noqa: F401 (re-exported)
 
 
 # -----------------------------
@@ -20,11 +31,23 @@ import config
 MIN_WEEKS = 60  # enough for SMA50 + signal windows
 PRINT_TOP_N = 50  # printing huge markdown tables is slow
 
+# Indicator parameters used by build_features (part of the feature cache key)
+FEATURE_PARAMS = {
+    "sma_fast": 20,
+    "sma_slow": 50,
+    "macd": (12, 26, 9),
+    "macd_smooth": 9,
+    "rsi": 14,
+    "rsi_smooth": 10,
+    "cci": 20,
+    "cci_smooth": 10,
+}
+
 
 # -----------------------------
 # Result model
 # -----------------------------
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class ScanRow:
     ticker: str
     price: float
@@ -41,32 +64,41 @@ class ScanRow:
     action: str
 
     def to_dict(self) -> dict:
-        return {
-            "Ticker": self.ticker,
-            "Price": self.price,
-            "SMA20": self.sma20,
-            "SMA50": self.sma50,
-            "CCI": self.cci,
-            "CCI_S": self.cci_s,
-            "MACD_H": self.macd_h,
-            "MACD_S": self.macd_s,
-            "RSI": self.rsi,
-            "RSI_S": self.rsi_s,
-            "Score": self.score,
-            "Sentiment": self.sentiment,
-            "Action": self.action,
-        }
+        return {label: getattr(self, name) for name, label in REPORT_COLUMNS.items()}
+
+
+# ScanRow field -> report column
+REPORT_COLUMNS = {
+    "ticker": "Ticker",
+    "price": "Price",
+    "sma20": "SMA20",
+    "sma50": "SMA50",
+    "cci": "CCI",
+    "cci_s": "CCI_S",
+    "macd_h": "MACD_H",
+    "macd_s": "MACD_S",
+    "rsi": "RSI",
+    "rsi_s": "RSI_S",
+    "score": "Score",
+    "sentiment": "Sentiment",
+    "action": "Action",
+}
+
+
+def rows_frame(rows: list[ScanRow]) -> pd.DataFrame:
+    """Report frame (same columns as ScanRow.to_dict), filled column by column."""
+    return pd.DataFrame({label: [getattr(r, name) for r in rows]
+                         for name, label in REPORT_COLUMNS.items()})
 
 
 # -----------------------------
 # File discovery / ticker parse
 # -----------------------------
 def iter_raw_csv_paths(raw_dir: str) -> Iterable[str]:
-    if not os.path.isdir(raw_dir):
-        raise FileNotFoundError(f"RAW_DIR does not exist: {raw_dir}")
-    for name in sorted(os.listdir(raw_dir)):
-        if name.lower().endswith(".csv"):
-            yield os.path.join(raw_dir, name)
+    """
+    Yields one raw file per ticker (column store or legacy CSV).
+    """
+    yield from raw_store.iter_raw_paths(raw_dir)
 
 
 _TICKER_RE = re.compile(r"^([A-Za-z0-9\.\-]+)_", re.IGNORECASE)
@@ -74,9 +106,9 @@ _TICKER_RE = re.compile(r"^([A-Za-z0-9\.\-]+)_", re.IGNORECASE)
 
 def ticker_from_filename(path: str) -> str:
     """
-    Expected: {TICKER}_{PERIOD}_{INTERVAL}.csv (ex: SPY_5y_1wk.csv)
+    Expected: {TICKER}_{PERIOD}_{INTERVAL}.cols|.csv (ex: SPY_5y_1wk.cols)
     """
-    base = os.path.basename(path)
+    base = os.path.basename(path.rstrip(os.sep))
     m = _TICKER_RE.match(base)
     if m:
         return m.group(1).upper()
@@ -86,142 +118,177 @@ def ticker_from_filename(path: str) -> str:
 # -----------------------------
 # CSV loader (fast-ish)
 # -----------------------------
-def _find_column(df: pd.DataFrame, candidates: Iterable[str]) -> Optional[str]:
-    norm = {c: c.strip().lower().replace("_", "").replace(" ", "")
-            for c in df.columns}
-    want = {x.lower().replace("_", "").replace(" ", "") for x in candidates}
-    for original, n in norm.items():
-        if n in want:
-            return original
-    return None
-
-
 def load_ohlc_csv(path: str) -> pd.DataFrame:
     """
     Loads Date + Close (or Adj Close) and optional High/Low.
-    Sorts ascending by date and converts numeric columns.
+    The header is sniffed once per schema and only these columns are
+    parsed (see raw_store.read_csv_columns); rows come back sorted by date.
     """
-    # Read only likely columns (works even if extra columns exist)
-    df = pd.read_csv(path)
-    if df.empty:
-        raise ValueError("empty csv")
-
-    df.columns = [c.strip() for c in df.columns]
-
-    date_col = _find_column(df, ["date", "datetime", "time"])
-    close_col = _find_column(
-        df, ["close", "adjclose", "adj close", "adj_close"])
+    schema = raw_store.sniff_csv(path)
+    date_col = schema.find(["date", "datetime", "time"])
+    close_col = schema.find(["close", "adjclose", "adj close", "adj_close"])
     if not date_col:
         raise ValueError("missing Date column")
     if not close_col:
         raise ValueError("missing Close/Adj Close column")
+    high_col = schema.find(["high"])
+    low_col = schema.find(["low"])
 
-    high_col = _find_column(df, ["high"])
-    low_col = _find_column(df, ["low"])
+    wanted = [c for c in (close_col, high_col, low_col) if c]
+    dates, cols = raw_store.read_csv_columns(path, wanted, date_col=date_col, schema=schema)
+    if dates.size == 0:
+        raise ValueError("empty csv")
 
-    cols = [date_col, close_col]
+    close = cols[close_col]
+    data = {"Date": dates, "Close": close}
     if high_col:
-        cols.append(high_col)
+        data["High"] = cols[high_col]
     if low_col:
-        cols.append(low_col)
+        data["Low"] = cols[low_col]
+    out = pd.DataFrame(data, copy=False)
 
-    out = df[cols].copy()
-    out.rename(columns={date_col: "Date", close_col: "Close"}, inplace=True)
-    if high_col:
-        out.rename(columns={high_col: "High"}, inplace=True)
-    if low_col:
-        out.rename(columns={low_col: "Low"}, inplace=True)
+    if np.isnan(close).any():
+        out = out[~np.isnan(close)].reset_index(drop=True)
+    return out
 
-    out["Date"] = pd.to_datetime(out["Date"], errors="coerce")
-    out = out.dropna(subset=["Date"]).sort_values(
-        "Date").reset_index(drop=True)
 
-    out["Close"] = pd.to_numeric(out["Close"], errors="coerce")
-    out = out.dropna(subset=["Close"]).reset_index(drop=True)
+def load_ohlc_store(path: str) -> pd.DataFrame:
+    """
+    Same frame as load_ohlc_csv, built from memory-mapped store columns.
+    Stores are written sorted with typed columns, so no parsing is needed.
+    """
+    dates, cols = raw_store.read_columns(path, ["Close", "Adj Close", "High", "Low"])
+    close = cols.get("Close", cols.get("Adj Close"))
+    if close is None:
+        raise ValueError("missing Close/Adj Close column")
+    if dates.size == 0:
+        raise ValueError("empty store")
+
+    data = {"Date": dates, "Close": close}
+    if "High" in cols:
+        data["High"] = cols["High"]
+    if "Low" in cols:
+        data["Low"] = cols["Low"]
+    out = pd.DataFrame(data, copy=False)
+
+    if np.isnan(close).any():
+        out = out[~np.isnan(close)].reset_index(drop=True)
+    return out
 
-    if "High" in out.columns:
-        out["High"] = pd.to_numeric(out["High"], errors="coerce")
-    if "Low" in out.columns:
-        out["Low"] = pd.to_numeric(out["Low"], errors="coerce")
 
+def ohlc_frame(bars: pd.DataFrame) -> pd.DataFrame:
+    """
+    Same frame as load_ohlc, from bars already in memory (a Date-indexed
+    frame as returned by raw_store.read_raw).
+    """
+    close_col = "Close" if "Close" in bars.columns else "Adj Close"
+    if close_col not in bars.columns:
+        raise ValueError("missing Close/Adj Close column")
+    if bars.empty:
+        raise ValueError("no rows")
+
+    close = bars[close_col].to_numpy(dtype=np.float64)
+    data = {"Date": bars.index.to_numpy(), "Close": close}
+    for col in ("High", "Low"):
+        if col in bars.columns:
+            data[col] = bars[col].to_numpy(dtype=np.float64)
+    out = pd.DataFrame(data, copy=False)
+
+    if np.isnan(close).any():
+        out = out[~np.isnan(close)].reset_index(drop=True)
     return out
 
 
+def load_ohlc(path: str) -> pd.DataFrame:
+    if raw_store.is_store(path):
+        return load_ohlc_store(path)
+    return load_ohlc_csv(path)
+
+
 # -----------------------------
-# Indicators (fast)
+# Indicators (shared registry, see indicators.py)
 # -----------------------------
-def sma(s: pd.Series, n: int) -> pd.Series:
-    return s.rolling(n, min_periods=n).mean()
-
+def build_features(df: pd.DataFrame, params: dict = FEATURE_PARAMS,
+                   lean: bool = False) -> pd.DataFrame:
+    """
+    df's columns plus the indicator columns. lean=True returns only the
+    rows scoring reads, as float32 (see lean_frame).
+    """
+    # Adding columns to a shallow copy never writes to df, so no data is copied
+    out = df.copy(deep=False)
+    r = indicators.Resolver(out)
+    fast, slow, signal = params["macd"]
+    macd_h = ("macd_hist", {"fast": fast, "slow": slow, "signal": signal})
+    rsi = ("rsi_wilder", {"period": params["rsi"]})
+    cci = ("cci_fast", {"period": params["cci"], "fallback": True})
 
-def ema(s: pd.Series, span: int) -> pd.Series:
-    return s.ewm(span=span, adjust=False).mean()
+    out["SMA20"] = r.get("sma", window=params["sma_fast"])
+    out["SMA50"] = r.get("sma", window=params["sma_slow"])
 
+    out["MACD_H"] = r.source(macd_h)
+    out["MACD_S"] = r.get("ema", source=macd_h, span=params["macd_smooth"])
 
-def macd_hist(close: pd.Series, fast: int = 12, slow: int = 26, signal: int = 9) -> pd.Series:
-    macd_line = ema(close, fast) - ema(close, slow)
-    signal_line = ema(macd_line, signal)
-    return macd_line - signal_line
+    out["RSI"] = r.source(rsi)
+    out["RSI_S"] = r.get("sma", source=rsi, window=params["rsi_smooth"])
 
+    # Typical price, or Close alone when the file has no High/Low
+    out["CCI"] = r.source(cci)
+    out["CCI_S"] = r.get("sma", source=cci, window=params["cci_smooth"])
 
-def rsi_wilder(close: pd.Series, period: int = 14) -> pd.Series:
-    delta = close.diff()
-    gain = delta.clip(lower=0.0)
-    loss = (-delta).clip(lower=0.0)
-    avg_gain = gain.ewm(alpha=1 / period, adjust=False).mean()
-    avg_loss = loss.ewm(alpha=1 / period, adjust=False).mean()
-    rs = avg_gain / avg_loss.replace(0, np.nan)
-    return 100 - (100 / (1 + rs))
+    return lean_frame(out) if lean else out
 
 
-def cci_fast(tp: pd.Series, period: int = 20) -> pd.Series:
+def lean_frame(feat: pd.DataFrame, rows: Optional[int] = None) -> pd.DataFrame:
     """
-    Vectorized CCI using sliding windows.
-    Much faster than rolling().apply().
+    Last `rows` rows (default config.LEAN_KEEP_ROWS) of a feature frame with
+    float64 columns stored as float32. The tail is copied so the full-length
+    arrays can be freed. Each value is the float64 one rounded once: at most
+    2**-24 (about 6e-8) relative error. Rounding keeps order, so a comparison
+    in score_last_row can only turn into a tie (and change the score) when
+    its two sides round to the same float32.
     """
-    x = tp.to_numpy(dtype=np.float64)
-    n = x.size
-    out = np.full(n, np.nan, dtype=np.float64)
-
-    if n < period:
-        return pd.Series(out, index=tp.index)
-
-    w = np.lib.stride_tricks.sliding_window_view(
-        x, period)  # (n-period+1, period)
-    w_mean = w.mean(axis=1)
-    w_md = np.mean(np.abs(w - w_mean[:, None]), axis=1)
+    start = max(0, len(feat) - (rows or config.LEAN_KEEP_ROWS))
+    data = {}
+    for col in feat.columns:
+        values = feat[col].to_numpy()[start:]
+        data[col] = values.astype(np.float32) if values.dtype == np.float64 else values.copy()
+    return pd.DataFrame(data, index=feat.index[start:], copy=False)
 
-    denom = 0.015 * w_md
-    denom = np.where(np.abs(denom) > 1e-9, denom, 1e-9)
 
-    tp_last = w[:, -1]
-    out[period - 1:] = (tp_last - w_mean) / denom
-    return pd.Series(out, index=tp.index)
-
-
-def build_features(df: pd.DataFrame) -> pd.DataFrame:
-    out = df.copy()
-    close = out["Close"].astype(float)
+# -----------------------------
+# Feature cache
+# -----------------------------
+_CACHES: dict[bool, feature_cache.FeatureCache] = {}
 
-    out["SMA20"] = sma(close, 20)
-    out["SMA50"] = sma(close, 50)
 
-    out["MACD_H"] = macd_hist(close)
-    out["MACD_S"] = ema(out["MACD_H"], 9)
+def get_feature_cache(lean: bool = False) -> feature_cache.FeatureCache:
+    """One cache per process and mode; the code version covers loading and indicators."""
+    if lean not in _CACHES:
+        code = feature_cache.code_version(
+            load_ohlc, load_ohlc_csv, load_ohlc_store, raw_store.read_csv_columns,
+            build_features, lean_frame, indicators, rolling_kernels)
+        params = {**FEATURE_PARAMS, "lean_rows": config.LEAN_KEEP_ROWS} if lean else FEATURE_PARAMS
+        _CACHES[lean] = feature_cache.FeatureCache("local", params=params, code=code)
+    return _CACHES[lean]
 
-    out["RSI"] = rsi_wilder(close, 14)
-    out["RSI_S"] = sma(out["RSI"], 10)
 
-    if {"High", "Low"}.issubset(out.columns):
-        tp = (out["High"].astype(float) +
-              out["Low"].astype(float) + close) / 3.0
-    else:
-        tp = close
+def compute_features(path: str, lean: bool = False) -> pd.DataFrame:
+    with metrics.phase("load"):
+        df = load_ohlc(path)
+    if len(df) < MIN_WEEKS:
+        raise ValueError(f"not enough rows: {len(df)} (<{MIN_WEEKS})")
+    with metrics.phase("features"):
+        return build_features(df, lean=lean)
 
-    out["CCI"] = cci_fast(tp, 20)
-    out["CCI_S"] = sma(out["CCI"], 10)
 
-    return out
+def load_features(path: str, use_cache: bool = True, lean: bool = False) -> pd.DataFrame:
+    """
+    Feature frame for one raw file. Unchanged files are served from the
+    feature cache without parsing the file or recomputing indicators.
+    """
+    if not use_cache:
+        return compute_features(path, lean)
+    return get_feature_cache(lean).get_or_compute(path, lambda p: compute_features(p, lean))
 
 
 # -----------------------------
@@ -281,18 +348,14 @@ def sentiment_action(score: int) -> tuple[str, str]:
 # -----------------------------
 # Single file scan (worker-safe)
 # -----------------------------
-def scan_one_file(path: str) -> ScanRow:
+def scan_one_file(path: str, use_cache: bool = True, lean: bool = False) -> ScanRow:
     ticker = ticker_from_filename(path)
-    df = load_ohlc_csv(path)
-
-    if len(df) < MIN_WEEKS:
-        raise ValueError(f"not enough rows: {len(df)} (<{MIN_WEEKS})")
-
-    feat = build_features(df)
+    feat = load_features(path, use_cache, lean)
     last = feat.iloc[-1]
 
-    score = score_last_row(last)
-    sentiment, action = sentiment_action(score)
+    with metrics.phase("score"):
+        score = score_last_row(last)
+        sentiment, action = sentiment_action(score)
 
     return ScanRow(
         ticker=ticker,
@@ -311,31 +374,468 @@ def scan_one_file(path: str) -> ScanRow:
     )
 
 
+def scan_one_file_timed(path: str, use_cache: bool = True,
+                        lean: bool = False) -> tuple[Optional[ScanRow], dict]:
+    """Worker task: scan_one_file plus its timing record (errors go in the record)."""
+    # Stands in when the ticker name or the timer itself fails
+    timing = {"ticker": os.path.basename(path), "engine": "local", "path": path, "total_s": 0.0}
+    try:
+        with metrics.ticker(ticker_from_filename(path), "local", path=path) as timing:
+            return scan_one_file(path, use_cache, lean), timing
+    except Exception as e:
+        timing.setdefault("error", str(e))
+        return None, timing
+
+
 # -----------------------------
-# Orchestrator
+# Panel scan (all tickers in one pass)
 # -----------------------------
-def run_scan(max_workers: Optional[int] = None) -> pd.DataFrame:
-    os.makedirs(config.LOGS_DIR, exist_ok=True)
+def _try_load(path: str):
+    try:
+        return load_ohlc(path)
+    except Exception as e:
+        return e
+
+
+def _load_frames(paths: list[str], failures: list[str],
+                 max_workers: Optional[int] = None) -> dict[str, pd.DataFrame]:
+    """{path: ohlc frame} of every loadable file long enough to score."""
+    frames: dict[str, pd.DataFrame] = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as ex:
+        for p, res in zip(paths, ex.map(_try_load, paths)):
+            if isinstance(res, Exception):
+                failures.append(f"{os.path.basename(p)} -> {res}")
+            elif len(res) < MIN_WEEKS:
+                failures.append(
+                    f"{os.path.basename(p)} -> not enough rows: {len(res)} (<{MIN_WEEKS})")
+            else:
+                frames[p] = res
+    return frames
+
+
+def scan_panel(paths: list[str], max_workers: Optional[int] = None,
+               lean: bool = False) -> tuple[list[ScanRow], list[str]]:
+    """
+    Loads every file, aligns them into a (dates x tickers) panel and
+    computes features and scores for all tickers at once. Produces the
+    same rows as scan_one_file; tickers that cannot be aligned without
+    gaps go through scan_one_file instead. lean=True keeps only the last
+    row of each feature array, as float32 (the values lean_frame keeps).
+    """
+    rows: list[ScanRow] = []
+    failures: list[str] = []
 
-    paths = list(iter_raw_csv_paths(config.RAW_DIR))
-    if not paths:
-        print(f"No CSV files found in {config.RAW_DIR}")
-        return pd.DataFrame()
+    with metrics.stage("panel_load"):
+        frames = _load_frames(paths, failures, max_workers)
+
+    if not frames:
+        return rows, failures
+
+    # Panel columns are keyed by path (two files may map to one ticker)
+    with metrics.stage("panel_build"):
+        panel, rejected = panel_engine.build_panel(frames)
+    if panel.tickers:
+        with metrics.stage("panel_features"):
+            if lean:
+                last = {k: v.astype(np.float32) for k, v in
+                        panel_engine.panel_features(panel, rows=panel.last).items()}
+            else:
+                last = panel_engine.last_values(panel_engine.panel_features(panel), panel.last)
+        with metrics.stage("panel_score"):
+            complete = panel_engine.complete_mask(last)
+            scores = panel_engine.score_values(last)
+
+        for j, p in enumerate(panel.tickers):
+            if not complete[j]:
+                failures.append(
+                    f"{os.path.basename(p)} -> insufficient indicator history (NaN in last row)")
+                continue
+            score = int(scores[j])
+            sentiment, action = sentiment_action(score)
+            rows.append(ScanRow(
+                ticker=ticker_from_filename(p),
+                price=float(last["Close"][j]),
+                sma20=float(last["SMA20"][j]),
+                sma50=float(last["SMA50"][j]),
+                cci=float(last["CCI"][j]),
+                cci_s=float(last["CCI_S"][j]),
+                macd_h=float(last["MACD_H"][j]),
+                macd_s=float(last["MACD_S"][j]),
+                rsi=float(last["RSI"][j]),
+                rsi_s=float(last["RSI_S"][j]),
+                score=score,
+                sentiment=sentiment,
+                action=action,
+            ))
+
+    for p in rejected:
+        try:
+            rows.append(scan_one_file(p, lean=lean))
+        except Exception as e:
+            failures.append(f"{os.path.basename(p)} -> {e}")
+
+    return rows, failures
 
-    rows: list[ScanRow] = []
+
+# -----------------------------
+# Score history (every bar, not just the last)
+# -----------------------------
+HISTORY_COLUMNS = ["Date", "Ticker", "Close", "Score", "Sentiment", "Action"]
+
+
+def sentiment_actions(scores: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """sentiment_action for an array of scores: (sentiments, actions)."""
+    bands = [scores >= 8, scores >= 4, scores >= -3]
+    sentiment = np.select(bands, ["Bullish", "Positive", "Neutral"], "Bearish").astype(object)
+    action = np.select(bands, ["🔥 GO ALL IN", "📈 ACCUMULATE", "⏳ WAIT / CASH"],
+                       "🧯 DISTRIBUTE / AVOID").astype(object)
+    return sentiment, action
+
+
+def _history_frame(dates: np.ndarray, tickers: np.ndarray, close: np.ndarray,
+                   scores: np.ndarray) -> pd.DataFrame:
+    sentiment, action = sentiment_actions(scores)
+    return pd.DataFrame({"Date": dates, "Ticker": tickers, "Close": close, "Score": scores,
+                         "Sentiment": sentiment, "Action": action}, columns=HISTORY_COLUMNS)
+
+
+def score_history(feat: pd.DataFrame, ticker: str = "") -> pd.DataFrame:
+    """
+    Score, sentiment and action of every bar of one feature frame (as
+    build_features returns it) whose indicators are complete; the last row
+    matches score_last_row. One array operation, no per-bar loop.
+    """
+    values = {k: feat[k].to_numpy(dtype=np.float64) for k in panel_engine.FEATURE_COLUMNS}
+    ok = panel_engine.complete_mask(values)
+    scores = panel_engine.score_values(values)[ok]
+    return _history_frame(feat["Date"].to_numpy()[ok], np.full(len(scores), ticker, dtype=object),
+                          values["Close"][ok], scores)
+
+
+def panel_score_history(paths: list[str], max_workers: Optional[int] = None
+                        ) -> tuple[pd.DataFrame, list[str]]:
+    """
+    score_history for every bar of every file: features and scores for the
+    whole (dates x tickers) panel in one pass. Files that cannot be aligned
+    without gaps are scored one by one. Returns (history, failures) with
+    history sorted by Ticker then Date.
+    """
+    failures: list[str] = []
+    with metrics.stage("history_load"):
+        frames = _load_frames(paths, failures, max_workers)
+    if not frames:
+        return pd.DataFrame(columns=HISTORY_COLUMNS), failures
+
+    parts: list[pd.DataFrame] = []
+    with metrics.stage("history_build"):
+        panel, rejected = panel_engine.build_panel(frames)
+    if panel.tickers:
+        with metrics.stage("history_features"):
+            feat = panel_engine.panel_features(panel)
+        with metrics.stage("history_score"):
+            scores = panel_engine.score_values(feat)     # (T, N)
+            rows, cols = np.nonzero(panel_engine.complete_mask(feat))
+            names = np.array([ticker_from_filename(p) for p in panel.tickers], dtype=object)
+            parts.append(_history_frame(panel.dates[rows], names[cols],
+                                        feat["Close"][rows, cols], scores[rows, cols]))
+    for p, df in rejected.items():
+        try:
+            parts.append(score_history(build_features(df), ticker_from_filename(p)))
+        except Exception as e:
+            failures.append(f"{os.path.basename(p)} -> {e}")
+
+    out = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=HISTORY_COLUMNS)
+    out = out.sort_values(["Ticker", "Date"], kind="stable").reset_index(drop=True)
+    return out, failures
+
+
+# -----------------------------
+# Chunked dispatch (compact records, optional shared-memory panel)
+# -----------------------------
+# One record per scored ticker; Sentiment/Action are derived from Score
+# in the parent, so workers only ship fixed-width numbers.
+RECORD_DTYPE = np.dtype([
+    ("Ticker", "U32"), ("Price", "f8"), ("SMA20", "f8"), ("SMA50", "f8"),
+    ("CCI", "f8"), ("CCI_S", "f8"), ("MACD_H", "f8"), ("MACD_S", "f8"),
+    ("RSI", "f8"), ("RSI_S", "f8"), ("Score", "i8"),
+])
+_RECORD_FEATURES = ["Close", "SMA20", "SMA50", "CCI", "CCI_S",
+                    "MACD_H", "MACD_S", "RSI", "RSI_S"]
+CHUNKS_PER_WORKER = 4  # a few chunks per worker keeps the pool balanced
+
+# Per-process state set by _init_worker
+_WORKER: dict = {}
+
+
+def _attach_shared(name: str):
+    from multiprocessing import shared_memory
+    # Pool workers report to the parent's resource tracker, so attaching
+    # here does not transfer ownership: the parent unlinks the block.
+    return shared_memory.SharedMemory(name=name)
+
+
+def _init_worker(use_cache: bool, shared: Optional[dict] = None, lean: bool = False) -> None:
+    """Runs once per worker: warms the feature cache and maps the panel."""
+    _WORKER["use_cache"] = use_cache
+    _WORKER["lean"] = lean
+    if use_cache:
+        get_feature_cache(lean)
+    if shared:
+        _WORKER["shm"] = [_attach_shared(b["name"]) for b in shared["blocks"].values()]
+        _WORKER["panel"] = {
+            key: np.ndarray(b["shape"], dtype=b["dtype"], buffer=shm.buf)
+            for (key, b), shm in zip(shared["blocks"].items(), _WORKER["shm"])}
+        _WORKER["meta"] = shared
+
+
+def _fill_record(rec, ticker: str, last: pd.Series) -> None:
+    score = score_last_row(last)
+    rec["Ticker"] = ticker
+    for k in _RECORD_FEATURES:
+        rec["Price" if k == "Close" else k] = float(last[k])
+    rec["Score"] = score
+
+
+def scan_path_chunk(paths: list[str]) -> tuple[np.ndarray, list[str], list[dict]]:
+    """Worker task: score a chunk of raw files (records, failures, timings)."""
+    use_cache = _WORKER.get("use_cache", True)
+    lean = _WORKER.get("lean", False)
+    records = np.zeros(len(paths), dtype=RECORD_DTYPE)
+    failures: list[str] = []
+    timings: list[dict] = []
+    n = 0
+    for p in paths:
+        try:
+            with metrics.ticker(ticker_from_filename(p), "local", path=p) as timing:
+                timings.append(timing)
+                last = load_features(p, use_cache, lean).iloc[-1]
+                with metrics.phase("score"):
+                    _fill_record(records[n], ticker_from_filename(p), last)
+            n += 1
+        except Exception as e:
+            failures.append(f"{os.path.basename(p)} -> {e}")
+    return records[:n], failures, timings
+
+
+def scan_panel_chunk(columns: list[int]) -> tuple[np.ndarray, list[str], list[dict]]:
+    """Worker task: score panel columns read straight from shared memory."""
+    panel, meta = _WORKER["panel"], _WORKER["meta"]
+    lean = _WORKER.get("lean", False)
+    records = np.zeros(len(columns), dtype=RECORD_DTYPE)
+    failures: list[str] = []
+    timings: list[dict] = []
+    n = 0
+    for j in columns:
+        a, b = meta["first"][j], meta["last"][j] + 1
+        path = meta["paths"][j]
+        data = {"Date": panel["dates"][a:b], "Close": panel["close"][a:b, j]}
+        if meta["has_hl"][j]:
+            data["High"] = panel["high"][a:b, j]
+            data["Low"] = panel["low"][a:b, j]
+        try:
+            with metrics.ticker(ticker_from_filename(path), "local", path=path) as timing:
+                timings.append(timing)
+                with metrics.phase("features"):
+                    # Columns are views of the shared panel (build_features only adds columns)
+                    last = build_features(pd.DataFrame(data, copy=False), lean=lean).iloc[-1]
+                with metrics.phase("score"):
+                    _fill_record(records[n], ticker_from_filename(path), last)
+            n += 1
+        except Exception as e:
+            failures.append(f"{os.path.basename(path)} -> {e}")
+    return records[:n], failures, timings
+
+
+def records_frame(records: np.ndarray) -> pd.DataFrame:
+    """Report frame (same columns as ScanRow.to_dict) from scan records."""
+    out = pd.DataFrame(records)
+    labels = {int(s): sentiment_action(int(s)) for s in np.unique(records["Score"])}
+    out["Sentiment"] = [labels[s][0] for s in records["Score"]]
+    out["Action"] = [labels[s][1] for s in records["Score"]]
+    return out
+
+
+def _share_panel(panel: panel_engine.Panel) -> tuple[dict, list]:
+    """Copies the panel arrays into shared memory blocks."""
+    from multiprocessing import shared_memory
+
+    blocks, handles = {}, []
+    for key in ("dates", "close", "high", "low"):
+        arr = getattr(panel, key)
+        if key == "dates":
+            arr = arr.astype("datetime64[ns]")
+        shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+        handles.append(shm)
+        np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)[...] = arr
+        blocks[key] = {"name": shm.name, "shape": arr.shape, "dtype": arr.dtype.str}
+    meta = {"blocks": blocks, "paths": list(panel.tickers), "first": panel.first.tolist(),
+            "last": panel.last.tolist(), "has_hl": panel.has_hl.tolist()}
+    return meta, handles
+
+
+def scan_chunked(paths: list[str], max_workers: Optional[int] = None, use_cache: bool = True,
+                 shared_memory: bool = False, lean: bool = False,
+                 on_records: Optional[Callable[[np.ndarray], None]] = None
+                 ) -> tuple[np.ndarray, list[str]]:
+    """
+    Groups files into a few chunks per worker; each worker is initialized
+    once and returns one record array per chunk. With shared_memory=True
+    the parent loads every file into a panel placed in shared memory and
+    workers build features from it without copying or re-reading files.
+    With on_records, each chunk's records are handed to it as the chunk
+    completes instead of being collected (the returned array is empty).
+    """
+    workers = max_workers or os.cpu_count() or 1
     failures: list[str] = []
+    shared, handles = None, []
+    tasks: list[tuple] = []
+
+    try:
+        if shared_memory:
+            frames = _load_frames(paths, failures, max_workers)
+            rejected: list[str] = []
+            if frames:
+                panel, rejected_frames = panel_engine.build_panel(frames)
+                rejected = list(rejected_frames)
+                if panel.tickers:
+                    shared, handles = _share_panel(panel)
+                    n_chunks = min(len(panel.tickers), workers * CHUNKS_PER_WORKER)
+                    tasks += [(scan_panel_chunk, c.tolist()) for c in
+                              np.array_split(np.arange(len(panel.tickers)), n_chunks)]
+            remaining = rejected
+        else:
+            remaining = paths
+
+        if remaining:
+            n_chunks = min(len(remaining), workers * CHUNKS_PER_WORKER)
+            tasks += [(scan_path_chunk, list(c)) for c in
+                      np.array_split(np.array(remaining, dtype=object), n_chunks)]
+
+        parts: list[np.ndarray] = []
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(use_cache, shared, lean)) as ex:
+            futures = [ex.submit(fn, chunk) for fn, chunk in tasks]
+            for fut in as_completed(futures):
+                records, errs, timings = fut.result()
+                if on_records is None:
+                    parts.append(records)
+                else:
+                    on_records(records)
+                failures.extend(errs)
+                metrics.add_tickers(timings)
+    finally:
+        for shm in handles:
+            shm.close()
+            shm.unlink()
+
+    records = np.concatenate(parts) if parts else np.zeros(0, dtype=RECORD_DTYPE)
+    return records, failures
+
+
+# -----------------------------
+# Orchestrator
+# -----------------------------
+SCAN_MODES = ("process", "panel", "chunked")
+
+
+def report_path(day: Optional[str] = None) -> str:
+    day = day or datetime.now().strftime("%Y-%m-%d")
+    return os.path.join(config.LOGS_DIR, f"vibe_report_local_{day}.csv")
+
 
-    # Parallel scan: one CSV per process
+def run_scan(max_workers: Optional[int] = None, mode: str = "process",
+             use_cache: bool = True, shared_memory: bool = False,
+             profile: Optional[int] = None, lean: Optional[bool] = None,
+             stream: bool = False, live: Optional[float] = None) -> pd.DataFrame:
+    """
+    mode="process": one raw file per worker process (build_features per ticker,
+                    reused from the feature cache when the file is unchanged).
+    mode="panel":   one vectorized pass over all tickers (see scan_panel).
+    mode="chunked": a few file chunks per initialized worker, compact record
+                    results; shared_memory=True shares a pre-loaded panel.
+    Timings go to the metrics file; profile=N re-runs the N slowest tickers
+    under cProfile (see metrics.py). lean (default config.LEAN_FEATURES)
+    keeps only float32 last rows of each feature frame (see lean_frame).
+    stream=True writes rows to disk as they complete and builds the sorted
+    report with an external merge (see report_sink.py) instead of holding
+    every row; it returns only the top PRINT_TOP_N rows. live=S then prints
+    the running top/bottom tickers at most every S seconds.
+    """
+    if mode not in SCAN_MODES:
+        raise ValueError(f"unknown scan mode: {mode} (expected one of {SCAN_MODES})")
+    lean = config.LEAN_FEATURES if lean is None else lean
+
+    with metrics.session("scan_local", profile_top=profile):
+        with metrics.stage(f"run_scan[{mode}]"):
+            if stream:
+                out = _stream_scan(max_workers, mode, use_cache, shared_memory, lean, live)
+            else:
+                out = _run_scan(max_workers, mode, use_cache, shared_memory, lean)
+        metrics.profile_slowest(
+            "local", lambda r: scan_one_file(r["path"], use_cache=False, lean=lean))
+    return out
+
+
+def _scan_processes(paths: list[str], max_workers: Optional[int], use_cache: bool,
+                    lean: bool, on_row: Callable[[ScanRow], None]) -> list[str]:
+    """Parallel scan, one raw file per process; rows go to on_row as they complete."""
+    failures: list[str] = []
     with ProcessPoolExecutor(max_workers=max_workers) as ex:
-        futures = {ex.submit(scan_one_file, p): p for p in paths}
+        futures = {ex.submit(scan_one_file_timed, p, use_cache, lean): p for p in paths}
         for fut in as_completed(futures):
             p = futures[fut]
             try:
-                rows.append(fut.result())
+                row, timing = fut.result()
             except Exception as e:
                 failures.append(f"{os.path.basename(p)} -> {e}")
+                continue
+            metrics.add_tickers([timing])
+            if row is None:
+                failures.append(f"{os.path.basename(p)} -> {timing.get('error')}")
+            else:
+                on_row(row)
+    return failures
 
-    out = pd.DataFrame([r.to_dict() for r in rows])
+
+def _print_failures(failures: list[str]) -> None:
+    if failures:
+        print(f"\nSkipped {len(failures)} file(s). Failures (first 15):")
+        for msg in failures[:15]:
+            print(" -", msg)
+
+
+def _raw_paths() -> list[str]:
+    paths = list(iter_raw_csv_paths(config.RAW_DIR)) if os.path.isdir(config.RAW_DIR) else []
+    if not paths:
+        print(f"No raw files found in {config.RAW_DIR}")
+    return paths
+
+
+def _run_scan(max_workers: Optional[int], mode: str, use_cache: bool,
+              shared_memory: bool, lean: bool) -> pd.DataFrame:
+    paths = _raw_paths()
+    if not paths:
+        return pd.DataFrame()
+
+    rows: list[ScanRow] = []
+    failures: list[str] = []
+    records = None
+
+    if mode == "panel":
+        rows, failures = scan_panel(paths, max_workers=max_workers, lean=lean)
+    elif mode == "chunked":
+        records, failures = scan_chunked(paths, max_workers=max_workers, use_cache=use_cache,
+                                         shared_memory=shared_memory, lean=lean)
+    else:
+        failures = _scan_processes(paths, max_workers, use_cache, lean, rows.append)
+
+    if use_cache and mode != "panel":
+        get_feature_cache(lean).evict()
+
+    if records is not None:
+        out = records_frame(records)
+    else:
+        out = rows_frame(rows)
     if out.empty:
         print("No results. (All files failed or insufficient history.)")
         if failures:
@@ -347,23 +847,131 @@ def run_scan(max_workers: Optional[int] = None) -> pd.DataFrame:
     out = out.sort_values(["Score", "Ticker"], ascending=[
                           False, True]).reset_index(drop=True)
 
-    stamp = datetime.now().strftime("%Y-%m-%d")
-    out_path = os.path.join(config.LOGS_DIR, f"vibe_report_local_{stamp}.csv")
+    config.ensure_dir(config.LOGS_DIR)
+    out_path = report_path()
     out.to_csv(out_path, index=False)
+    report_history.record(out, "local")
 
     # Print only top N to keep printing fast
     print(out.head(PRINT_TOP_N).to_markdown(index=False, floatfmt=".2f"))
     print(f"\nSaved: {out_path}")
+    _print_failures(failures)
+    return out
+
+
+def _stream_scan(max_workers: Optional[int], mode: str, use_cache: bool,
+                 shared_memory: bool, lean: bool, live: Optional[float]) -> pd.DataFrame:
+    paths = _raw_paths()
+    if not paths:
+        return pd.DataFrame()
+
+    config.ensure_dir(config.LOGS_DIR)
+    out_path = report_path()
+    last_print = time.perf_counter()
+    with report_sink.ReportSink(out_path, list(REPORT_COLUMNS.values()),
+                                top_n=PRINT_TOP_N) as sink:
+        def emit(rows: Iterable[dict]) -> None:
+            nonlocal last_print
+            sink.add_many(rows)
+            if live is not None and time.perf_counter() - last_print >= live:
+                print(f"⏱️ {sink.board.summary()}", flush=True)
+                last_print = time.perf_counter()
+
+        if mode == "panel":
+            rows, failures = scan_panel(paths, max_workers=max_workers, lean=lean)
+            emit(r.to_dict() for r in rows)
+        elif mode == "chunked":
+            _, failures = scan_chunked(
+                paths, max_workers=max_workers, use_cache=use_cache, shared_memory=shared_memory,
+                lean=lean, on_records=lambda rec: emit(records_frame(rec).to_dict("records")))
+        else:
+            failures = _scan_processes(paths, max_workers, use_cache, lean,
+                                       lambda row: emit([row.to_dict()]))
+        if use_cache and mode != "panel":
+            get_feature_cache(lean).evict()
+
+        if not sink.rows:
+            print("No results. (All files failed or insufficient history.)")
+            _print_failures(failures)
+            return pd.DataFrame()
+        with metrics.stage("report_merge"):
+            sink.close()
+
+    # Appended in bounded chunks, like the report itself; the first one
+    # replaces an earlier report of the same day
+    chunks = pd.read_csv(out_path, chunksize=report_sink.RUN_ROWS)
+    for i, chunk in enumerate(chunks):
+        report_history.record(chunk, "local", replace=i == 0)
+
+    top = sink.top_frame()
+    print(top.to_markdown(index=False, floatfmt=".2f"))
+    print(f"\nSaved: {out_path} ({sink.rows} row(s))")
+    _print_failures(failures)
+    return top
+
+
+def history_path(day: Optional[str] = None) -> str:
+    day = day or datetime.now().strftime("%Y-%m-%d")
+    return os.path.join(config.LOGS_DIR, f"vibe_history_local_{day}.csv")
+
+
+def run_history(max_workers: Optional[int] = None) -> pd.DataFrame:
+    """
+    Score time series of every raw file (see panel_score_history), saved to
+    history_path(). Each ticker's last row is what run_scan reports.
+    """
+    paths = list(iter_raw_csv_paths(config.RAW_DIR)) if os.path.isdir(config.RAW_DIR) else []
+    if not paths:
+        print(f"No raw files found in {config.RAW_DIR}")
+        return pd.DataFrame(columns=HISTORY_COLUMNS)
 
+    with metrics.session("history_local"), metrics.stage("run_history"):
+        out, failures = panel_score_history(paths, max_workers=max_workers)
+        if not out.empty:
+            config.ensure_dir(config.LOGS_DIR)
+            out_path = history_path()
+            out.to_csv(out_path, index=False)
+
+    if out.empty:
+        print("No results. (All files failed or insufficient history.)")
+    else:
+        print(f"✅ {len(out)} scored bar(s) for {out['Ticker'].nunique()} ticker(s)")
+        print(f"\nSaved: {out_path}")
     if failures:
         print(f"\nSkipped {len(failures)} file(s). Failures (first 15):")
         for msg in failures[:15]:
             print(" -", msg)
-
     return out
 
 
 if __name__ == "__main__":
-    # If you want to force a specific number of workers:
-    # run_scan(max_workers=os.cpu_count())
-    run_scan()
+    parser = argparse.ArgumentParser(description="Local (shadow) vibe scanner")
+    parser.add_argument("--mode", choices=SCAN_MODES, default="process",
+                        help="process: one file per worker; panel: vectorized across tickers; "
+                             "chunked: file chunks per worker")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Worker count (default: os.cpu_count())")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Recompute every feature frame (process/chunked modes)")
+    parser.add_argument("--shared-memory", action="store_true",
+                        help="chunked mode: load all files once into a shared-memory panel")
+    parser.add_argument("--profile", type=int, default=None, metavar="N",
+                        help="Save cProfile output for the N slowest tickers")
+    parser.add_argument("--lean", action="store_true", default=None,
+                        help="Keep only float32 last rows of each feature frame "
+                             "(default: config.LEAN_FEATURES)")
+    parser.add_argument("--stream", action="store_true",
+                        help="Write rows as they complete and merge-sort the report on disk "
+                             "(for very large universes)")
+    parser.add_argument("--live", type=float, default=None, metavar="S",
+                        help="With --stream: print the running top/bottom tickers every S seconds")
+    parser.add_argument("--history", action="store_true",
+                        help="Score every bar instead of the last one and save the "
+                             "score time series (vibe_history_local_<day>.csv)")
+    args = parser.parse_args()
+    if args.history:
+        run_history(max_workers=args.workers)
+    else:
+        run_scan(max_workers=args.workers, mode=args.mode, use_cache=not args.no_cache,
+                 shared_memory=args.shared_memory, profile=args.profile, lean=args.lean,
+                 stream=args.stream, live=args.live)
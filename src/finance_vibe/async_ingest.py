@@ -0,0 +1,304 @@
+"""
+Asyncio ingestion with adaptive rate limiting.
+
+Each symbol is one task; an AdaptiveLimiter decides when it may call the
+provider. The limiter is a token bucket plus a cap on requests in flight,
+both tuned AIMD-style (additive increase, multiplicative decrease):
+
+- every success raises the rate by about INCREASE requests/s per second
+  and the in-flight cap by about one per round;
+- a throttled response (HTTP 429) halves both and pauses all requests
+  for the server's Retry-After. Responses to requests sent before that
+  decrease do not shrink the limits again.
+
+Failed attempts are retried with capped exponential backoff and full
+jitter. Every attempt has a timeout. Symbols with no data are not
+retried. The run ends with a summary of what failed and why.
+
+    python src/finance_vibe/async_ingest.py SPY QQQ NVDA --period 2y
+    python src/finance_vibe/async_ingest.py --from-list --provider http://127.0.0.1:8765
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import random
+import time
+from collections import Counter
+from concurrent.futures import Executor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+import pandas as pd
+
+import config
+import raw_store
+from providers import NO_DATA, DataProvider, Throttled, get_provider
+
+
+INCREASE = 1.0      # requests/s gained per second of clean responses
+DECREASE = 0.5      # factor applied to rate and in-flight cap on a 429
+MIN_RATE = 0.2      # requests per second
+DEFAULT_PAUSE = 1.0  # seconds to pause on a 429 without Retry-After
+
+
+# -----------------------------
+# Rate limiter
+# -----------------------------
+class AdaptiveLimiter:
+    """Token bucket + in-flight cap, both adapted to throttling responses."""
+
+    def __init__(self, rate: Optional[float] = None, max_rate: Optional[float] = None,
+                 max_concurrency: Optional[int] = None, burst: Optional[float] = None):
+        self.rate = rate or config.INGEST_RATE
+        self.max_rate = max(max_rate or config.INGEST_MAX_RATE, self.rate)
+        self.max_concurrency = max_concurrency or config.INGEST_CONCURRENCY
+        self.concurrency = float(min(self.max_concurrency, max(1.0, self.rate)))
+        self.burst = burst or max(1.0, self.rate)
+        self.in_flight = 0
+        self.throttles = 0
+        self.decreases = 0
+        self._tokens = 1.0
+        self._stamp = time.monotonic()
+        self._paused_until = 0.0
+        self._epoch = 0
+        self._cond: Optional[asyncio.Condition] = None
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._stamp) * self.rate)
+        self._stamp = now
+
+    async def acquire(self) -> int:
+        """Waits for a request slot; returns the epoch to hand back to release()."""
+        if self._cond is None:
+            self._cond = asyncio.Condition()
+        async with self._cond:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if now < self._paused_until:
+                    delay: Optional[float] = self._paused_until - now
+                elif self.in_flight >= int(self.concurrency):
+                    delay = None  # woken by release()
+                elif self._tokens < 1.0:
+                    delay = (1.0 - self._tokens) / self.rate
+                else:
+                    self._tokens -= 1.0
+                    self.in_flight += 1
+                    return self._epoch
+                try:
+                    await asyncio.wait_for(self._cond.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def release(self, epoch: int, throttled: bool = False,
+                      retry_after: Optional[float] = None) -> None:
+        async with self._cond:
+            self.in_flight -= 1
+            now = time.monotonic()
+            if throttled:
+                self.throttles += 1
+                self._paused_until = max(self._paused_until,
+                                         now + (retry_after or DEFAULT_PAUSE))
+                if epoch == self._epoch:  # first 429 of this episode
+                    self._epoch += 1
+                    self.decreases += 1
+                    self.rate = max(MIN_RATE, self.rate * DECREASE)
+                    self.concurrency = max(1.0, self.concurrency * DECREASE)
+                    self.burst = max(1.0, self.rate)
+                    self._tokens = min(self._tokens, 1.0)
+            else:
+                self.rate = min(self.max_rate, self.rate + INCREASE / self.rate)
+                self.concurrency = min(float(self.max_concurrency),
+                                       self.concurrency + 1.0 / self.concurrency)
+                self.burst = max(1.0, self.rate)
+            self._cond.notify_all()
+
+
+# -----------------------------
+# Retries / summary
+# -----------------------------
+@dataclass(frozen=True)
+class RetryPolicy:
+    attempts: int = config.INGEST_RETRIES
+    base_delay: float = 0.5      # seconds before the first retry (before jitter)
+    max_delay: float = 30.0
+    timeout: float = config.INGEST_TIMEOUT  # per attempt
+
+    def delay(self, attempt: int) -> float:
+        """Full jitter: uniform(0, min(max_delay, base * 2**attempt))."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+
+@dataclass
+class IngestSummary:
+    ok: list[str] = field(default_factory=list)
+    failed: dict[str, str] = field(default_factory=dict)
+    attempts: int = 0
+    retries: int = 0
+    throttled: int = 0
+    timeouts: int = 0
+    seconds: float = 0.0
+    final_rate: float = 0.0
+    final_concurrency: int = 0
+
+    @property
+    def symbols_per_s(self) -> float:
+        return len(self.ok) / self.seconds if self.seconds > 0 else float("nan")
+
+    def print(self, top: int = 15) -> None:
+        total = len(self.ok) + len(self.failed)
+        print(f"\n✅ {len(self.ok)}/{total} symbol(s) in {self.seconds:.1f}s "
+              f"({self.symbols_per_s:.1f}/s); {self.attempts} request(s), "
+              f"{self.retries} retr{'y' if self.retries == 1 else 'ies'}, "
+              f"{self.throttled} throttled, {self.timeouts} timed out")
+        print(f"   Final rate {self.final_rate:.1f} req/s, "
+              f"{self.final_concurrency} in flight")
+        if self.failed:
+            reasons = Counter(_reason(e) for e in self.failed.values())
+            print(f"\n❌ {len(self.failed)} failure(s): "
+                  + ", ".join(f"{n} {r}" for r, n in reasons.most_common()))
+            for sym, error in list(self.failed.items())[:top]:
+                print(f" - {sym}: {error}")
+
+
+def _reason(error: str) -> str:
+    return error.split(":", 1)[0]
+
+
+# -----------------------------
+# Ingestion
+# -----------------------------
+FrameSink = Callable[[str, pd.DataFrame], None]
+
+
+def raw_writer(raw_dir: Optional[str] = None,
+               name: Callable[[str], str] = lambda symbol: symbol) -> FrameSink:
+    """Sink saving each frame as raw_dir/<name(symbol)> in the configured format."""
+    def write(symbol: str, df: pd.DataFrame) -> None:
+        stem = os.path.join(raw_dir or config.RAW_DIR, name(symbol))
+        raw_store.write_raw(df, raw_store.path_for(stem))
+    return write
+
+
+async def _deliver(symbol: str, df: Optional[pd.DataFrame], summary: IngestSummary,
+                   sink: Optional[FrameSink], pool: Executor) -> None:
+    if df is None or df.empty:
+        summary.failed[symbol] = NO_DATA
+        return
+    try:
+        if sink is not None:
+            await asyncio.get_running_loop().run_in_executor(pool, sink, symbol, df)
+    except Exception as e:
+        summary.failed[symbol] = f"write failed: {e}"
+        return
+    summary.ok.append(symbol)
+
+
+async def _fetch_symbol(symbol: str, provider: DataProvider, limiter: AdaptiveLimiter,
+                        retry: RetryPolicy, summary: IngestSummary, request: dict,
+                        sink: Optional[FrameSink], pool: Executor) -> None:
+    loop = asyncio.get_running_loop()
+    error = ""
+    # Cached bars need no request slot
+    cached = provider.from_cache(symbol, **request)
+    if cached is not None:
+        await _deliver(symbol, cached, summary, sink, pool)
+        return
+    for attempt in range(retry.attempts):
+        if attempt:
+            summary.retries += 1
+        epoch = await limiter.acquire()
+        summary.attempts += 1
+        try:
+            df = await asyncio.wait_for(loop.run_in_executor(
+                pool, lambda: provider.fetch_one(symbol, **request)), retry.timeout)
+        except Throttled as e:
+            summary.throttled += 1
+            await limiter.release(epoch, throttled=True, retry_after=e.retry_after)
+            error = f"throttled: {e}"
+            await asyncio.sleep(max(e.retry_after or 0.0, retry.delay(attempt)))
+            continue
+        except asyncio.TimeoutError:
+            # The worker thread keeps running; its result is discarded
+            summary.timeouts += 1
+            await limiter.release(epoch)
+            error = f"timeout: no response in {retry.timeout:.0f}s"
+        except Exception as e:
+            await limiter.release(epoch)
+            error = f"error: {e}"
+        else:
+            await limiter.release(epoch)
+            await _deliver(symbol, df, summary, sink, pool)
+            return
+        await asyncio.sleep(retry.delay(attempt))
+    summary.failed[symbol] = error
+
+
+async def ingest_async(symbols: list[str], provider: Optional[DataProvider] = None,
+                       period: Optional[str] = None, interval: str = "1d",
+                       start: Optional[str] = None, sink: Optional[FrameSink] = None,
+                       limiter: Optional[AdaptiveLimiter] = None,
+                       retry: Optional[RetryPolicy] = None) -> IngestSummary:
+    provider = provider or get_provider()
+    limiter = limiter or AdaptiveLimiter()
+    retry = retry or RetryPolicy()
+    symbols = list(dict.fromkeys(s.upper() for s in symbols))
+    summary = IngestSummary()
+    request = {"period": period, "interval": interval, "start": start}
+
+    # Blocking provider calls run here; sized past the in-flight cap so
+    # threads left behind by timed-out attempts do not starve new ones
+    pool = ThreadPoolExecutor(max_workers=2 * limiter.max_concurrency)
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(_fetch_symbol(s, provider, limiter, retry, summary, request,
+                                             sink, pool) for s in symbols))
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+    summary.seconds = time.perf_counter() - started
+    summary.final_rate = limiter.rate
+    summary.final_concurrency = int(limiter.concurrency)
+    return summary
+
+
+def ingest(symbols: list[str], provider: Optional[DataProvider] = None,
+           period: Optional[str] = None, interval: str = "1d", start: Optional[str] = None,
+           sink: Optional[FrameSink] = None, limiter: Optional[AdaptiveLimiter] = None,
+           retry: Optional[RetryPolicy] = None) -> IngestSummary:
+    """Blocking wrapper around ingest_async (for scripts without an event loop)."""
+    return asyncio.run(ingest_async(symbols, provider, period, interval, start, sink,
+                                    limiter, retry))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Adaptive-rate async ingestion")
+    parser.add_argument("symbols", nargs="*")
+    parser.add_argument("--from-list", action="store_true",
+                        help=f"Read symbols from {config.TICKER_LIST_PATH}")
+    parser.add_argument("--provider", default=None,
+                        help="yfinance, file:<dir> or http://host:port (default: config)")
+    parser.add_argument("--period", default="2y")
+    parser.add_argument("--interval", default="1d")
+    parser.add_argument("--rate", type=float, default=None, help="Initial requests/s")
+    parser.add_argument("--max-rate", type=float, default=None)
+    parser.add_argument("--concurrency", type=int, default=None, help="Most requests in flight")
+    parser.add_argument("--attempts", type=int, default=config.INGEST_RETRIES)
+    parser.add_argument("--timeout", type=float, default=config.INGEST_TIMEOUT)
+    parser.add_argument("--raw-dir", default=None, help=f"Default: {config.RAW_DIR}")
+    parser.add_argument("--dry-run", action="store_true", help="Fetch but do not write")
+    args = parser.parse_args()
+
+    symbols = list(args.symbols)
+    if args.from_list:
+        symbols += pd.read_csv(config.TICKER_LIST_PATH)["Ticker"].tolist()
+    if not symbols:
+        parser.error("no symbols (pass some or use --from-list)")
+
+    summary = ingest(
+        symbols, get_provider(args.provider), period=args.period, interval=args.interval,
+        sink=None if args.dry_run else raw_writer(args.raw_dir),
+        limiter=AdaptiveLimiter(args.rate, args.max_rate, args.concurrency),
+        retry=RetryPolicy(attempts=args.attempts, timeout=args.timeout))
+    summary.print()
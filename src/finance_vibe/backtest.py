@@ -1,56 +1,221 @@
+import argparse
+import os
+from dataclasses import asdict, dataclass
+
+import numpy as np
 import pandas as pd
-from pathlib import Path
+
+import raw_store
+from config import RAW_DIR
+from indicators import Resolver
+
+START_BALANCE = 10000.0
+WARMUP_BARS = 200  # Start after 200-MA is ready
+
+
+@dataclass(frozen=True)
+class BacktestParams:
+    macd_fast: int = 15
+    macd_slow: int = 30
+    macd_signal: int = 9
+    ma_len: int = 200
+    rsi_len: int = 14
+    rsi_entry_max: float = 65.0   # buy only below this RSI
+    rsi_exit_min: float = 75.0    # sell above this RSI
+
+    def as_dict(self):
+        return asdict(self)
+
+
+DEFAULT_PARAMS = BacktestParams()
+
+
+@dataclass
+class BacktestResult:
+    ticker: str
+    equity: pd.Series      # account value at each bar close
+    trades: pd.DataFrame   # one row per round trip (last one may be open)
+    stats: dict
+
+
+def indicators(close, params=DEFAULT_PARAMS, r=None):
+    """
+    MA, MACD line, signal line and RSI for one parameter set.
+    Pass a shared Resolver to reuse EMAs/MAs/RSIs across parameter sets.
+    """
+    r = r or Resolver(close.to_frame("Close"))
+    ma = r.get("sma", window=params.ma_len)
+    macd = r.get("macd_line", fast=params.macd_fast, slow=params.macd_slow)
+    signal_line = r.get("macd_signal", fast=params.macd_fast, slow=params.macd_slow,
+                        signal=params.macd_signal)
+    rsi = r.get("rsi_simple", period=params.rsi_len)
+    return ma, macd, signal_line, rsi
+
+
+def signals_from(close, ma, macd, signal_line, rsi, params=DEFAULT_PARAMS):
+    """Entry/exit conditions for every bar as boolean arrays."""
+    # BUY SIGNAL: Bullish Trend + MACD Cross Up + RSI not overbought
+    entry = (close > ma) & (macd > signal_line) & (rsi < params.rsi_entry_max)
+    # SELL SIGNAL: MACD Cross Down OR RSI Overbought
+    exit_ = (macd < signal_line) | (rsi > params.rsi_exit_min)
+    return np.asarray(entry), np.asarray(exit_)
+
+
+def compute_signals(close, params=DEFAULT_PARAMS, r=None):
+    return signals_from(close, *indicators(close, params, r), params=params)
+
+
+def resolve_positions(entry, exit_, start=WARMUP_BARS):
+    """
+    Position held after each bar's close (1 = stock, 0 = cash).
+    Buy when flat and `entry`, sell when long and `exit_`.
+    """
+    entry = entry.copy()
+    exit_ = exit_.copy()
+    entry[:start] = False
+    exit_[:start] = False
+
+    both = entry & exit_
+    if not both.any():
+        # Disjoint signals: the state is simply the most recent signal
+        marks = np.where(entry, 1.0, np.where(exit_, 0.0, np.nan))
+        return pd.Series(marks).ffill().fillna(0.0).to_numpy(dtype=np.int8)
+
+    # Overlapping signals depend on the current state: walk the signal bars
+    return _walk_positions(entry, exit_)
+
+
+def _walk_positions(entry, exit_):
+    pos = np.zeros(len(entry), dtype=np.int8)
+    held = 0
+    last = 0
+    for i in np.flatnonzero(entry | exit_):
+        pos[last:i] = held
+        if held == 0 and entry[i]:
+            held = 1
+        elif held == 1 and exit_[i]:
+            held = 0
+        last = i
+    pos[last:] = held
+    return pos
+
+
+def equity_curve(close, pos):
+    """Account value after each close, compounding returns only while held."""
+    held = np.concatenate([[0], pos[:-1]])
+    rets = np.zeros(len(close))
+    rets[1:] = close[1:] / close[:-1] - 1.0
+    growth = np.where(held == 1, rets, 0.0)
+    return START_BALANCE * np.cumprod(1.0 + growth)
+
+
+def trade_bounds(pos):
+    """Entry and exit bar indices; an open trade is closed at the last bar."""
+    change = np.diff(np.concatenate([[0], pos]))
+    entries = np.flatnonzero(change == 1)
+    exits = np.flatnonzero(change == -1)
+    is_open = len(exits) < len(entries)
+    if is_open:
+        exits = np.append(exits, len(pos) - 1)
+    return entries, exits, is_open
+
+
+def summarize(close, pos, dates, start=WARMUP_BARS, equity=None):
+    """Stats dict for a position array (NumPy only, used by sweeps)."""
+    if equity is None:
+        equity = equity_curve(close, pos)
+    entries, exits, is_open = trade_bounds(pos)
+
+    first = start if len(equity) > start else len(equity) - 1
+    window = equity[first:]
+    final_val = float(equity[-1])
+    years = (dates[-1] - dates[first]).days / 365.25
+    drawdown = window / np.maximum.accumulate(window) - 1.0
+    trade_rets = close[exits] / close[entries] - 1.0
+    closed = trade_rets[:-1] if is_open else trade_rets
+
+    return {
+        "final_value": final_val,
+        "total_return_pct": (final_val / START_BALANCE - 1.0) * 100,
+        "cagr_pct": ((final_val / START_BALANCE) ** (1 / years) - 1.0) * 100 if years > 0 else np.nan,
+        "max_drawdown_pct": float(drawdown.min()) * 100,
+        "win_rate_pct": float((closed > 0).mean()) * 100 if len(closed) else np.nan,
+        "exposure_pct": float(pos[start:].mean()) * 100 if len(pos) > start else 0.0,
+        "trades": int(len(entries)),
+    }
+
+
+def simulate(close, pos, dates, start=WARMUP_BARS):
+    """Equity curve and trade list for a close-to-close, all-in strategy."""
+    equity = equity_curve(close, pos)
+    entries, exits, is_open = trade_bounds(pos)
+
+    trades = pd.DataFrame({
+        "entry_date": dates[entries],
+        "entry_price": close[entries],
+        "exit_date": dates[exits],
+        "exit_price": close[exits],
+    })
+    trades["return_pct"] = (trades["exit_price"] / trades["entry_price"] - 1.0) * 100
+    trades["open"] = False
+    if is_open:
+        trades.loc[trades.index[-1], "open"] = True
+
+    stats = summarize(close, pos, dates, start, equity=equity)
+    return pd.Series(equity, index=dates, name="Equity"), trades, stats
+
+
+def backtest_frame(df, ticker_symbol, params=DEFAULT_PARAMS, r=None):
+    close = df['Close']
+    entry, exit_ = compute_signals(close, params, r)
+    pos = resolve_positions(entry, exit_)
+    equity, trades, stats = simulate(close.to_numpy(dtype=np.float64), pos, df.index)
+    return BacktestResult(ticker_symbol, equity, trades, stats)
+
 
 def run_backtest(ticker_symbol):
-    file_path = f"data/raw/{ticker_symbol}.csv"
-    if not Path(file_path).exists():
+    file_path = raw_store.resolve_path(os.path.join(RAW_DIR, ticker_symbol))
+    if file_path is None:
         print(f"No data for {ticker_symbol}")
-        return
-
-    df = pd.read_csv(file_path, index_col='Date', parse_dates=True).ffill()
-    
-    # 1. Re-calculate indicators
-    ma200 = df['Close'].rolling(window=200).mean()
-    exp1 = df['Close'].ewm(span=15, adjust=False).mean()
-    exp2 = df['Close'].ewm(span=30, adjust=False).mean()
-    macd = exp1 - exp2
-    signal_line = macd.ewm(span=9, adjust=False).mean()
-    
-    delta = df['Close'].diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-    rsi = 100 - (100 / (1 + (gain / loss)))
-
-    # 2. Backtest Variables
-    position = 0  # 0 = cash, 1 = holding stock
-    balance = 10000.0
-    shares = 0
-
-    for i in range(200, len(df)):  # Start after 200-MA is ready
-        price = df['Close'].iloc[i]
-        
-        # BUY SIGNAL: Bullish Trend + MACD Cross Up + RSI not overbought
-        if position == 0:
-            if price > ma200.iloc[i] and macd.iloc[i] > signal_line.iloc[i] and rsi.iloc[i] < 65:
-                shares = balance / price
-                balance = 0
-                position = 1
-                # print(f"BUY {ticker_symbol} at ${price:.2f}")
-
-        # SELL SIGNAL: MACD Cross Down OR RSI Overbought
-        elif position == 1:
-            if macd.iloc[i] < signal_line.iloc[i] or rsi.iloc[i] > 75:
-                balance = shares * price
-                shares = 0
-                position = 0
-                # print(f"SELL {ticker_symbol} at ${price:.2f}")
-
-    final_val = balance if position == 0 else shares * df['Close'].iloc[-1]
-    profit_pct = ((final_val - 10000) / 10000) * 100
-    print(f"💰 {ticker_symbol} Result: {profit_pct:.2f}% | Final: ${final_val:.2f}")
+        return None
+
+    df = raw_store.read_raw(file_path).ffill()
+    result = backtest_frame(df, ticker_symbol)
+
+    s = result.stats
+    print(f"💰 {ticker_symbol} Result: {s['total_return_pct']:.2f}% | Final: ${s['final_value']:.2f}")
+    return result
+
+
+def run_backtest_all(raw_dir=None):
+    """Backtests every file in data/raw and returns one stats row per ticker."""
+    rows = []
+    for path in raw_store.iter_raw_paths(raw_dir):
+        ticker = os.path.basename(raw_store.strip_suffix(path))
+        try:
+            df = raw_store.read_raw(path).ffill()
+            rows.append({"Ticker": ticker, **backtest_frame(df, ticker).stats})
+        except Exception as e:
+            print(f"❌ {ticker}: {e}")
+
+    summary = pd.DataFrame(rows)
+    if summary.empty:
+        print("No results.")
+        return summary
+    summary = summary.sort_values("total_return_pct", ascending=False).reset_index(drop=True)
+    print(summary.to_markdown(index=False, floatfmt=".2f"))
+    return summary
+
 
 if __name__ == "__main__":
-    tickers = ["AAPL", "TSLA", "NVDA", "SPY","PLTR","HOOD"]
-    print("--- 2-Year Backtest Results (Start: $10,000) ---")
-    for t in tickers:
-        run_backtest(t)
\ No newline at end of file
+    parser = argparse.ArgumentParser()
+    parser.add_argument("tickers", nargs="*", default=["AAPL", "TSLA", "NVDA", "SPY", "PLTR", "HOOD"])
+    parser.add_argument("--all", action="store_true", help="Backtest every file in data/raw")
+    args = parser.parse_args()
+
+    print(f"--- Backtest Results (Start: ${START_BALANCE:,.0f}) ---")
+    if args.all:
+        run_backtest_all()
+    else:
+        for t in args.tickers:
+            run_backtest(t)
@@ -0,0 +1,357 @@
+"""
+Canonical daily bars and the timeframes resampled from them.
+
+Each symbol is downloaded once, as daily bars, into data/daily/<SYMBOL>.cols.
+Every other timeframe is built from that store on demand:
+
+    - "1wk": weeks ending Friday, labelled with the Friday (W-FRI);
+    - "1mo" / "3mo" / "1y": calendar months, quarters and years;
+    - any other pandas offset alias ("2W-FRI", "5D", ...).
+
+Only completed bars are kept. The daily store never holds the bar of a
+session that has not closed, and a resampled bucket is dropped until the
+store reaches its last weekday (the current week before Friday's bar,
+as the old Friday filter did). Resampled frames depend on the daily
+file alone, so they are cached per file in the feature cache
+(namespace "bars") and rebuilt only when the store changes.
+
+Updates are incremental. A symbol whose store already holds the last
+closed session sends no request. Otherwise the last OVERLAP_BARS stored
+bars are fetched again together with everything newer. If those
+overlapping closes no longer match, a split or dividend re-adjusted the
+history upstream and the symbol is downloaded again in full. The raw
+files resampled from it are rewritten with the same dates and new prices,
+so anything that keeps state across runs (streaming.py) compares closes,
+not just dates.
+
+    python src/finance_vibe/bar_store.py update SPY QQQ
+    python src/finance_vibe/bar_store.py show SPY --interval 1wk --period 1y
+    python src/finance_vibe/bar_store.py derive --interval 1mo   # data/raw/<T>_5y_1mo
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Iterable, Optional
+from zoneinfo import ZoneInfo
+
+import numpy as np
+import pandas as pd
+
+import async_ingest
+import config
+import feature_cache
+import raw_store
+from providers import BatchResult, DataProvider, get_provider, period_start
+
+
+OVERLAP_BARS = 3       # stored bars fetched again to detect re-adjusted history
+ADJUSTMENT_RTOL = 1e-4
+
+# interval -> pandas resample rule (None: the daily bars themselves);
+# any other interval is used as a rule as is
+INTERVAL_RULES = {"1d": None, "1wk": "W-FRI", "1mo": "ME", "3mo": "QE", "1y": "YE"}
+
+# How a column is combined into a longer bar (other columns: last value)
+AGGREGATIONS = {"Open": "first", "High": "max", "Low": "min", "Close": "last",
+                "Adj Close": "last", "Volume": "sum"}
+
+# Rules pandas labels with the bucket's last day (the others use its first)
+_END_LABELLED = ("W", "ME", "QE", "YE", "BME", "BQE", "BYE")
+
+
+# -----------------------------
+# Paths / sessions
+# -----------------------------
+def store_path(symbol: str) -> str:
+    return raw_store.path_for(os.path.join(config.DAILY_DIR, symbol.upper()))
+
+
+def stored_symbols() -> list[str]:
+    if not os.path.isdir(config.DAILY_DIR):
+        return []
+    return [os.path.basename(raw_store.strip_suffix(p))
+            for p in raw_store.iter_raw_paths(config.DAILY_DIR)]
+
+
+def last_session(now: Optional[float] = None) -> pd.Timestamp:
+    """
+    Date of the newest closed session: today once MARKET_CLOSE has passed,
+    else the previous weekday. Exchange holidays are not known; they count
+    as sessions without a bar.
+    """
+    tz = ZoneInfo(config.MARKET_TZ)
+    current = datetime.fromtimestamp(time.time() if now is None else now, tz)
+    close = datetime.strptime(config.MARKET_CLOSE, "%H:%M").time()
+    day = current.date() if current.time() >= close else current.date() - timedelta(days=1)
+    while day.weekday() >= 5:
+        day -= timedelta(days=1)
+    return pd.Timestamp(day)
+
+
+def completed(daily: pd.DataFrame, session: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+    """Drops bars of sessions that have not closed yet (today's partial bar)."""
+    session = last_session() if session is None else session
+    if len(daily) and daily.index[-1].normalize() > session:
+        daily = daily[daily.index.normalize() <= session]
+    return daily
+
+
+def longer_period(period: Optional[str], than: Optional[str]) -> bool:
+    """True when a `period` download reaches further back than a `than` one."""
+    ref = pd.Timestamp("2000-01-01")
+    start, other = period_start(ref, period), period_start(ref, than)
+    if start is None:
+        return other is not None
+    return other is not None and start < other
+
+
+# -----------------------------
+# Resampling
+# -----------------------------
+def rule_for(interval: str) -> Optional[str]:
+    return INTERVAL_RULES.get(interval, interval)
+
+
+def _bucket_end(label: pd.Timestamp, rule: str) -> pd.Timestamp:
+    """Last calendar day of the resampled bucket labelled `label`."""
+    offset = pd.tseries.frequencies.to_offset(rule)
+    if offset.rule_code.split("-")[0] in _END_LABELLED:
+        return label
+    return label + offset - pd.Timedelta(days=1)
+
+
+def resample(daily: pd.DataFrame, interval: str) -> pd.DataFrame:
+    """
+    Completed `interval` bars from daily bars. The last bucket is dropped
+    while the daily bars stop before its last weekday (e.g. a week whose
+    Friday bar is not stored yet).
+    """
+    rule = rule_for(interval)
+    if rule is None or daily.empty:
+        return daily
+    agg = {c: AGGREGATIONS.get(c, "last") for c in daily.columns}
+    out = daily.resample(rule).agg(agg)
+    # Buckets without a trading day (long holidays, custom rules)
+    out = out[out["Close"].notna()] if "Close" in out.columns else out.dropna(how="all")
+    if len(out):
+        end = pd.offsets.BDay().rollback(_bucket_end(out.index[-1], rule))
+        if daily.index[-1].normalize() < end:
+            out = out.iloc[:-1]
+    out.index.name = "Date"
+    return out
+
+
+_RESAMPLE_CACHES: dict[str, feature_cache.FeatureCache] = {}
+
+
+def resample_cache(interval: str) -> feature_cache.FeatureCache:
+    """Resampled frames keyed by the daily file (one cache per interval)."""
+    if interval not in _RESAMPLE_CACHES:
+        code = feature_cache.code_version(resample, _bucket_end)
+        _RESAMPLE_CACHES[interval] = feature_cache.FeatureCache(
+            "bars", params={"interval": interval, "rule": rule_for(interval)}, code=code)
+    return _RESAMPLE_CACHES[interval]
+
+
+def bars(symbol: str, interval: str = "1d", period: Optional[str] = None,
+         provider: Optional[DataProvider] = None, update: bool = False) -> pd.DataFrame:
+    """
+    Completed `interval` bars for one symbol (the last `period` of them)
+    from its daily store; empty when there is no store. update=True first
+    brings the store up to date.
+    """
+    if update:
+        update_daily([symbol], provider, quiet=True)
+    path = raw_store.resolve_path(store_path(symbol))
+    if path is None:
+        return pd.DataFrame()
+    if rule_for(interval) is None:
+        df = raw_store.read_raw(path)
+    else:
+        df = resample_cache(interval).get_or_compute(
+            path, lambda p: resample(raw_store.read_raw(p), interval))
+    cutoff = period_start(df.index[-1], period) if len(df) else None
+    return df if cutoff is None else df[df.index >= cutoff]
+
+
+# -----------------------------
+# Updates
+# -----------------------------
+def merge_incremental(stored: pd.DataFrame,
+                      fresh: pd.DataFrame) -> Optional[tuple[pd.DataFrame, int]]:
+    """
+    (frame, new_bars) with the fetched bars appended, or None when the
+    history must be downloaded again in full.
+    """
+    if fresh.empty:
+        return stored, 0
+    if set(fresh.columns) != set(stored.columns):
+        return None
+
+    overlap = stored.index.intersection(fresh.index)
+    if len(overlap) == 0:
+        return None
+    old = stored.loc[overlap, "Close"].to_numpy()
+    new = fresh.loc[overlap, "Close"].to_numpy()
+    if not np.allclose(old, new, rtol=ADJUSTMENT_RTOL, equal_nan=True):
+        return None  # history was re-adjusted upstream
+
+    delta = fresh[fresh.index > stored.index[-1]]
+    if delta.empty:
+        return stored, 0
+    return pd.concat([stored, delta[stored.columns]]), len(delta)
+
+
+def _download(symbols: list[str], provider: DataProvider, period: Optional[str],
+              start: Optional[str], use_async: bool, quiet: bool = False) -> BatchResult:
+    if not use_async:
+        return provider.fetch_many(symbols, period=period, interval="1d", start=start)
+    # One asyncio task per symbol, paced by the upstream's 429s (see async_ingest.py)
+    result = BatchResult()
+    summary = async_ingest.ingest(symbols, provider, period=period, interval="1d", start=start,
+                                  sink=result.frames.__setitem__)
+    if not quiet:
+        summary.print()
+    result.errors.update(summary.failed)
+    return result
+
+
+def update_daily(symbols: Iterable[str], provider: Optional[DataProvider] = None,
+                 full_refresh: bool = False, period: Optional[str] = None,
+                 use_async: bool = False, quiet: bool = False) -> list[str]:
+    """
+    Brings each symbol's daily store up to the last closed session and
+    returns the symbols whose store was written. `period` (default
+    config.DAILY_PERIOD) is what a full download covers; an existing
+    store is only extended forward unless full_refresh is set.
+    """
+    say: Callable[..., None] = (lambda *a, **k: None) if quiet else print
+    provider = provider or get_provider()
+    period = period or config.DAILY_PERIOD
+    session = last_session()
+    symbols = list(dict.fromkeys(s.upper() for s in symbols))
+
+    # Symbols sharing a fetch start go in one batch
+    needs_full: list[str] = []
+    by_start: dict[str, list[tuple[str, pd.DataFrame]]] = {}
+    fresh = 0
+    for sym in symbols:
+        existing = raw_store.resolve_path(store_path(sym))
+        if full_refresh or existing is None:
+            needs_full.append(sym)
+            continue
+        stored = raw_store.read_raw(existing)
+        if len(stored) < OVERLAP_BARS:
+            needs_full.append(sym)
+        elif stored.index[-1].normalize() >= session:
+            fresh += 1
+        else:
+            start = stored.index[-OVERLAP_BARS].strftime("%Y-%m-%d")
+            by_start.setdefault(start, []).append((sym, stored))
+    if fresh:
+        say(f"✅ {fresh} symbol(s) already hold the {session:%Y-%m-%d} close")
+
+    written: list[str] = []
+    for start, group in by_start.items():
+        batch = _download([s for s, _ in group], provider, None, start, use_async, quiet)
+        for sym, stored in group:
+            if sym in batch.errors or sym not in batch.frames:
+                say(f"⚠️ {sym}: kept stored bars ({batch.errors.get(sym, 'no data returned')})")
+                continue
+            merged = merge_incremental(
+                stored, completed(raw_store.normalize_frame(batch.frames[sym]), session))
+            if merged is None:
+                say(f"🔄 {sym}: adjustment detected, queued for full refresh")
+                needs_full.append(sym)
+                continue
+            df, added = merged
+            if added:
+                raw_store.write_raw(df, store_path(sym))
+                written.append(sym)
+                say(f"✅ {sym}: +{added} daily bar(s)")
+
+    # Full history for new, re-adjusted or forced symbols
+    if needs_full:
+        batch = _download(needs_full, provider, period, None, use_async, quiet)
+        for sym in needs_full:
+            df = batch.frames.get(sym)
+            if df is None or df.empty:
+                say(f"⚠️ {sym}: empty. {batch.errors.get(sym, '')}".rstrip())
+                continue
+            df = completed(raw_store.normalize_frame(df), session)
+            raw_store.write_raw(df, store_path(sym))
+            written.append(sym)
+            say(f"✅ {sym}: {len(df)} daily bar(s)")
+    return written
+
+
+def write_timeframe(symbols: Iterable[str], interval: str, period: Optional[str] = None,
+                    target: Optional[Callable[[str], str]] = None,
+                    quiet: bool = False) -> list[str]:
+    """
+    Saves each symbol's `interval` bars (the last `period`) at target(symbol),
+    by default data/raw/<SYMBOL>_<period>_<interval> like the files the
+    engines read. Targets newer than their daily store are left as they
+    are. Returns the symbols whose file was written.
+    """
+    say: Callable[..., None] = (lambda *a, **k: None) if quiet else print
+    suffix = f"_{period}_{interval}" if period else f"_{interval}"
+    target = target or (lambda s: raw_store.path_for(os.path.join(config.RAW_DIR, s + suffix)))
+    written: list[str] = []
+    for sym in dict.fromkeys(s.upper() for s in symbols):
+        source = raw_store.resolve_path(store_path(sym))
+        if source is None:
+            say(f"⚠️ {sym}: no daily bars stored")
+            continue
+        dest = target(sym)
+        if os.path.exists(dest) and os.path.getmtime(dest) >= os.path.getmtime(source):
+            continue
+        df = bars(sym, interval, period)
+        if df.empty:
+            say(f"⚠️ {sym}: no completed {interval} bars")
+            continue
+        raw_store.write_raw(df, dest)
+        written.append(sym)
+        say(f"✅ {sym}: {len(df)} {interval} bar(s) -> {os.path.basename(dest)}")
+    return written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Daily bar store and resampled timeframes")
+    parser.add_argument("command", choices=["update", "show", "derive"])
+    parser.add_argument("symbols", nargs="*")
+    parser.add_argument("--from-list", action="store_true",
+                        help=f"Add the symbols in {config.TICKER_LIST_PATH}")
+    parser.add_argument("--provider", default=None,
+                        help="yfinance, file:<dir> or http://host:port (default: config)")
+    parser.add_argument("--full", action="store_true", help="update: re-download everything")
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                        help="update: adaptive-rate asyncio download (see async_ingest.py)")
+    parser.add_argument("--interval", default=config.INTERVAL,
+                        help=f"1d, {', '.join(r for r in INTERVAL_RULES if r != '1d')} "
+                             f"or a pandas rule (default: {config.INTERVAL})")
+    parser.add_argument("--period", default=None, help="Keep only this much history (e.g. 2y)")
+    args = parser.parse_args()
+
+    symbols = [s.upper() for s in args.symbols]
+    if args.from_list:
+        symbols += pd.read_csv(config.TICKER_LIST_PATH)["Ticker"].tolist()
+
+    if args.command == "update":
+        if not symbols:
+            parser.error("no symbols (pass some or use --from-list)")
+        written = update_daily(symbols, get_provider(args.provider), full_refresh=args.full,
+                               use_async=args.use_async)
+        print(f"\n📁 {len(written)} daily store(s) written to {config.DAILY_DIR}")
+    elif args.command == "show":
+        for sym in symbols:
+            df = bars(sym, args.interval, args.period)
+            print(f"\n{sym} {args.interval}: {len(df)} bar(s)")
+            print(df.tail(10).to_markdown(floatfmt=".2f") if len(df) else "(no daily store)")
+    else:
+        written = write_timeframe(symbols or stored_symbols(), args.interval,
+                                  args.period or config.PERIOD)
+        print(f"\n📁 {len(written)} {args.interval} file(s) written")
@@ -0,0 +1,406 @@
+"""
+Benchmark suite.
+
+Generates a deterministic synthetic universe (see synthetic.py) in a temp
+directory and times every engine on it, reporting wall time (best of
+--repeat runs), throughput (tickers/s, bars/s) and peak memory. Results
+are saved as JSON under data/benchmarks/ so runs can be compared across
+commits:
+
+    python src/finance_vibe/benchmark.py --tickers 300 --bars 260
+    python src/finance_vibe/benchmark.py --freq daily --bars 1260 --only build_features cci_fast
+    python src/finance_vibe/benchmark.py --compare data/benchmarks/bench_A.json data/benchmarks/bench_B.json
+
+Memory is measured in a separate untimed run: `peak_mb` is the tracemalloc
+peak of Python/NumPy allocations in this process, `child_rss_mb` the
+largest resident set of any worker process so far (process-pool benches).
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Callable, Optional
+
+import numpy as np
+import pandas as pd
+
+import config
+import raw_store
+import synthetic
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+BENCH_DIR = os.path.join(config.BASE_DIR, "benchmarks")
+CCI_REFERENCE_TICKERS = 20   # rolling().apply is slow; time it on a subset
+REGRESSION_TOLERANCE = 0.10  # --compare flags runs slower than this
+
+
+@dataclass
+class BenchResult:
+    name: str
+    status: str = "ok"             # "ok", "skipped", "failed"
+    seconds: float = float("nan")  # best of the timed repeats
+    tickers: int = 0
+    bars: int = 0
+    tickers_per_s: float = float("nan")
+    bars_per_s: float = float("nan")
+    peak_mb: float = float("nan")
+    child_rss_mb: float = float("nan")
+    note: str = ""
+
+
+@dataclass
+class Universe:
+    raw_dir: str        # column stores
+    csv_dir: str        # same bars as CSV
+    logs_dir: str
+    tickers: list[str]
+    rows: dict[str, int]
+
+    @property
+    def bars(self) -> int:
+        return sum(self.rows.values())
+
+
+# -----------------------------
+# Environment
+# -----------------------------
+@contextlib.contextmanager
+def pointed_at(universe: Universe):
+    """
+    Points config at the synthetic universe with the feature cache and the
+    report history off (bench reports must not reach data/history).
+    """
+    saved = {k: getattr(config, k) for k in ("RAW_DIR", "LOGS_DIR", "FEATURE_CACHE",
+                                             "REPORT_HISTORY")}
+    config.RAW_DIR, config.LOGS_DIR = universe.raw_dir, universe.logs_dir
+    config.FEATURE_CACHE = config.REPORT_HISTORY = False
+    try:
+        yield
+    finally:
+        for k, v in saved.items():
+            setattr(config, k, v)
+
+
+def build_universe(root: str, n_tickers: int, bars: int, freq: str, seed: int) -> Universe:
+    raw_dir = os.path.join(root, "raw")
+    csv_dir = os.path.join(root, "csv")
+    logs_dir = os.path.join(root, "logs")
+    os.makedirs(logs_dir, exist_ok=True)
+
+    tickers = synthetic.write_universe(raw_dir, n_tickers, bars, freq, seed, fmt="cols")
+    synthetic.write_universe(csv_dir, n_tickers, bars, freq, seed, fmt="csv")
+    rows = {t: len(raw_store.read_columns(os.path.join(raw_dir, config.get_raw_filename(t, "cols")),
+                                          [])[0]) for t in tickers}
+    return Universe(raw_dir, csv_dir, logs_dir, tickers, rows)
+
+
+def _child_rss_mb() -> float:
+    if resource is None:
+        return float("nan")
+    # ru_maxrss is KiB on Linux
+    return resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+
+
+# -----------------------------
+# Benchmarks
+# -----------------------------
+# Each factory does its setup and returns a callable doing the timed work;
+# the callable returns the number of tickers it processed.
+def _paths(u: Universe, fmt: str) -> list[str]:
+    return raw_store.iter_raw_paths(u.csv_dir if fmt == "csv" else u.raw_dir)
+
+
+def bench_load_ohlc_csv(u: Universe) -> Callable[[], int]:
+    from analysis_engine_local import load_ohlc_csv
+    paths = _paths(u, "csv")
+    return lambda: sum(1 for p in paths if load_ohlc_csv(p) is not None)
+
+
+def bench_load_ohlc_store(u: Universe) -> Callable[[], int]:
+    from analysis_engine_local import load_ohlc_store
+    paths = _paths(u, "cols")
+    return lambda: sum(1 for p in paths if load_ohlc_store(p) is not None)
+
+
+def bench_build_features(u: Universe) -> Callable[[], int]:
+    from analysis_engine_local import build_features, load_ohlc
+    frames = [load_ohlc(p) for p in _paths(u, "cols")]
+    return lambda: sum(1 for f in frames if build_features(f) is not None)
+
+
+def _typical_prices(u: Universe, limit: Optional[int] = None) -> list[pd.Series]:
+    out = []
+    for p in _paths(u, "cols")[:limit]:
+        df = raw_store.read_raw(p, ["High", "Low", "Close"])
+        out.append((df["High"] + df["Low"] + df["Close"]) / 3)
+    return out
+
+
+def cci_rolling_apply(tp: pd.Series, period: int = 20) -> pd.Series:
+    """Reference: the rolling().apply CCI of analysis_engine/signals."""
+    sma_tp = tp.rolling(window=period).mean()
+    mad_tp = tp.rolling(window=period).apply(lambda x: (x - x.mean()).abs().mean())
+    return (tp - sma_tp) / (0.015 * mad_tp)
+
+
+def bench_cci_fast(u: Universe) -> Callable[[], int]:
+    from analysis_engine_local import cci_fast
+    tps = _typical_prices(u, CCI_REFERENCE_TICKERS)
+    return lambda: sum(1 for tp in tps if cci_fast(tp, 20) is not None)
+
+
+def bench_cci_rolling_apply(u: Universe) -> Callable[[], int]:
+    tps = _typical_prices(u, CCI_REFERENCE_TICKERS)
+    return lambda: sum(1 for tp in tps if cci_rolling_apply(tp, 20) is not None)
+
+
+def bench_run_scan(mode: str, workers: Optional[int] = None,
+                   shared_memory: bool = False) -> Callable[[Universe], Callable[[], int]]:
+    def factory(u: Universe) -> Callable[[], int]:
+        from analysis_engine_local import run_scan
+        return lambda: len(run_scan(max_workers=workers, mode=mode, use_cache=False,
+                                    shared_memory=shared_memory))
+    return factory
+
+
+def bench_run_scanner(u: Universe) -> Callable[[], int]:
+    from analysis_engine import run_scanner  # needs pandas_ta
+    return lambda: len(run_scanner(use_cache=False, tickers=u.tickers))
+
+
+def bench_signals(u: Universe) -> Callable[[], int]:
+    from signals import generate_signals
+
+    def run() -> int:
+        generate_signals()
+        return len(u.tickers)
+    return run
+
+
+def bench_mean_reversion(u: Universe) -> Callable[[], int]:
+    from mean_reversion import analyze_mean_reversion
+
+    def run() -> int:
+        analyze_mean_reversion()
+        return len(u.tickers)
+    return run
+
+
+def bench_backtest(u: Universe) -> Callable[[], int]:
+    from backtest import run_backtest_all
+    return lambda: len(run_backtest_all(u.raw_dir))
+
+
+def registry(workers: list[int]) -> dict[str, Callable[[Universe], Callable[[], int]]]:
+    benches = {
+        "load_ohlc_csv": bench_load_ohlc_csv,
+        "load_ohlc_store": bench_load_ohlc_store,
+        "build_features": bench_build_features,
+        "cci_fast": bench_cci_fast,
+        "cci_rolling_apply": bench_cci_rolling_apply,
+    }
+    for w in workers:
+        benches[f"run_scan[process,w={w}]"] = bench_run_scan("process", w)
+        benches[f"run_scan[chunked,w={w}]"] = bench_run_scan("chunked", w)
+        benches[f"run_scan[chunked+shm,w={w}]"] = bench_run_scan("chunked", w, shared_memory=True)
+    benches["run_scan[panel]"] = bench_run_scan("panel")
+    benches.update({
+        "run_scanner": bench_run_scanner,
+        "signals": bench_signals,
+        "mean_reversion": bench_mean_reversion,
+        "backtest": bench_backtest,
+    })
+    return benches
+
+
+# -----------------------------
+# Runner
+# -----------------------------
+def measure(name: str, factory: Callable[[Universe], Callable[[], int]], u: Universe,
+            repeat: int) -> BenchResult:
+    result = BenchResult(name)
+    quiet = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(quiet):
+            run = factory(u)
+            best = float("inf")
+            for _ in range(max(1, repeat)):
+                start = time.perf_counter()
+                processed = run()
+                best = min(best, time.perf_counter() - start)
+
+            tracemalloc.start()
+            try:
+                run()
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+    except ImportError as e:
+        result.status, result.note = "skipped", f"missing dependency: {e.name}"
+        return result
+    except Exception as e:
+        result.status, result.note = "failed", str(e)
+        return result
+
+    per_ticker = u.bars / max(len(u.tickers), 1)
+    result.seconds = best
+    result.tickers = int(processed)
+    result.bars = int(round(processed * per_ticker))
+    result.tickers_per_s = processed / best if best > 0 else float("nan")
+    result.bars_per_s = result.bars / best if best > 0 else float("nan")
+    result.peak_mb = peak / 2**20
+    result.child_rss_mb = _child_rss_mb() if name.startswith(("run_scan[process", "run_scan[chunked")) else float("nan")
+    return result
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                             text=True, check=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(n_tickers: int = 200, bars: int = 260, freq: str = "weekly", seed: int = 0,
+                   repeat: int = 3, workers: Optional[list[int]] = None,
+                   only: Optional[list[str]] = None, keep_data: bool = False) -> dict:
+    workers = workers or sorted({1, os.cpu_count() or 1})
+    benches = registry(workers)
+    if only:
+        unknown = [n for n in only if n not in benches]
+        if unknown:
+            raise ValueError(f"unknown benchmark(s): {unknown} (known: {list(benches)})")
+        benches = {n: benches[n] for n in only}
+
+    root = tempfile.mkdtemp(prefix="vibe-bench-")
+    try:
+        print(f"--- BENCH: {n_tickers} ticker(s) x {bars} {freq} bar(s), seed {seed} ---")
+        universe = build_universe(root, n_tickers, bars, freq, seed)
+        results = []
+        with pointed_at(universe):
+            for name, factory in benches.items():
+                r = measure(name, factory, universe, repeat)
+                results.append(r)
+                if r.status == "ok":
+                    print(f"{name:<26} {r.seconds:9.4f}s  {r.tickers_per_s:10.1f} tickers/s  "
+                          f"{r.bars_per_s:12.0f} bars/s  peak {r.peak_mb:7.1f} MB")
+                else:
+                    print(f"{name:<26} {r.status}: {r.note}")
+    finally:
+        if keep_data:
+            print(f"Synthetic data kept in {root}")
+        else:
+            shutil.rmtree(root, ignore_errors=True)
+
+    return {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "cpu_count": os.cpu_count(),
+            "tickers": n_tickers, "bars": bars, "freq": freq, "seed": seed,
+            "repeat": repeat, "rows_total": universe.bars,
+        },
+        "results": [asdict(r) for r in results],
+    }
+
+
+def save_report(report: dict, out: Optional[str] = None) -> str:
+    if out is None:
+        os.makedirs(BENCH_DIR, exist_ok=True)
+        stamp = datetime.now().strftime("%Y-%m-%d_%H%M%S")
+        commit = report["meta"].get("commit")
+        out = os.path.join(BENCH_DIR, f"bench_{stamp}{'_' + commit if commit else ''}.json")
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+    return out
+
+
+def compare(base: dict, new: dict, tolerance: float = REGRESSION_TOLERANCE) -> pd.DataFrame:
+    """Per-benchmark time ratio new/base; ratio > 1 + tolerance is a regression."""
+    b = {r["name"]: r for r in base["results"] if r["status"] == "ok"}
+    n = {r["name"]: r for r in new["results"] if r["status"] == "ok"}
+    rows = []
+    for name in [k for k in n if k in b]:
+        ratio = n[name]["seconds"] / b[name]["seconds"] if b[name]["seconds"] else float("nan")
+        rows.append({
+            "Benchmark": name,
+            "Base s": b[name]["seconds"],
+            "New s": n[name]["seconds"],
+            "Ratio": ratio,
+            "Base MB": b[name]["peak_mb"],
+            "New MB": n[name]["peak_mb"],
+            "Verdict": "⚠️ slower" if ratio > 1 + tolerance
+                       else ("🚀 faster" if ratio < 1 - tolerance else "≈"),
+        })
+    return pd.DataFrame(rows)
+
+
+def _load(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Finance-Vibe benchmark suite")
+    parser.add_argument("--tickers", type=int, default=200)
+    parser.add_argument("--bars", type=int, default=260)
+    parser.add_argument("--freq", choices=list(synthetic.FREQUENCIES), default="weekly")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workers", default=None,
+                        help="Comma-separated run_scan worker counts (default: 1,cpu_count)")
+    parser.add_argument("--only", nargs="+", action="extend", default=None, metavar="NAME",
+                        help="Benchmark names, space-separated (names may contain commas, "
+                             "e.g. 'run_scan[chunked,w=2]')")
+    parser.add_argument("--out", default=None, help="JSON path (default: data/benchmarks/)")
+    parser.add_argument("--keep-data", action="store_true")
+    parser.add_argument("--compare", nargs="+", metavar="JSON",
+                        help="BASE [NEW]: compare two saved runs (NEW defaults to a fresh run)")
+    parser.add_argument("--tolerance", type=float, default=REGRESSION_TOLERANCE)
+    args = parser.parse_args()
+
+    if args.compare and len(args.compare) > 2:
+        parser.error("--compare takes BASE [NEW]")
+
+    if args.compare and len(args.compare) == 2:
+        new_report = _load(args.compare[1])
+    else:
+        new_report = run_benchmarks(
+            n_tickers=args.tickers, bars=args.bars, freq=args.freq, seed=args.seed,
+            repeat=args.repeat,
+            workers=[int(w) for w in args.workers.split(",")] if args.workers else None,
+            only=args.only,
+            keep_data=args.keep_data)
+        print(f"\nSaved: {save_report(new_report, args.out)}")
+
+    if args.compare:
+        base_report = _load(args.compare[0])
+        workload = ("tickers", "bars", "freq", "seed")
+        if any(base_report["meta"].get(k) != new_report["meta"].get(k) for k in workload):
+            print("\n⚠️ Different workloads: "
+                  + ", ".join(f"{k} {base_report['meta'].get(k)} -> {new_report['meta'].get(k)}"
+                              for k in workload))
+        table = compare(base_report, new_report, args.tolerance)
+        print()
+        print(table.to_markdown(index=False, floatfmt=".4f") if not table.empty
+              else "No benchmarks in common.")
@@ -1,29 +1,33 @@
-import yfinance as yf
 import argparse
-from pathlib import Path
+import os
 
-def fetch_bulk_data(tickers, period="2y"): # Default changed to 2y
-    Path("data/raw").mkdir(parents=True, exist_ok=True)
-    
-    for symbol in tickers:
-        symbol = symbol.upper()
-        print(f"📥 Fetching {symbol} for period: {period}...")
-        
+import bar_store
+import raw_store
+from config import DAILY_PERIOD, RAW_DIR
+from providers import get_provider
+
+def fetch_bulk_data(tickers, period="2y", provider=None): # Default changed to 2y
+    provider = provider or get_provider()
+    symbols = [s.upper() for s in tickers]
+    print(f"📥 Fetching {len(symbols)} symbol(s) for period: {period} ({provider.name})...")
+
+    # Daily bars come from the shared daily store: one batched, chunked
+    # request for what it lacks. A period past what it holds re-downloads.
+    longer = bar_store.longer_period(period, DAILY_PERIOD)
+    bar_store.update_daily(symbols, provider, full_refresh=longer,
+                           period=period if longer else None, quiet=True)
+
+    for symbol in symbols:
         try:
-            ticker = yf.Ticker(symbol)
-            # Use the period variable here
-            df = ticker.history(period=period)
-            
+            df = bar_store.bars(symbol, "1d", period)
             if df.empty:
-                print(f"⚠️  No data found for {symbol}.")
+                print(f"❌ Failed to download {symbol}: no data returned")
                 continue
-                
-            file_path = f"data/raw/{symbol}.csv"
-            df.to_csv(file_path)
+            file_path = raw_store.write_raw(df, raw_store.path_for(os.path.join(RAW_DIR, symbol)))
             print(f"✅ Saved {symbol} ({len(df)} rows) to {file_path}")
             
         except Exception as e:
-            print(f"❌ Failed to download {symbol}: {e}")
+            print(f"❌ Failed to save {symbol}: {e}")
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
@@ -4,6 +4,27 @@ import os
 PERIOD = "5y"
 INTERVAL = "1wk"
 
+# --- Data Provider ---
+# "yfinance" or "file:<dir>" (offline, serves local raw files); see providers.py
+DATA_PROVIDER = "yfinance"
+DOWNLOAD_CHUNK_SIZE = 20   # symbols per multi-ticker request
+DOWNLOAD_WORKERS = 4       # bounded download concurrency
+
+# --- Daily Store (see bar_store.py) ---
+# Symbols are downloaded once as daily bars; weekly and other timeframes are
+# resampled from them. A first download covers DAILY_PERIOD (at least PERIOD,
+# so the weekly files keep their full history); later updates only append
+DAILY_PERIOD = PERIOD
+
+# --- Async Ingestion (see async_ingest.py) ---
+# The request rate starts at INGEST_RATE and adapts: it grows while requests
+# succeed and halves when the upstream throttles (HTTP 429)
+INGEST_RATE = 5.0           # initial requests per second
+INGEST_MAX_RATE = 100.0     # ceiling for the adaptive rate
+INGEST_CONCURRENCY = 16     # most requests in flight at once
+INGEST_RETRIES = 4          # attempts per ticker
+INGEST_TIMEOUT = 30.0       # seconds per attempt
+
 # --- Ticker Lists ---
 # These are always included regardless of market activity
 STATIC_TICKERS = ["SPY", "QQQ", "IWM", "SCHD"] 
@@ -13,15 +34,72 @@ BASE_DIR = "data"
 RAW_DIR = os.path.join(BASE_DIR, "raw")
 LOGS_DIR = os.path.join(BASE_DIR, "logs")  # Changed DATA_DIR to BASE_DIR
 TICKER_LIST_PATH = os.path.join(BASE_DIR, "active_tickers.csv")
+STATE_DIR = os.path.join(BASE_DIR, "state")  # streaming indicator state
+CACHE_DIR = os.path.join(BASE_DIR, "cache")
+FEATURE_CACHE_DIR = os.path.join(CACHE_DIR, "features")
+RESPONSE_CACHE_DIR = os.path.join(CACHE_DIR, "responses")
+DAILY_DIR = os.path.join(BASE_DIR, "daily")  # canonical daily bars (see bar_store.py)
+REPORT_HISTORY_DIR = os.path.join(BASE_DIR, "history", "reports")  # see report_history.py
+
+# --- Feature Cache ---
+# Per-ticker indicator frames are reused while the raw file, parameters and
+# indicator code are unchanged (see feature_cache.py)
+FEATURE_CACHE = True
+FEATURE_CACHE_MAX_MB = 512        # least recently used entries are evicted beyond this
+FEATURE_CACHE_FINGERPRINT = "stat"  # "stat" (mtime/size) or "content" (SHA-1 of the bytes)
+
+# --- Report History ---
+# Each scan also appends its report to a month-partitioned column store
+# (see report_history.py); a month's parts are merged once there are more
+# than REPORT_HISTORY_MAX_PARTS of them
+REPORT_HISTORY = True
+REPORT_HISTORY_MAX_PARTS = 31
+
+# --- Response Cache ---
+# Screener/search results and downloaded bars are reused until they can have
+# changed (see response_cache.py). Seconds, or "close" = until the requested
+# interval's next bar close (next Friday close for weekly bars)
+RESPONSE_CACHE = True
+RESPONSE_TTL = {"screener": 15 * 60, "search": 15 * 60, "history": "close"}
+MARKET_TZ = "America/New_York"
+MARKET_CLOSE = "16:00"
+
+# --- Metrics ---
+# Each run writes data/logs/metrics_<time>_<session>.json (see metrics.py);
+# METRICS_PROFILE_TOP > 0 also saves cProfile output for that many of the
+# slowest tickers per engine (or pass --profile N)
+METRICS = True
+METRICS_PROFILE_TOP = 0
+
+# --- Memory ---
+# LEAN_FEATURES: the local engine keeps only the last LEAN_KEEP_ROWS rows of
+# each feature frame, as float32 (indicators are still computed in float64).
+# Report values then differ from the float64 ones by at most 2**-24 relative
+# (one float32 rounding), and a score can only change where two compared
+# values are that close (see analysis_engine_local.lean_frame)
+LEAN_FEATURES = False
+LEAN_KEEP_ROWS = 1
+
+# --- Raw Storage Format ---
+# "cols" = memory-mapped NumPy column store (see raw_store.py), "csv" = legacy text
+RAW_FORMAT = "cols"
+RAW_EXTENSIONS = {"cols": ".cols", "csv": ".csv"}
+# Parser for raw CSVs: "auto" uses pyarrow when installed, else pandas' "c" engine
+CSV_ENGINE = "auto"
 
 # --- Filename Logic ---
-def get_raw_filename(ticker):
-    return f"{ticker}_{PERIOD}_{INTERVAL}.csv"
+def raw_extension(fmt=None):
+    return RAW_EXTENSIONS[fmt or RAW_FORMAT]
+
+def get_raw_filename(ticker, fmt=None):
+    return f"{ticker}_{PERIOD}_{INTERVAL}{raw_extension(fmt)}"
 
-def get_raw_path(ticker):
-    return os.path.join(RAW_DIR, get_raw_filename(ticker))
+def get_raw_path(ticker, fmt=None):
+    return os.path.join(RAW_DIR, get_raw_filename(ticker, fmt))
 
 # --- Directory Initialization ---
-# This ensures all folders exist before any script tries to save to them
-os.makedirs(RAW_DIR, exist_ok=True)
-os.makedirs(LOGS_DIR, exist_ok=True)
\ No newline at end of file
+# Folders are created by the code that writes into them, so importing
+# config (or running a read-only command) touches nothing on disk
+def ensure_dir(path):
+    os.makedirs(path, exist_ok=True)
+    return path
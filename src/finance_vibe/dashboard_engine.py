@@ -1,13 +1,20 @@
-import yfinance as yf
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
-import pandas_ta as ta
 
-def calculate_dashboard_metrics(ticker):
-    # 1. Download 5 Years of Weekly Data
-    df = yf.download(ticker, period="5y", interval="1wk", progress=False)
-    
-    if df.empty or len(df) < 50:
-        return None
+import bar_store
+import config
+import metrics
+from providers import get_provider
+
+MIN_WEEKS = 50
+DASHBOARD_COLUMNS = ['Close', 'SMA_20', 'SMA_50', 'RSI', 'EMA_20_RSI', 'CCI', 'EMA_20_CCI',
+                     'MACD', 'EMA_20_MACD']
+
+def dashboard_features(df):
+    import pandas_ta as ta  # slow to import; only needed here
 
     # Clean the multi-index columns if necessary (common in new yf versions)
     if isinstance(df.columns, pd.MultiIndex):
@@ -19,7 +26,7 @@ def calculate_dashboard_metrics(ticker):
     df['SMA_50'] = ta.sma(df['Close'], length=50)
     df['RSI'] = ta.rsi(df['Close'], length=14)
     df['CCI'] = ta.cci(df['High'], df['Low'], df['Close'], length=20)
-    
+
     # MACD (15, 30, 9) - Returns a DataFrame, we want the main MACD line
     macd = ta.macd(df['Close'], fast=15, slow=30, signal=9)
     df['MACD'] = macd.iloc[:, 0] # MACD_15_30_9 column
@@ -29,14 +36,85 @@ def calculate_dashboard_metrics(ticker):
     df['EMA_20_RSI'] = ta.ema(df['RSI'], length=20)
     df['EMA_20_CCI'] = ta.ema(df['CCI'], length=20)
     df['EMA_20_MACD'] = ta.ema(df['MACD'], length=20)
+    return df
+
+def calculate_dashboard_metrics(ticker, provider=None):
+    # 1. 5 Years of Weekly Data, resampled from the daily store (which is
+    # only downloaded when it lacks the last close)
+    df = bar_store.bars(ticker, "1wk", period="5y", provider=provider, update=True)
+
+    if df.empty or len(df) < MIN_WEEKS:
+        return None
+
+    df = dashboard_features(df.copy())
 
     # 4. Filter for the last completed week
     # We take the second to last row if today is mid-week to avoid partial data
     return df.tail(2)
 
+# -----------------------------
+# Batch (watchlists)
+# -----------------------------
+def last_week_metrics(ticker):
+    """Last completed week's dashboard row for one stored ticker (no download), or None."""
+    df = bar_store.bars(ticker, "1wk", period="5y")
+    if df.empty or len(df) < MIN_WEEKS:
+        return None
+    row = dashboard_features(df.copy()).iloc[-1]
+    return {"Ticker": ticker, "Date": row.name, **{c: row[c] for c in DASHBOARD_COLUMNS}}
+
+def dashboard_metrics(tickers, provider=None, update=True, max_workers=None):
+    """
+    calculate_dashboard_metrics for a whole watchlist, one row per ticker
+    (its last completed week), indexed by Ticker in the given order.
+
+    Bars come from the local daily store. With update=True the stores that
+    are missing or lack the last close are brought up to date first with
+    chunked multi-symbol downloads (fetch_many); the indicators are then
+    computed in worker processes.
+    Tickers without enough history are left out.
+    """
+    tickers = list(dict.fromkeys(t.upper() for t in tickers))
+    with metrics.session("dashboard"):
+        if update and tickers:
+            with metrics.stage("update_daily"):
+                bar_store.update_daily(tickers, provider, quiet=True)
+        with metrics.stage("dashboard_metrics") as record:
+            workers = max(1, min(max_workers or os.cpu_count() or 1, len(tickers)))
+            if workers == 1:
+                rows = [last_week_metrics(t) for t in tickers]
+            else:
+                chunk = max(1, len(tickers) // (workers * 4))
+                with ProcessPoolExecutor(max_workers=workers) as ex:
+                    rows = list(ex.map(last_week_metrics, tickers, chunksize=chunk))
+            record["tickers"] = len(tickers)
+
+    rows = [r for r in rows if r is not None]
+    if not rows:
+        return pd.DataFrame(columns=["Date", *DASHBOARD_COLUMNS]).rename_axis("Ticker")
+    return pd.DataFrame(rows).set_index("Ticker")
+
 if __name__ == "__main__":
-    # Quick test for a single ticker
-    test_data = calculate_dashboard_metrics("NVDA")
-    if test_data is not None:
-        print("Latest Weekly Metrics for NVDA:")
-        print(test_data[['Close', 'RSI', 'EMA_20_RSI', 'SMA_20']].tail(1))
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Last completed week's dashboard metrics")
+    parser.add_argument("tickers", nargs="*", help="Default: NVDA")
+    parser.add_argument("--from-list", action="store_true",
+                        help=f"Add every ticker in {config.TICKER_LIST_PATH}")
+    parser.add_argument("--provider", default=None,
+                        help="yfinance, file:<dir> or http://host:port (default: config)")
+    parser.add_argument("--no-update", action="store_true",
+                        help="Use the stored daily bars as they are (no download)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Worker processes (default: os.cpu_count())")
+    args = parser.parse_args()
+
+    tickers = list(args.tickers)
+    if args.from_list:
+        tickers += pd.read_csv(config.TICKER_LIST_PATH)['Ticker'].tolist()
+    out = dashboard_metrics(tickers or ["NVDA"], get_provider(args.provider),
+                            update=not args.no_update, max_workers=args.workers)
+    if out.empty:
+        print("No dashboard rows (no stored bars or not enough history).")
+    else:
+        out['Date'] = out['Date'].dt.strftime("%Y-%m-%d")
+        print(f"Latest Weekly Metrics ({len(out)} ticker(s)):")
+        print(out.to_markdown(floatfmt=".2f"))
@@ -1,46 +1,38 @@
-import yfinance as yf
 import pandas as pd
+import argparse
 import os
 
-def ingest_weekly_data():
-    csv_path = 'data/active_tickers.csv'
-    raw_dir = 'data/raw'
-    os.makedirs(raw_dir, exist_ok=True)
+import bar_store
+from providers import get_provider
+from config import PERIOD, INTERVAL, TICKER_LIST_PATH, get_raw_path
 
-    # Define our parameters as variables so they are easy to change/label
-    PERIOD = "5y"
-    INTERVAL = "1wk"
+def ingest_weekly_data(full_refresh=False, provider=None, tickers=None):
+    """
+    Returns the tickers whose raw file was written. Daily bars go to the
+    daily store (incremental, see bar_store.py) and the weekly files the
+    engines read are resampled from it (completed Friday weeks only).
+    """
+    csv_path = TICKER_LIST_PATH
 
-    if not os.path.exists(csv_path):
-        print(f"❌ Could not find {csv_path}.")
-        return
+    if tickers is None:
+        if not os.path.exists(csv_path):
+            print(f"❌ Could not find {csv_path}.")
+            return []
+        tickers = pd.read_csv(csv_path)['Ticker'].tolist()
 
-    tickers = pd.read_csv(csv_path)['Ticker'].tolist()
-    print(f"--- STEP 2: Ingesting {PERIOD} {INTERVAL} data ---")
+    provider = provider or get_provider()
+    mode = "full" if full_refresh else "incremental"
+    print(f"--- STEP 2: Ingesting {PERIOD} {INTERVAL} data ({mode}, {provider.name}) ---")
 
-    for ticker in tickers:
-        print(f"Processing {ticker}...", end=" ", flush=True)
-        try:
-            df = yf.download(ticker, period=PERIOD, interval=INTERVAL, progress=False)
-            
-            if df.empty:
-                print("⚠️ Empty.")
-                continue
+    # 1. One daily download per ticker feeds every timeframe
+    bar_store.update_daily(tickers, provider, full_refresh=full_refresh)
 
-            if isinstance(df.columns, pd.MultiIndex):
-                df.columns = df.columns.get_level_values(0)
-
-            # Friday Filter
-            if df.index[-1].weekday() != 4:
-                df = df.iloc[:-1]
-
-            # SMART FILENAME: e.g., NVDA_5y_1wk.csv
-            file_name = f"{ticker}_{PERIOD}_{INTERVAL}.csv"
-            df.to_csv(os.path.join(raw_dir, file_name))
-            print(f"✅ Saved as {file_name}")
-            
-        except Exception as e:
-            print(f"❌ Error: {e}")
+    # 2. SMART FILENAME: e.g., NVDA_5y_1wk.cols, rewritten when the daily store changed
+    return bar_store.write_timeframe(tickers, INTERVAL, PERIOD, target=get_raw_path)
 
 if __name__ == "__main__":
-    ingest_weekly_data()
\ No newline at end of file
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--full", action="store_true",
+                        help=f"Re-download the full {PERIOD} history for every ticker")
+    args = parser.parse_args()
+    ingest_weekly_data(full_refresh=args.full)
@@ -1,7 +1,9 @@
-import yfinance as yf
-import pandas as pd
 import os
-import time
+
+import bar_store
+import raw_store
+import response_cache
+from config import RAW_DIR
 
 def get_most_active_tickers(count=20):
     """
@@ -16,11 +18,16 @@ def get_most_active_tickers(count=20):
         "PLTR", "MSTR", "AMD", "AVGO", "SMCI", "COIN", "MARA", "IBIT", "NFLX", "BRK-B"
     ]
 
+    def fetch_active():
+        import yfinance as yf
+
+        return yf.Search("", max_results=count).active['symbol'].tolist()
+
     try:
         # Attempting the most stable way to get trending tickers in 2026
         # If this fails, it jumps to the 'except' block immediately
-        active_df = yf.Search("", max_results=count).active
-        tickers = active_df['symbol'].tolist()
+        tickers = response_cache.cached("search", {"query": "", "max_results": count},
+                                        fetch_active)
         tickers = [t for t in tickers if t.isalpha() and len(t) <= 5]
         
         if not tickers:
@@ -33,29 +40,19 @@ def get_most_active_tickers(count=20):
         return fallback_list[:count]
 
 def bulk_ingest():
-    save_path = "data/raw"
-    if not os.path.exists(save_path):
-        os.makedirs(save_path)
-
     # Use our new robust discovery logic
     tickers = get_most_active_tickers(20)
 
     print(f"\n--- INGESTION: Downloading data for {len(tickers)} tickers ---")
-    for ticker in tickers:
-        try:
-            print(f"Downloading {ticker}...")
-            # We use '2y' to ensure the 200-day Moving Average has enough data points
-            df = yf.download(ticker, period="2y", interval="1d", progress=False)
-            
-            if not df.empty:
-                # Save to the standardized project path
-                file_name = f"{save_path}/{ticker}.csv"
-                df.to_csv(file_name)
-            
-            time.sleep(0.5) # Avoid rate-limiting
-            
-        except Exception as e:
-            print(f"Failed {ticker}: {e}")
+    # One asyncio task per ticker: the pace adapts to the upstream's 429s
+    # and failed requests are retried with backoff (see async_ingest.py).
+    # Bars land in the shared daily store; tickers it already holds up to
+    # the last close send no request
+    bar_store.update_daily(tickers, use_async=True)
+
+    # We use '2y' to ensure the 200-day Moving Average has enough data points
+    bar_store.write_timeframe(tickers, "1d", "2y",
+                              target=lambda t: raw_store.path_for(os.path.join(RAW_DIR, t)))
 
     print("\n✅ Bulk Ingestion Complete.")
 
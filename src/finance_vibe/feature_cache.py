@@ -0,0 +1,242 @@
+"""
+Content-addressed cache for per-ticker feature frames.
+
+An entry is keyed by:
+
+    - the raw file's fingerprint (mtime/size of every file, or a content hash)
+    - the indicator parameter set
+    - a code version (hash of the source of the functions that built it)
+
+so any change to the data, the parameters or the indicator code is a
+miss and the stale entry is replaced. Entries are pickles under
+data/cache/features/<namespace>/<path digest>/<key>.pkl; reads refresh
+an entry's mtime and `evict()` drops the least recently used entries
+once the cache is over config.FEATURE_CACHE_MAX_MB.
+
+    cache = FeatureCache("local", params=FEATURE_PARAMS,
+                         code=code_version(build_features, load_ohlc))
+    feat = cache.get_or_compute(path, lambda p: build_features(load_ohlc(p)))
+
+    python src/finance_vibe/feature_cache.py stats
+    python src/finance_vibe/feature_cache.py clear
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import shutil
+import uuid
+from typing import Any, Callable, Optional
+
+import numpy as np
+import pandas as pd
+
+import config
+import metrics
+
+
+ENTRY_SUFFIX = ".pkl"
+FINGERPRINT_MODES = ("stat", "content")
+_HASH_CHUNK = 1 << 20
+
+
+# -----------------------------
+# Keys
+# -----------------------------
+def _digest(obj: Any) -> str:
+    payload = json.dumps(obj, sort_keys=True, default=str).encode()
+    return hashlib.sha1(payload).hexdigest()
+
+
+def _files(path: str) -> list[str]:
+    """The file itself, or every file of a column store directory."""
+    if os.path.isdir(path):
+        return sorted(os.path.join(path, n) for n in os.listdir(path))
+    return [path]
+
+
+def file_fingerprint(path: str, mode: Optional[str] = None) -> list:
+    """
+    mode="stat":    (name, size, mtime_ns) per file, no reads.
+    mode="content": SHA-1 of the bytes, survives touch/copy.
+    """
+    mode = mode or config.FEATURE_CACHE_FINGERPRINT
+    if mode not in FINGERPRINT_MODES:
+        raise ValueError(f"unknown fingerprint mode: {mode} (expected one of {FINGERPRINT_MODES})")
+
+    out = []
+    for f in _files(path):
+        name = os.path.basename(f)
+        if mode == "stat":
+            st = os.stat(f)
+            out.append([name, st.st_size, st.st_mtime_ns])
+            continue
+        h = hashlib.sha1()
+        with open(f, "rb") as fh:
+            for block in iter(lambda: fh.read(_HASH_CHUNK), b""):
+                h.update(block)
+        out.append([name, h.hexdigest()])
+    return out
+
+
+def code_version(*objs: Any) -> str:
+    """
+    Hash of the source of the given functions/classes (plus the pandas and
+    NumPy versions), so editing an indicator invalidates its entries.
+    Strings are mixed in as-is, e.g. a third-party library version.
+    """
+    parts = [pd.__version__, np.__version__]
+    for obj in objs:
+        parts.append(obj if isinstance(obj, str) else inspect.getsource(obj))
+    return _digest(parts)[:16]
+
+
+# -----------------------------
+# Cache
+# -----------------------------
+MISS = object()
+
+
+class FeatureCache:
+    def __init__(self, namespace: str, params: Optional[dict] = None, code: str = "",
+                 root: Optional[str] = None, max_mb: Optional[float] = None,
+                 fingerprint: Optional[str] = None, enabled: Optional[bool] = None):
+        self.root = os.path.join(root or config.FEATURE_CACHE_DIR, namespace)
+        self.params = params or {}
+        self.code = code
+        self.max_bytes = int((max_mb if max_mb is not None else config.FEATURE_CACHE_MAX_MB) * 2**20)
+        self.fingerprint = fingerprint or config.FEATURE_CACHE_FINGERPRINT
+        self.enabled = config.FEATURE_CACHE if enabled is None else enabled
+        self.hits = 0
+        self.misses = 0
+
+    def _entry_dir(self, path: str) -> str:
+        return os.path.join(self.root, _digest(os.path.abspath(path))[:16])
+
+    def key(self, path: str) -> str:
+        return _digest({"file": file_fingerprint(path, self.fingerprint),
+                        "params": self.params, "code": self.code})[:24]
+
+    def get(self, path: str, key: Optional[str] = None) -> Any:
+        """Cached value for `path`, or MISS."""
+        entry = os.path.join(self._entry_dir(path), (key or self.key(path)) + ENTRY_SUFFIX)
+        try:
+            with open(entry, "rb") as f:
+                value = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return MISS
+        try:
+            os.utime(entry)  # LRU: a read counts as a use
+        except OSError:
+            pass
+        return value
+
+    def put(self, path: str, value: Any, key: Optional[str] = None) -> None:
+        """Stores `value` and drops older entries for the same file."""
+        entry_dir = self._entry_dir(path)
+        name = (key or self.key(path)) + ENTRY_SUFFIX
+        os.makedirs(entry_dir, exist_ok=True)
+
+        tmp = os.path.join(entry_dir, f".tmp-{uuid.uuid4().hex[:8]}")
+        with open(tmp, "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, os.path.join(entry_dir, name))
+
+        for other in os.listdir(entry_dir):
+            if other != name and other.endswith(ENTRY_SUFFIX):
+                try:
+                    os.remove(os.path.join(entry_dir, other))
+                except OSError:
+                    pass
+
+    def get_or_compute(self, path: str, compute: Callable[[str], Any]) -> Any:
+        """compute(path) unless an entry for this file/params/code exists."""
+        if not self.enabled:
+            return compute(path)
+        key = self.key(path)
+        value = self.get(path, key)
+        if value is not MISS:
+            self.hits += 1
+            metrics.annotate("feature_cache", "hit")
+            return value
+        self.misses += 1
+        metrics.annotate("feature_cache", "miss")
+        value = compute(path)
+        self.put(path, value, key)
+        return value
+
+    # -----------------------------
+    # Housekeeping
+    # -----------------------------
+    def entries(self) -> list[tuple[float, int, str]]:
+        """(mtime, size, path) of every entry."""
+        out = []
+        if not os.path.isdir(self.root):
+            return out
+        for d in os.scandir(self.root):
+            if not d.is_dir():
+                continue
+            for e in os.scandir(d.path):
+                if e.name.endswith(ENTRY_SUFFIX):
+                    st = e.stat()
+                    out.append((st.st_mtime, st.st_size, e.path))
+        return out
+
+    def evict(self) -> int:
+        """Removes least recently used entries until under max_bytes."""
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                try:
+                    os.rmdir(os.path.dirname(path))
+                except OSError:
+                    pass  # still holds other entries
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self) -> None:
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+# -----------------------------
+# CLI
+# -----------------------------
+def _namespaces(root: str) -> list[str]:
+    if not os.path.isdir(root):
+        return []
+    return sorted(n for n in os.listdir(root) if os.path.isdir(os.path.join(root, n)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Feature cache tools")
+    parser.add_argument("command", choices=["stats", "clear", "evict"])
+    parser.add_argument("--namespace", default=None, help="Only this cache (default: all)")
+    args = parser.parse_args()
+
+    names = [args.namespace] if args.namespace else _namespaces(config.FEATURE_CACHE_DIR)
+    for ns in names:
+        cache = FeatureCache(ns)
+        if args.command == "clear":
+            cache.clear()
+            print(f"🧹 {ns}: cleared")
+        elif args.command == "evict":
+            print(f"🧹 {ns}: evicted {cache.evict()} entr(ies)")
+        else:
+            entries = cache.entries()
+            size_mb = sum(size for _, size, _ in entries) / 2**20
+            print(f"{ns}: {len(entries)} entr(ies), {size_mb:.1f} MB "
+                  f"(cap {config.FEATURE_CACHE_MAX_MB} MB)")
+    if not names:
+        print(f"No feature cache under {config.FEATURE_CACHE_DIR}")
@@ -0,0 +1,280 @@
+"""
+Shared indicator registry.
+
+Every indicator is registered once with the raw columns it reads, the
+indicators it builds on and its default parameters. A Resolver computes
+what a scanner asks for on one frame and memoizes every result by
+(name, parameters), so shared intermediates (price delta, gains/losses,
+typical price, EMAs by span, moving averages by window) are computed
+once no matter how many indicators or scanners use them:
+
+    r = Resolver(df)
+    rsi = r.get("rsi_simple", period=14)
+    macd = r.get("macd_line", fast=12, slow=26)   # reuses ema(12), ema(26)
+    sig = r.get("macd_signal")                    # reuses macd_line
+    rsi_s = r.get("sma", source=("rsi_wilder", {"period": 14}), window=10)
+
+A `source` is a raw column ("Close", "High", ...), a registered name
+(default parameters) or a (name, params) tuple.
+
+Two RSI flavours are kept on purpose, both matching the scripts that
+introduced them: `rsi_simple` (rolling means, backtest/signals/
+mean_reversion/volatility) and `rsi_wilder` (Wilder smoothing,
+analysis_engine_local).
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Callable, Union
+
+import numpy as np
+import pandas as pd
+
+import rolling_kernels
+
+
+Source = Union[str, tuple]
+
+
+# -----------------------------
+# Plain Series functions
+# -----------------------------
+def sma(s: pd.Series, n: int) -> pd.Series:
+    return s.rolling(n, min_periods=n).mean()
+
+
+def ema(s: pd.Series, span: int) -> pd.Series:
+    return s.ewm(span=span, adjust=False).mean()
+
+
+def macd_hist(close: pd.Series, fast: int = 12, slow: int = 26, signal: int = 9) -> pd.Series:
+    macd_line = ema(close, fast) - ema(close, slow)
+    signal_line = ema(macd_line, signal)
+    return macd_line - signal_line
+
+
+def rsi_wilder(close: pd.Series, period: int = 14) -> pd.Series:
+    delta = close.diff()
+    gain = delta.clip(lower=0.0)
+    loss = (-delta).clip(lower=0.0)
+    return _rsi_wilder_from(gain, loss, period)
+
+
+def _rsi_wilder_from(gain: pd.Series, loss: pd.Series, period: int) -> pd.Series:
+    avg_gain = gain.ewm(alpha=1 / period, adjust=False).mean()
+    avg_loss = loss.ewm(alpha=1 / period, adjust=False).mean()
+    rs = avg_gain / avg_loss.replace(0, np.nan)
+    return 100 - (100 / (1 + rs))
+
+
+def cci_fast(tp: pd.Series, period: int = 20) -> pd.Series:
+    """
+    Vectorized CCI (blocked sliding windows, see rolling_kernels).
+    Much faster than rolling().apply(); the MAD is floored at 1e-9.
+    """
+    out = rolling_kernels.cci(tp.to_numpy(dtype=np.float64), period, floor=1e-9)
+    return pd.Series(out, index=tp.index)
+
+
+# -----------------------------
+# Registry
+# -----------------------------
+@dataclass(frozen=True)
+class Indicator:
+    name: str
+    fn: Callable[..., pd.Series]   # fn(resolver, **params)
+    columns: tuple[str, ...]       # raw columns read
+    inputs: tuple[str, ...]        # registered indicators used
+    defaults: dict = field(default_factory=dict)
+
+
+REGISTRY: dict[str, Indicator] = {}
+
+
+def indicator(name: str, columns: tuple[str, ...] = (), inputs: tuple[str, ...] = (),
+              **defaults: Any):
+    """Registers fn(resolver, **params) under `name`."""
+    def register(fn: Callable[..., pd.Series]) -> Callable[..., pd.Series]:
+        if name in REGISTRY:
+            raise ValueError(f"indicator '{name}' is already registered")
+        REGISTRY[name] = Indicator(name, fn, tuple(columns), tuple(inputs), dict(defaults))
+        return fn
+    return register
+
+
+def _freeze(value: Any) -> Any:
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+class Resolver:
+    """Computes registered indicators on one frame, each (name, params) once."""
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self._memo: dict[tuple, pd.Series] = {}
+
+    def column(self, name: str) -> pd.Series:
+        key = ("column", name)
+        if key not in self._memo:
+            if name not in self.df.columns:
+                raise KeyError(f"frame has no '{name}' column")
+            self._memo[key] = self.df[name].astype(float)
+        return self._memo[key]
+
+    def has(self, *columns: str) -> bool:
+        return all(c in self.df.columns for c in columns)
+
+    def get(self, name: str, **params: Any) -> pd.Series:
+        spec = REGISTRY.get(name)
+        if spec is None:
+            raise KeyError(f"unknown indicator '{name}' (registered: {sorted(REGISTRY)})")
+        unknown = set(params) - set(spec.defaults)
+        if unknown:
+            raise TypeError(f"{name}: unexpected parameter(s) {sorted(unknown)}")
+        full = {**spec.defaults, **params}
+        key = (name, _freeze(full))
+        if key not in self._memo:
+            self._memo[key] = spec.fn(self, **full)
+        return self._memo[key]
+
+    def source(self, src: Source) -> pd.Series:
+        if isinstance(src, tuple):
+            name, params = src
+            return self.get(name, **params)
+        if src in REGISTRY:
+            return self.get(src)
+        return self.column(src)
+
+    def frame(self, wanted: dict[str, Source]) -> pd.DataFrame:
+        """{output column: source} -> DataFrame on the frame's index."""
+        return pd.DataFrame({out: self.source(src) for out, src in wanted.items()},
+                            index=self.df.index)
+
+    @property
+    def computed(self) -> int:
+        return len(self._memo)
+
+
+# -----------------------------
+# Building blocks
+# -----------------------------
+@indicator("delta", columns=("Close",))
+def _delta(r: Resolver) -> pd.Series:
+    return r.column("Close").diff()
+
+
+@indicator("gain", inputs=("delta",))
+def _gain(r: Resolver) -> pd.Series:
+    """Up moves, 0 elsewhere (including the first bar)."""
+    delta = r.get("delta")
+    return delta.where(delta > 0, 0)
+
+
+@indicator("loss", inputs=("delta",))
+def _loss(r: Resolver) -> pd.Series:
+    delta = r.get("delta")
+    return -delta.where(delta < 0, 0)
+
+
+@indicator("gain_clipped", inputs=("delta",))
+def _gain_clipped(r: Resolver) -> pd.Series:
+    """Up moves, NaN on the first bar."""
+    return r.get("delta").clip(lower=0.0)
+
+
+@indicator("loss_clipped", inputs=("delta",))
+def _loss_clipped(r: Resolver) -> pd.Series:
+    return (-r.get("delta")).clip(lower=0.0)
+
+
+@indicator("typical_price", columns=("High", "Low", "Close"), fallback=False)
+def _typical_price(r: Resolver, fallback: bool) -> pd.Series:
+    """(High + Low + Close) / 3; with fallback=True, Close when High/Low are missing."""
+    if fallback and not r.has("High", "Low"):
+        return r.column("Close")
+    return (r.column("High") + r.column("Low") + r.column("Close")) / 3.0
+
+
+# -----------------------------
+# Moving averages / dispersion
+# -----------------------------
+@indicator("sma", source="Close", window=20)
+def _sma(r: Resolver, source: Source, window: int) -> pd.Series:
+    return sma(r.source(source), window)
+
+
+@indicator("ema", source="Close", span=20)
+def _ema(r: Resolver, source: Source, span: int) -> pd.Series:
+    return ema(r.source(source), span)
+
+
+@indicator("std", source="Close", window=20)
+def _std(r: Resolver, source: Source, window: int) -> pd.Series:
+    return rolling_kernels.rolling_std(r.source(source), window)
+
+
+@indicator("dist_ma", columns=("Close",), inputs=("sma",), window=200)
+def _dist_ma(r: Resolver, window: int) -> pd.Series:
+    """Percent distance of Close from its `window` moving average."""
+    ma = r.get("sma", window=window)
+    return ((r.column("Close") - ma) / ma) * 100
+
+
+@indicator("bollinger_upper", inputs=("sma", "std"), window=20, k=2.0)
+def _bollinger_upper(r: Resolver, window: int, k: float) -> pd.Series:
+    return r.get("sma", window=window) + (r.get("std", window=window) * k)
+
+
+@indicator("bollinger_lower", inputs=("sma", "std"), window=20, k=2.0)
+def _bollinger_lower(r: Resolver, window: int, k: float) -> pd.Series:
+    return r.get("sma", window=window) - (r.get("std", window=window) * k)
+
+
+# -----------------------------
+# Momentum
+# -----------------------------
+@indicator("macd_line", inputs=("ema",), fast=12, slow=26)
+def _macd_line(r: Resolver, fast: int, slow: int) -> pd.Series:
+    return r.get("ema", span=fast) - r.get("ema", span=slow)
+
+
+@indicator("macd_signal", inputs=("macd_line", "ema"), fast=12, slow=26, signal=9)
+def _macd_signal(r: Resolver, fast: int, slow: int, signal: int) -> pd.Series:
+    return r.get("ema", source=("macd_line", {"fast": fast, "slow": slow}), span=signal)
+
+
+@indicator("macd_hist", inputs=("macd_line", "macd_signal"), fast=12, slow=26, signal=9)
+def _macd_hist(r: Resolver, fast: int, slow: int, signal: int) -> pd.Series:
+    return (r.get("macd_line", fast=fast, slow=slow)
+            - r.get("macd_signal", fast=fast, slow=slow, signal=signal))
+
+
+@indicator("rsi_simple", inputs=("gain", "loss"), period=14)
+def _rsi_simple(r: Resolver, period: int) -> pd.Series:
+    gain = r.get("sma", source="gain", window=period)
+    loss = r.get("sma", source="loss", window=period)
+    return 100 - (100 / (1 + (gain / loss)))
+
+
+@indicator("rsi_wilder", inputs=("gain_clipped", "loss_clipped"), period=14)
+def _rsi_wilder(r: Resolver, period: int) -> pd.Series:
+    return _rsi_wilder_from(r.get("gain_clipped"), r.get("loss_clipped"), period)
+
+
+# -----------------------------
+# CCI
+# -----------------------------
+@indicator("cci_fast", inputs=("typical_price",), period=20, fallback=False)
+def _cci_fast(r: Resolver, period: int, fallback: bool) -> pd.Series:
+    """Sliding-window CCI with the MAD floored at 1e-9 (analysis_engine_local)."""
+    return cci_fast(r.get("typical_price", fallback=fallback), period)
+
+
+@indicator("cci_mad", inputs=("typical_price",), period=20)
+def _cci_mad(r: Resolver, period: int) -> pd.Series:
+    """Unfloored mean-absolute-deviation CCI (signals/analysis_engine)."""
+    return rolling_kernels.cci(r.get("typical_price"), period)
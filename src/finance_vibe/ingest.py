@@ -1,19 +1,18 @@
-import yfinance as yf
-import pandas as pd
-from pathlib import Path
+import os
+
+import raw_store
+from config import RAW_DIR
 
 def fetch_stock_data(ticker_symbol):
-    # Create the data directory if it doesn't exist
-    Path("data/raw").mkdir(parents=True, exist_ok=True)
-    
+    import yfinance as yf
+
     # Fetch data
     print(f"Fetching data for {ticker_symbol}...")
     ticker = yf.Ticker(ticker_symbol)
     df = ticker.history(period="1mo")
     
     # Save to our 'raw' folder
-    file_path = f"data/raw/{ticker_symbol}_history.csv"
-    df.to_csv(file_path)
+    file_path = raw_store.write_raw(df, raw_store.path_for(os.path.join(RAW_DIR, f"{ticker_symbol}_history")))
     print(f"Success! Data saved to {file_path}")
 
 if __name__ == "__main__":
@@ -0,0 +1,387 @@
+"""
+Run metrics: stage timings, per-ticker timings, network and cache stats.
+
+A session covers one run (the pipeline, or an engine started on its own)
+and writes one JSON file next to the reports when it ends:
+
+    data/logs/metrics_<YYYY-mm-dd_HHMMSS>_<session>.json
+
+Sessions nest: an engine started by run_vibe records into the pipeline's
+session instead of writing its own file.
+
+    with metrics.session("scan_local", profile_top=5):
+        with metrics.stage("scan"):                 # wall, CPU, peak RSS
+            for path in paths:
+                with metrics.ticker(name, "local", path=path):
+                    with metrics.phase("load"):
+                        df = load(path)
+                    with metrics.phase("features"):
+                        feat = build(df)
+        metrics.profile_slowest("local", rerun)     # cProfile the slowest tickers
+
+Ticker records made in worker processes are returned with the results
+and added with add_tickers(). Providers time each upstream request with
+request(); caches mark hits on the current ticker with annotate().
+
+Stage CPU time is the stage thread's own time plus the CPU of child
+processes that exited during the stage. Peak RSS is the process's (and
+its children's) high-water mark when the stage ends, not the stage's own
+allocation.
+"""
+from __future__ import annotations
+
+import json
+import os
+import platform
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Callable, Iterator, Optional
+
+import config
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+SLOWEST_KEPT = 10  # slowest tickers listed per engine in the summary
+_PROFILE_LINES = 40
+
+_current_ticker: ContextVar[Optional[dict]] = ContextVar("metrics_ticker", default=None)
+_current_stage: ContextVar[Optional[str]] = ContextVar("metrics_stage", default=None)
+
+
+def _rss_mb(children: bool = False) -> float:
+    if resource is None:
+        return float("nan")
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    who = resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF
+    peak = resource.getrusage(who).ru_maxrss
+    return peak / (2**20 if sys.platform == "darwin" else 2**10)
+
+
+def _children_cpu() -> float:
+    if resource is None:
+        return float("nan")
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def _quantile(values: list[float], q: float) -> float:
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+# -----------------------------
+# Recorder
+# -----------------------------
+class Recorder:
+    """Everything measured in one session (thread-safe)."""
+
+    def __init__(self, name: str, profile_top: Optional[int] = None):
+        self.name = name
+        self.profile_top = config.METRICS_PROFILE_TOP if profile_top is None else profile_top
+        self.started = time.time()
+        self.pid = os.getpid()
+        self.stages: list[dict] = []
+        self.tickers: list[dict] = []
+        self.network: dict[str, dict] = {}
+        self.latencies: dict[str, list[float]] = {}
+        self.profiles: list[str] = []
+        self._lock = threading.Lock()
+
+    def add_stage(self, record: dict) -> None:
+        with self._lock:
+            self.stages.append(record)
+
+    def add_tickers(self, records: list[dict]) -> None:
+        with self._lock:
+            self.tickers.extend(records)
+
+    def add_request(self, source: str, seconds: float, symbols: int, nbytes: int,
+                    error: bool) -> None:
+        with self._lock:
+            net = self.network.setdefault(source, {"requests": 0, "errors": 0, "symbols": 0,
+                                                   "bytes": 0, "seconds": 0.0})
+            net["requests"] += 1
+            net["errors"] += int(error)
+            net["symbols"] += symbols
+            net["bytes"] += nbytes
+            net["seconds"] += seconds
+            self.latencies.setdefault(source, []).append(seconds)
+
+    # -----------------------------
+    # Summary
+    # -----------------------------
+    def ticker_summary(self) -> dict[str, dict]:
+        out: dict[str, dict] = {}
+        engines = sorted({r.get("engine", "") for r in self.tickers})
+        for engine in engines:
+            recs = [r for r in self.tickers if r.get("engine", "") == engine]
+            totals = [r["total_s"] for r in recs]
+            phases = sorted({k for r in recs for k in r if k.endswith("_s") and k != "total_s"})
+            cached = [r["feature_cache"] for r in recs if "feature_cache" in r]
+            out[engine] = {
+                "tickers": len(recs),
+                "total_s": sum(totals),
+                "p50_s": _quantile(totals, 0.5),
+                "p95_s": _quantile(totals, 0.95),
+                "max_s": max(totals) if totals else float("nan"),
+                "phases_s": {p[:-2]: sum(r.get(p, 0.0) for r in recs) for p in phases},
+                "feature_cache_hit_rate": (cached.count("hit") / len(cached)) if cached else None,
+                "slowest": sorted(recs, key=lambda r: r["total_s"], reverse=True)[:SLOWEST_KEPT],
+            }
+        return out
+
+    def network_summary(self) -> dict[str, dict]:
+        out = {}
+        for source, net in self.network.items():
+            lat = self.latencies.get(source, [])
+            out[source] = {**net, "p50_s": _quantile(lat, 0.5), "p95_s": _quantile(lat, 0.95),
+                           "max_s": max(lat) if lat else float("nan")}
+        return out
+
+    def cache_summary(self) -> dict[str, Any]:
+        out: dict[str, Any] = {}
+        # Only report caches this run used (no import just to read zeros)
+        response_cache = sys.modules.get("response_cache")
+        if response_cache is not None:
+            stats = response_cache.shared().stats()
+            out["response"] = {
+                ep: {**c, "hit_rate": (c.get("hits", 0) + c.get("coalesced", 0))
+                     / max(1, c.get("hits", 0) + c.get("misses", 0) + c.get("coalesced", 0))}
+                for ep, c in stats.items()}
+        feature = {e: s["feature_cache_hit_rate"] for e, s in self.ticker_summary().items()
+                   if s["feature_cache_hit_rate"] is not None}
+        if feature:
+            out["feature_hit_rate"] = feature
+        return out
+
+    def to_dict(self) -> dict:
+        finished = time.time()
+        return {
+            "session": self.name,
+            "started": datetime.fromtimestamp(self.started).isoformat(timespec="seconds"),
+            "finished": datetime.fromtimestamp(finished).isoformat(timespec="seconds"),
+            "wall_s": finished - self.started,
+            "argv": sys.argv,
+            "python": platform.python_version(),
+            "host": platform.node(),
+            "cpu_count": os.cpu_count(),
+            "peak_rss_mb": _rss_mb(),
+            "children_peak_rss_mb": _rss_mb(children=True),
+            "stages": self.stages,
+            "engines": self.ticker_summary(),
+            "network": self.network_summary(),
+            "caches": self.cache_summary(),
+            "profiles": self.profiles,
+            "tickers": self.tickers,
+        }
+
+
+# -----------------------------
+# Session
+# -----------------------------
+_session: Optional[Recorder] = None
+_depth = 0
+_session_lock = threading.Lock()
+
+
+def current() -> Optional[Recorder]:
+    """The open session, if it belongs to this process (not a forked worker's copy)."""
+    rec = _session
+    return rec if rec is not None and rec.pid == os.getpid() else None
+
+
+def metrics_path(name: str, started: Optional[float] = None) -> str:
+    stamp = datetime.fromtimestamp(started or time.time()).strftime("%Y-%m-%d_%H%M%S")
+    return os.path.join(config.LOGS_DIR, f"metrics_{stamp}_{name}.json")
+
+
+@contextmanager
+def session(name: str, profile_top: Optional[int] = None) -> Iterator[Optional[Recorder]]:
+    """Opens a session, or joins the one already running in this process."""
+    global _session, _depth
+    if not config.METRICS:
+        yield None
+        return
+    with _session_lock:
+        if current() is None:  # none yet, or a copy inherited by a forked worker
+            _session, _depth = Recorder(name, profile_top), 0
+        elif profile_top is not None:
+            _session.profile_top = max(_session.profile_top, profile_top)
+        _depth += 1
+        rec = _session
+    try:
+        yield rec
+    finally:
+        with _session_lock:
+            _depth -= 1
+            done = _depth == 0
+            if done:
+                _session = None
+        if done:
+            path = write(rec)
+            print(f"📊 Metrics: {path}")
+
+
+def write(rec: Recorder, path: Optional[str] = None) -> str:
+    path = path or metrics_path(rec.name, rec.started)
+    config.ensure_dir(os.path.dirname(path) or ".")
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(rec.to_dict(), f, indent=2, default=str)
+    os.replace(tmp, path)
+    return path
+
+
+# -----------------------------
+# Measurements
+# -----------------------------
+@contextmanager
+def stage(name: str) -> Iterator[dict]:
+    """Wall time, CPU time and peak RSS of a block (set ["status"] to override "ok")."""
+    record = {"stage": name, "parent": _current_stage.get()}
+    token = _current_stage.set(name)
+    wall, cpu, children = time.perf_counter(), time.thread_time(), _children_cpu()
+    try:
+        yield record
+    except BaseException:
+        record["status"] = "failed"
+        raise
+    finally:
+        _current_stage.reset(token)
+        record.setdefault("status", "ok")
+        record.update({
+            "wall_s": time.perf_counter() - wall,
+            "cpu_s": time.thread_time() - cpu,
+            "children_cpu_s": _children_cpu() - children,
+            "peak_rss_mb": _rss_mb(),
+            "children_peak_rss_mb": _rss_mb(children=True),
+        })
+        rec = current()
+        if rec is not None:
+            rec.add_stage(record)
+
+
+@contextmanager
+def ticker(name: str, engine: str, **fields: Any) -> Iterator[dict]:
+    """
+    Times one ticker. The record is added to the session when there is one
+    in this process; workers return it to the parent instead.
+    """
+    record = {"ticker": name, "engine": engine, **fields}
+    token = _current_ticker.set(record)
+    start = time.perf_counter()
+    try:
+        yield record
+    except Exception as e:
+        record["error"] = str(e)
+        raise
+    finally:
+        _current_ticker.reset(token)
+        record["total_s"] = time.perf_counter() - start
+        rec = current()
+        if rec is not None:
+            rec.add_tickers([record])
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Adds the block's time to `<name>_s` on the current ticker (if any)."""
+    record = _current_ticker.get()
+    if record is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        key = f"{name}_s"
+        record[key] = record.get(key, 0.0) + time.perf_counter() - start
+
+
+def annotate(key: str, value: Any) -> None:
+    record = _current_ticker.get()
+    if record is not None:
+        record[key] = value
+
+
+def add_tickers(records: list[dict]) -> None:
+    rec = current()
+    if rec is not None and records:
+        rec.add_tickers(records)
+
+
+def network(source: str, seconds: float, symbols: int = 1, nbytes: int = 0,
+            error: bool = False) -> None:
+    """One upstream request (bytes when the transport exposes them)."""
+    rec = current()
+    if rec is not None:
+        rec.add_request(source, seconds, symbols, nbytes, error)
+
+
+@contextmanager
+def request(source: str, symbols: int = 1) -> Iterator[dict]:
+    """Times one upstream request; set ["bytes"] on the yielded dict if known."""
+    info = {"bytes": 0, "error": False}
+    start = time.perf_counter()
+    try:
+        yield info
+    except Exception:
+        info["error"] = True
+        raise
+    finally:
+        network(source, time.perf_counter() - start, symbols, info["bytes"], info["error"])
+
+
+# -----------------------------
+# Profiles
+# -----------------------------
+def profile_slowest(engine: str, rerun: Callable[[dict], Any],
+                    top: Optional[int] = None) -> list[str]:
+    """
+    Runs rerun(record) again under cProfile for the `top` slowest tickers
+    of `engine` and saves <name>.prof plus a text summary per ticker.
+    """
+    rec = current()
+    top = (rec.profile_top if rec is not None else 0) if top is None else top
+    if rec is None or top <= 0:
+        return []
+    import cProfile
+    import io
+    import pstats
+
+    ok = [r for r in rec.tickers if r.get("engine") == engine and "error" not in r]
+    slowest = sorted(ok, key=lambda r: r["total_s"], reverse=True)[:top]
+    out_dir = config.ensure_dir(os.path.join(config.LOGS_DIR, "profiles"))
+    stamp = datetime.fromtimestamp(rec.started).strftime("%Y-%m-%d_%H%M%S")
+    saved = []
+    for r in slowest:
+        prof = cProfile.Profile()
+        prof.enable()
+        try:
+            rerun(r)
+        except Exception:
+            pass  # the profile up to the error is still useful
+        finally:
+            prof.disable()
+        base = os.path.join(out_dir, f"{stamp}_{engine}_{r['ticker']}")
+        prof.dump_stats(base + ".prof")
+        text = io.StringIO()
+        pstats.Stats(prof, stream=text).sort_stats("cumulative").print_stats(_PROFILE_LINES)
+        with open(base + ".txt", "w") as f:
+            f.write(f"{engine} {r['ticker']} (scan took {r['total_s']:.3f}s)\n{text.getvalue()}")
+        saved.append(base + ".prof")
+    with rec._lock:
+        rec.profiles.extend(saved)
+    if saved:
+        print(f"🔬 Profiled {len(saved)} slowest {engine} ticker(s) -> {out_dir}")
+    return saved
@@ -0,0 +1,241 @@
+"""
+Cross-ticker panel kernels.
+
+Tickers are aligned on one shared date index as 2-D (dates x tickers)
+arrays and every indicator is computed for all columns in one pass.
+Each column follows pandas semantics exactly as the per-ticker functions
+in analysis_engine_local do: leading NaNs (a ticker listed later than the
+others) are skipped, rolling windows containing NaN produce NaN, and the
+EMA recursion is the same as `Series.ewm(adjust=False).mean()`.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+import rolling_kernels
+
+
+FEATURE_COLUMNS = ["Close", "SMA20", "SMA50", "MACD_H", "MACD_S",
+                   "RSI", "RSI_S", "CCI", "CCI_S"]
+
+# -----------------------------
+# Panel model
+# -----------------------------
+@dataclass
+class Panel:
+    dates: np.ndarray        # (T,) datetime64[ns], shared index
+    tickers: list[str]       # (N,)
+    close: np.ndarray        # (T, N) float64, NaN outside a ticker's history
+    high: np.ndarray         # (T, N)
+    low: np.ndarray          # (T, N)
+    has_hl: np.ndarray       # (N,) bool, ticker has High/Low columns
+    first: np.ndarray        # (N,) first row holding data
+    last: np.ndarray         # (N,) last row holding data
+
+    @property
+    def rows(self) -> np.ndarray:
+        return self.last - self.first + 1
+
+
+def build_panel(frames: dict[str, pd.DataFrame]) -> tuple[Panel, dict[str, pd.DataFrame]]:
+    """
+    Aligns load_ohlc-style frames (Date, Close, optional High/Low) onto the
+    union of their dates. A ticker must occupy a contiguous run of the
+    shared index; tickers with interior gaps or duplicate dates cannot be
+    represented without changing their indicators and are returned
+    separately for the per-ticker path.
+    """
+    if not frames:
+        raise ValueError("no frames to align")
+
+    dates = np.unique(np.concatenate(
+        [f["Date"].to_numpy(dtype="datetime64[ns]") for f in frames.values()]))
+
+    tickers: list[str] = []
+    cols: list[tuple[np.ndarray, pd.DataFrame]] = []
+    rejected: dict[str, pd.DataFrame] = {}
+    for ticker, f in frames.items():
+        pos = np.searchsorted(dates, f["Date"].to_numpy(dtype="datetime64[ns]"))
+        if len(pos) == 0 or pos[-1] - pos[0] + 1 != len(pos):
+            rejected[ticker] = f
+            continue
+        tickers.append(ticker)
+        cols.append((pos, f))
+
+    t, n = len(dates), len(tickers)
+    close = np.full((t, n), np.nan)
+    high = np.full((t, n), np.nan)
+    low = np.full((t, n), np.nan)
+    has_hl = np.zeros(n, dtype=bool)
+    first = np.zeros(n, dtype=np.int64)
+    last = np.zeros(n, dtype=np.int64)
+
+    for j, (pos, f) in enumerate(cols):
+        close[pos, j] = f["Close"].to_numpy(dtype=np.float64)
+        if "High" in f.columns and "Low" in f.columns:
+            has_hl[j] = True
+            high[pos, j] = f["High"].to_numpy(dtype=np.float64)
+            low[pos, j] = f["Low"].to_numpy(dtype=np.float64)
+        first[j], last[j] = pos[0], pos[-1]
+
+    panel = Panel(dates=dates, tickers=tickers, close=close, high=high, low=low,
+                  has_hl=has_hl, first=first, last=last)
+    return panel, rejected
+
+
+# -----------------------------
+# 2-D indicator kernels
+# -----------------------------
+def sma(x: np.ndarray, n: int) -> np.ndarray:
+    """Rolling mean with min_periods=n down each column."""
+    out = np.full(x.shape, np.nan)
+    if x.shape[0] < n:
+        return out
+
+    valid = ~np.isnan(x)
+    # Shift by each column's first value so cumulative sums stay small
+    ref = np.nan_to_num(x[np.argmax(valid, axis=0), np.arange(x.shape[1])])
+    centered = np.where(valid, x - ref, 0.0)
+
+    csum = np.cumsum(centered, axis=0)
+    ccnt = np.cumsum(valid, axis=0)
+    csum = np.vstack([np.zeros((1, x.shape[1])), csum])
+    ccnt = np.vstack([np.zeros((1, x.shape[1]), dtype=ccnt.dtype), ccnt])
+
+    wsum = csum[n:] - csum[:-n]
+    wcnt = ccnt[n:] - ccnt[:-n]
+    out[n - 1:] = np.where(wcnt == n, wsum / n + ref, np.nan)
+    return out
+
+
+def ewm(x: np.ndarray, alpha: float) -> np.ndarray:
+    """
+    `Series.ewm(alpha=alpha, adjust=False).mean()` for every column.
+    Loops over rows only; each step is one vector operation across tickers.
+    """
+    t = x.shape[0]
+    out = np.empty(x.shape)
+    if t == 0:
+        return out
+
+    old_wt_factor = 1.0 - alpha
+    new_wt = alpha
+    weighted = x[0].copy()
+    old_wt = np.ones(x.shape[1:])
+    out[0] = weighted
+
+    for i in range(1, t):
+        cur = x[i]
+        obs = ~np.isnan(cur)
+        started = ~np.isnan(weighted)
+
+        old_wt = np.where(started, old_wt * old_wt_factor, old_wt)
+        upd = started & obs & (weighted != cur)
+        with np.errstate(invalid="ignore"):
+            blended = (old_wt * weighted + new_wt * cur) / (old_wt + new_wt)
+        weighted = np.where(upd, blended, weighted)
+        old_wt = np.where(started & obs, 1.0, old_wt)
+        weighted = np.where(~started & obs, cur, weighted)
+        out[i] = weighted
+    return out
+
+
+def ema(x: np.ndarray, span: int) -> np.ndarray:
+    return ewm(x, 2.0 / (span + 1.0))
+
+
+def macd_hist(close: np.ndarray, fast: int = 12, slow: int = 26, signal: int = 9) -> np.ndarray:
+    macd_line = ema(close, fast) - ema(close, slow)
+    return macd_line - ema(macd_line, signal)
+
+
+def rsi_wilder(close: np.ndarray, period: int = 14) -> np.ndarray:
+    delta = np.full(close.shape, np.nan)
+    delta[1:] = close[1:] - close[:-1]
+    gain = np.maximum(delta, 0.0)
+    loss = np.maximum(-delta, 0.0)
+    avg_gain = ewm(gain, 1.0 / period)
+    avg_loss = ewm(loss, 1.0 / period)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rs = avg_gain / np.where(avg_loss == 0, np.nan, avg_loss)
+        return 100 - (100 / (1 + rs))
+
+
+def cci(tp: np.ndarray, period: int = 20) -> np.ndarray:
+    """Column-wise equivalent of analysis_engine_local.cci_fast."""
+    return rolling_kernels.cci(tp, period, floor=1e-9)
+
+
+def panel_features(panel: Panel, rows: Optional[np.ndarray] = None) -> dict[str, np.ndarray]:
+    """
+    Same columns as analysis_engine_local.build_features, as (T, N) arrays.
+    With `rows`, every column is reduced to last_values(..., rows) as soon
+    as it is computed, so no more than three (T, N) arrays are alive at once
+    instead of one per feature.
+    """
+    cols = None if rows is None else np.arange(len(rows))
+
+    def keep(x: np.ndarray) -> np.ndarray:
+        return x if rows is None else x[rows, cols]
+
+    close = panel.close
+    feat: dict[str, np.ndarray] = {"Close": keep(close)}
+
+    feat["SMA20"] = keep(sma(close, 20))
+    feat["SMA50"] = keep(sma(close, 50))
+
+    macd_h = macd_hist(close)
+    feat["MACD_H"], feat["MACD_S"] = keep(macd_h), keep(ema(macd_h, 9))
+    del macd_h
+
+    rsi = rsi_wilder(close, 14)
+    feat["RSI"], feat["RSI_S"] = keep(rsi), keep(sma(rsi, 10))
+    del rsi
+
+    tp = np.where(panel.has_hl, (panel.high + panel.low + close) / 3.0, close)
+    cci_v = cci(tp, 20)
+    del tp
+    feat["CCI"], feat["CCI_S"] = keep(cci_v), keep(sma(cci_v, 10))
+    return feat
+
+
+# -----------------------------
+# Scoring
+# -----------------------------
+def last_values(feat: dict[str, np.ndarray], rows: np.ndarray) -> dict[str, np.ndarray]:
+    """Picks row `rows[j]` of column j from every feature array."""
+    cols = np.arange(len(rows))
+    return {k: v[rows, cols] for k, v in feat.items()}
+
+
+def score_values(v: dict[str, np.ndarray]) -> np.ndarray:
+    """
+    Vectorized score_last_row over arrays of feature values of any shape:
+    last values (N,), one ticker's history (T,) or the whole panel (T, N).
+    NaN inputs give a meaningless score; mask them with complete_mask.
+    """
+    price, s20, s50 = v["Close"], v["SMA20"], v["SMA50"]
+    macd_strong = v["MACD_H"] > v["MACD_S"]
+    rsi_strong = v["RSI"] > v["RSI_S"]
+    cci_v, cci_s = v["CCI"], v["CCI_S"]
+
+    trend = np.where((price > s20) & (s20 > s50), 4,
+                     np.where((price < s20) & (s20 < s50), -4, 0))
+    momentum = np.where(macd_strong & rsi_strong, 3,
+                        np.where(macd_strong | rsi_strong, 1, -3))
+    stretch = np.where((cci_v > 0) & (cci_v > cci_s), 3,
+                       np.where((cci_v < 0) & (cci_v < cci_s), -3, 0))
+    return (trend + momentum + stretch).astype(np.int64)
+
+
+def complete_mask(v: dict[str, np.ndarray], columns: Optional[list[str]] = None) -> np.ndarray:
+    """True where none of the scoring inputs is NaN."""
+    columns = columns or FEATURE_COLUMNS
+    mask = np.ones(np.shape(v[columns[0]]), dtype=bool)
+    for k in columns:
+        mask &= ~np.isnan(v[k])
+    return mask
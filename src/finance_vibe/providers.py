@@ -0,0 +1,386 @@
+"""
+Market data providers.
+
+Every downloader goes through a DataProvider so symbols are fetched in
+batches (multi-symbol requests, split into chunks, bounded concurrency)
+instead of one network round trip per ticker.
+
+    provider = get_provider()
+    batch = provider.fetch_many(["SPY", "QQQ"], period="5y", interval="1wk")
+    batch.frames["SPY"]  # OHLCV frame indexed by Date
+
+Set FINANCE_VIBE_PROVIDER=file:<dir> to serve bars from local raw files
+(FileProvider) so ingestion can be exercised offline, or
+FINANCE_VIBE_PROVIDER=http://host:port to read from an HTTP bar server
+such as standin_server.py (HttpProvider).
+
+`fetch_one` fetches a single symbol and raises instead of collecting
+errors; async_ingest.py builds per-ticker retries and rate limiting on it.
+
+Network providers keep every symbol's bars in the response cache until
+the requested interval's next close (see response_cache.py), so repeated
+runs within that window send no requests.
+"""
+from __future__ import annotations
+
+import io
+import os
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Iterable, Optional
+
+import pandas as pd
+
+import config
+import metrics
+import raw_store
+import response_cache
+
+
+NO_DATA = "no data returned"
+
+
+class Throttled(Exception):
+    """The upstream asked us to slow down (HTTP 429 / rate-limit error)."""
+
+    def __init__(self, message: str = "rate limited", retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+# -----------------------------
+# Helpers
+# -----------------------------
+@dataclass
+class BatchResult:
+    frames: dict[str, pd.DataFrame] = field(default_factory=dict)
+    errors: dict[str, str] = field(default_factory=dict)
+
+
+def chunked(items: list[str], size: int) -> list[list[str]]:
+    size = max(1, size)
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def period_start(end: pd.Timestamp, period: Optional[str]) -> Optional[pd.Timestamp]:
+    """Oldest date a `period` download ending at `end` covers (None = all)."""
+    if not period:
+        return None
+    units = {"y": "years", "mo": "months", "wk": "weeks", "d": "days"}
+    for suffix, unit in units.items():
+        if period.endswith(suffix) and period[:-len(suffix)].isdigit():
+            return end - pd.DateOffset(**{unit: int(period[:-len(suffix)])})
+    return None  # "max"/"ytd": keep everything
+
+
+def split_multi_symbol(df: pd.DataFrame, symbols: list[str]) -> dict[str, pd.DataFrame]:
+    """
+    Splits a yf.download(group_by="ticker") frame into one frame per symbol.
+    Rows that only exist for other symbols come back all-NaN and are dropped.
+    """
+    out: dict[str, pd.DataFrame] = {}
+    if df is None or df.empty:
+        return out
+
+    if not isinstance(df.columns, pd.MultiIndex):
+        if len(symbols) == 1:
+            out[symbols[0]] = df
+        return out
+
+    level0 = set(df.columns.get_level_values(0))
+    level1 = set(df.columns.get_level_values(1))
+    for sym in symbols:
+        if sym in level0:
+            sub = df[sym]
+        elif sym in level1:
+            sub = df.xs(sym, axis=1, level=1)
+        else:
+            continue
+        sub = sub.dropna(how="all")
+        if not sub.empty:
+            out[sym] = sub
+    return out
+
+
+# -----------------------------
+# Provider interface
+# -----------------------------
+class DataProvider:
+    """
+    Base provider. Subclasses implement `_fetch_chunk`; `fetch_many`
+    handles chunking and the bounded thread pool.
+    """
+
+    name = "base"
+    # Chunks are fetched concurrently unless the backend is not thread-safe
+    parallel_chunks = True
+    # Responses come over the network and go through the response cache
+    remote = False
+
+    def __init__(self, chunk_size: Optional[int] = None, max_workers: Optional[int] = None,
+                 cache: Optional[response_cache.ResponseCache] = None):
+        self.chunk_size = chunk_size or config.DOWNLOAD_CHUNK_SIZE
+        self.max_workers = max_workers or config.DOWNLOAD_WORKERS
+        self.cache = cache or (response_cache.shared() if self.remote else None)
+
+    @property
+    def source(self) -> str:
+        """Identifies the upstream in cache keys."""
+        return self.name
+
+    def _request(self, symbol: str, period: Optional[str], interval: str,
+                 start: Optional[str]) -> dict:
+        return {"source": self.source, "symbol": symbol, "period": None if start else period,
+                "interval": interval, "start": start}
+
+    def _fetch_chunk(self, symbols: list[str], period: Optional[str], interval: str,
+                     start: Optional[str]) -> dict[str, pd.DataFrame]:
+        raise NotImplementedError
+
+    def _fetch_symbol(self, symbol: str, period: Optional[str], interval: str,
+                      start: Optional[str]) -> pd.DataFrame:
+        frames = self._fetch_chunk([symbol], period, interval, start)
+        return frames.get(symbol, pd.DataFrame())
+
+    def _cached(self, symbol: str, period: Optional[str], interval: str, start: Optional[str],
+                fetch) -> pd.DataFrame:
+        if self.cache is None:
+            return fetch()
+        return self.cache.get_or_fetch("history", self._request(symbol, period, interval, start),
+                                       fetch)
+
+    def from_cache(self, symbol: str, period: Optional[str] = None, interval: str = "1d",
+                   start: Optional[str] = None) -> Optional[pd.DataFrame]:
+        """Fresh cached bars for one symbol, or None (no request is sent)."""
+        if self.cache is None:
+            return None
+        df = self.cache.get("history", self._request(symbol.upper(), period, interval, start))
+        return None if df is response_cache.MISS else df
+
+    def fetch_one(self, symbol: str, period: Optional[str] = None, interval: str = "1d",
+                  start: Optional[str] = None) -> pd.DataFrame:
+        """
+        Bars for one symbol (empty when there are none); errors propagate.
+        Not coalesced with identical requests in flight: a caller retrying
+        after a timeout must send a new request, not wait on the hung one.
+        """
+        symbol = symbol.upper()
+        if self.cache is None:
+            return self._fetch_symbol(symbol, period, interval, start)
+        request = self._request(symbol, period, interval, start)
+        df = self.cache.get("history", request)
+        if df is response_cache.MISS:
+            df = self._fetch_symbol(symbol, period, interval, start)
+            self.cache.put("history", request, df)
+        return df
+
+    def history(self, symbol: str, period: Optional[str] = None, interval: str = "1d",
+                start: Optional[str] = None) -> pd.DataFrame:
+        symbol = symbol.upper()
+
+        def fetch() -> pd.DataFrame:
+            batch = self._fetch_batch([symbol], period, interval, start)
+            error = batch.errors.get(symbol)
+            if error and error != NO_DATA:
+                raise RuntimeError(error)
+            return batch.frames.get(symbol, pd.DataFrame())
+
+        return self._cached(symbol, period, interval, start, fetch)
+
+    def fetch_many(self, symbols: Iterable[str], period: Optional[str] = None,
+                   interval: str = "1d", start: Optional[str] = None) -> BatchResult:
+        symbols = list(dict.fromkeys(s.upper() for s in symbols))
+        if self.cache is None:
+            return self._fetch_batch(symbols, period, interval, start)
+
+        cached: dict[str, pd.DataFrame] = {}
+        for sym in symbols:
+            df = self.cache.get("history", self._request(sym, period, interval, start))
+            if df is not response_cache.MISS:
+                cached[sym] = df
+        result = self._fetch_batch([s for s in symbols if s not in cached],
+                                   period, interval, start)
+        for sym, df in result.frames.items():
+            self.cache.put("history", self._request(sym, period, interval, start), df)
+        result.frames.update(cached)
+        return result
+
+    def _fetch_batch(self, symbols: list[str], period: Optional[str], interval: str,
+                     start: Optional[str]) -> BatchResult:
+        result = BatchResult()
+        if not symbols:
+            return result
+
+        chunks = chunked(symbols, self.chunk_size)
+
+        def run(chunk: list[str]) -> tuple[list[str], dict[str, pd.DataFrame], Optional[str]]:
+            try:
+                return chunk, self._fetch_chunk(chunk, period, interval, start), None
+            except Exception as e:
+                return chunk, {}, str(e)
+
+        if self.parallel_chunks and len(chunks) > 1:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(chunks))) as ex:
+                outcomes = list(ex.map(run, chunks))
+        else:
+            outcomes = [run(c) for c in chunks]
+
+        for chunk, frames, error in outcomes:
+            for sym in chunk:
+                if sym in frames and not frames[sym].empty:
+                    result.frames[sym] = frames[sym]
+                else:
+                    result.errors[sym] = error or NO_DATA
+        return result
+
+
+class YFinanceProvider(DataProvider):
+    """
+    Yahoo Finance via one multi-symbol yf.download per chunk.
+    yf.download keeps module-level state, so chunks run one after another
+    and the bounded concurrency is yfinance's own per-symbol thread pool.
+    """
+
+    name = "yfinance"
+    parallel_chunks = False
+    remote = True
+
+    def _fetch_chunk(self, symbols, period, interval, start):
+        import yfinance as yf
+
+        window = {"start": start} if start else {"period": period}
+        with metrics.request(self.source, len(symbols)):
+            df = yf.download(symbols, interval=interval, group_by="ticker",
+                             threads=min(self.max_workers, len(symbols)),
+                             progress=False, **window)
+        return split_multi_symbol(df, symbols)
+
+    def _fetch_symbol(self, symbol, period, interval, start):
+        # Ticker.history keeps no module-level state, so calls may overlap
+        import yfinance as yf
+
+        window = {"start": start} if start else {"period": period}
+        try:
+            with metrics.request(self.source):
+                df = yf.Ticker(symbol).history(interval=interval, **window)
+        except Exception as e:
+            if type(e).__name__ == "YFRateLimitError" or "Too Many Requests" in str(e):
+                raise Throttled(str(e)) from e
+            raise
+        return df.drop(columns=["Dividends", "Stock Splits", "Capital Gains"], errors="ignore")
+
+
+class FileProvider(DataProvider):
+    """
+    Offline stand-in that serves bars from raw files under `root`
+    ({SYMBOL}.cols/.csv or {SYMBOL}_*.cols/.csv). `latency` seconds are
+    slept once per chunk to model a network round trip. Bars are returned
+    as stored; `interval` is not resampled.
+    """
+
+    name = "file"
+
+    def __init__(self, root: str, latency: float = 0.0, **kwargs):
+        super().__init__(**kwargs)
+        self.root = root
+        self.latency = latency
+
+    def _find(self, symbol: str) -> Optional[str]:
+        exact = raw_store.resolve_path(os.path.join(self.root, symbol))
+        if exact:
+            return exact
+        for path in raw_store.iter_raw_paths(self.root):
+            if os.path.basename(path).upper().startswith(f"{symbol}_"):
+                return path
+        return None
+
+    def _fetch_chunk(self, symbols, period, interval, start):
+        if self.latency:
+            time.sleep(self.latency)
+
+        out: dict[str, pd.DataFrame] = {}
+        for sym in symbols:
+            path = self._find(sym)
+            if path is None:
+                continue
+            df = raw_store.read_raw(path)
+            if start:
+                df = df[df.index >= pd.Timestamp(start)]
+            elif len(df):
+                cutoff = period_start(df.index[-1], period)
+                if cutoff is not None:
+                    df = df[df.index >= cutoff]
+            out[sym] = df
+        return out
+
+
+class HttpProvider(DataProvider):
+    """
+    Bars from an HTTP server: GET {base_url}/history/{SYMBOL}?period=&interval=&start=
+    returning CSV (Date index + OHLCV columns). 404 means no data; 429 raises
+    Throttled with the server's Retry-After.
+    """
+
+    name = "http"
+    remote = True
+
+    def __init__(self, base_url: str, timeout: Optional[float] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout or config.INGEST_TIMEOUT
+
+    @property
+    def source(self) -> str:
+        return self.base_url
+
+    def _fetch_symbol(self, symbol, period, interval, start):
+        query = {k: v for k, v in (("period", period), ("interval", interval),
+                                   ("start", start)) if v}
+        url = (f"{self.base_url}/history/{urllib.parse.quote(symbol)}"
+               f"?{urllib.parse.urlencode(query)}")
+        with metrics.request(self.source) as info:
+            try:
+                with urllib.request.urlopen(url, timeout=self.timeout) as resp:
+                    body = resp.read()
+            except urllib.error.HTTPError as e:
+                if e.code == 404:
+                    return pd.DataFrame()
+                if e.code == 429:
+                    retry_after = e.headers.get("Retry-After")
+                    raise Throttled(f"HTTP 429 from {self.base_url}",
+                                    float(retry_after) if retry_after else None) from e
+                raise RuntimeError(f"HTTP {e.code} for {symbol}") from e
+            info["bytes"] = len(body)
+        if not body.strip():
+            return pd.DataFrame()
+        return raw_store.normalize_frame(pd.read_csv(io.BytesIO(body), index_col=0))
+
+    def _fetch_chunk(self, symbols, period, interval, start):
+        out: dict[str, pd.DataFrame] = {}
+        for sym in symbols:
+            df = self._fetch_symbol(sym, period, interval, start)
+            if not df.empty:
+                out[sym] = df
+        return out
+
+
+# -----------------------------
+# Factory
+# -----------------------------
+def get_provider(spec: Optional[str] = None, **kwargs) -> DataProvider:
+    """
+    spec: "yfinance", "file:<dir>" or "http(s)://host:port". Defaults to
+    $FINANCE_VIBE_PROVIDER, then config.DATA_PROVIDER.
+    """
+    spec = spec or os.environ.get("FINANCE_VIBE_PROVIDER") or config.DATA_PROVIDER
+    if spec == "yfinance":
+        return YFinanceProvider(**kwargs)
+    if spec.startswith("file:"):
+        return FileProvider(spec[len("file:"):], **kwargs)
+    if spec.startswith(("http://", "https://")):
+        return HttpProvider(spec, **kwargs)
+    raise ValueError(f"unknown data provider: {spec}")
@@ -0,0 +1,510 @@
+"""
+Columnar raw store.
+
+Each ticker is saved as a directory of NumPy column files
+(e.g. data/raw/NVDA_5y_1wk.cols/):
+
+    Date.npy    datetime64[ns]
+    Close.npy   float64 (one file per column)
+    _meta.json  column -> file mapping
+
+NVDA_5y_1wk.cols is a symlink to the current version of that directory
+(NVDA_5y_1wk.cols.v-<id>); a rewrite publishes a new version by replacing
+the link in one rename, so readers see the old bars or the new ones.
+
+Readers memory-map the columns, so loading a ticker is a handful of
+`np.load(mmap_mode="r")` calls with no text parsing. Legacy CSV files are
+still readable, which keeps old data/raw folders working until migrated:
+
+    python src/finance_vibe/raw_store.py migrate
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import glob
+import functools
+import importlib.util
+import json
+import os
+import re
+import shutil
+import uuid
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+import config
+
+
+STORE_SUFFIX = config.RAW_EXTENSIONS["cols"]
+VERSION_TAG = ".v-"   # <store>.v-<id>: a version the store link points to
+OLD_TAG = ".old-"     # <store>.old-<id>: a plain store directory set aside during a swap
+CSV_SUFFIX = config.RAW_EXTENSIONS["csv"]
+META_FILE = "_meta.json"
+INDEX_FILE = "Date.npy"
+FORMAT_VERSION = 1
+
+
+# -----------------------------
+# Path helpers
+# -----------------------------
+def is_store(path: str) -> bool:
+    return path.rstrip(os.sep).endswith(STORE_SUFFIX)
+
+
+def strip_suffix(path: str) -> str:
+    path = path.rstrip(os.sep)
+    for suffix in (STORE_SUFFIX, CSV_SUFFIX):
+        if path.endswith(suffix):
+            return path[: -len(suffix)]
+    return path
+
+
+def path_for(stem_path: str, fmt: Optional[str] = None) -> str:
+    """data/raw/AAPL -> data/raw/AAPL.cols (or .csv, per config.RAW_FORMAT)."""
+    return strip_suffix(stem_path) + config.raw_extension(fmt)
+
+
+def resolve_path(path: str) -> Optional[str]:
+    """
+    Returns the existing file for `path`, whatever its format.
+    The columnar store wins when both a store and a CSV exist.
+    """
+    stem = strip_suffix(path)
+    for candidate in (stem + STORE_SUFFIX, stem + CSV_SUFFIX):
+        if os.path.exists(candidate):
+            return candidate
+    if _recover(stem + STORE_SUFFIX):
+        return stem + STORE_SUFFIX
+    return None
+
+
+def _recover(path: str) -> bool:
+    """
+    Puts back a plain store directory left set aside (<path>.old-<id>) by a
+    swap that never finished; True when `path` exists afterwards.
+    """
+    for old in sorted(glob.glob(glob.escape(path) + OLD_TAG + "*"), reverse=True):
+        try:
+            os.replace(old, path)
+        except OSError:  # a writer published a new version meanwhile
+            pass
+        if os.path.exists(path):
+            return True
+    return False
+
+
+def iter_raw_paths(raw_dir: Optional[str] = None) -> list[str]:
+    """All readable raw files in raw_dir, one per stem, sorted by name."""
+    raw_dir = raw_dir or config.RAW_DIR
+    if not os.path.isdir(raw_dir):
+        raise FileNotFoundError(f"RAW_DIR does not exist: {raw_dir}")
+
+    by_stem: dict[str, str] = {}
+    for name in sorted(os.listdir(raw_dir)):
+        path = os.path.join(raw_dir, name)
+        lower = name.lower()
+        if lower.endswith(STORE_SUFFIX) and os.path.isdir(path):
+            by_stem[strip_suffix(path)] = path
+        elif lower.endswith(CSV_SUFFIX) and os.path.isfile(path):
+            by_stem.setdefault(strip_suffix(path), path)
+    return [by_stem[k] for k in sorted(by_stem)]
+
+
+# -----------------------------
+# Normalization
+# -----------------------------
+def normalize_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Typed OHLCV frame: naive DatetimeIndex named Date (ascending, unique)
+    and float64 columns. Rows whose index is not a date (e.g. the extra
+    'Ticker'/'Date' header rows of yfinance MultiIndex CSVs) are dropped.
+    """
+    columns = df.columns
+    if isinstance(columns, pd.MultiIndex):
+        columns = columns.get_level_values(0)
+
+    idx = df.index
+    if not isinstance(idx, pd.DatetimeIndex):
+        idx = pd.to_datetime(pd.Index(idx).astype(str).str.slice(0, 19),
+                             errors="coerce")
+    if idx.tz is not None:
+        idx = idx.tz_localize(None)
+    idx = pd.DatetimeIndex(idx.astype("datetime64[ns]"), name="Date")
+
+    data = {str(name).strip(): pd.to_numeric(df.iloc[:, i], errors="coerce")
+            .to_numpy(dtype=np.float64)
+            for i, name in enumerate(columns)}
+    out = pd.DataFrame(data, index=idx)
+    out = out[~out.index.isna()]
+
+    if not out.index.is_monotonic_increasing:
+        out = out.sort_index(kind="stable")
+    if out.index.has_duplicates:
+        out = out[~out.index.duplicated(keep="last")]
+    return out
+
+
+def _column_file(col: str, taken: set[str]) -> str:
+    base = re.sub(r"[^A-Za-z0-9]+", "_", col).strip("_") or "col"
+    name, i = f"{base}.npy", 1
+    while name in taken or name in (INDEX_FILE, META_FILE):
+        name, i = f"{base}_{i}.npy", i + 1
+    taken.add(name)
+    return name
+
+
+# -----------------------------
+# Writer
+# -----------------------------
+def _swap_dir(tmp: str, path: str) -> None:
+    """
+    Publishes the store written in `tmp` at `path`: tmp becomes a new
+    version and the `path` link is replaced in one rename. A plain store
+    directory (written before versions) is set aside for that rename; a
+    reader arriving in between puts it back (see _recover) and the swap
+    retries. The previous version is kept until the next rewrite. Without
+    symlink support the directories are swapped directly.
+    """
+    version = f"{path}{VERSION_TAG}{uuid.uuid4().hex[:8]}"
+    os.replace(tmp, version)
+    link = f"{path}.link-{uuid.uuid4().hex[:8]}"
+    try:
+        os.symlink(os.path.basename(version), link)
+    except (OSError, NotImplementedError):
+        old = f"{path}{OLD_TAG}{uuid.uuid4().hex[:8]}"
+        if os.path.exists(path):
+            os.replace(path, old)
+        os.replace(version, path)
+        shutil.rmtree(old, ignore_errors=True)
+        return
+
+    previous = os.path.realpath(path) if os.path.islink(path) else None
+    try:
+        for _ in range(3):
+            if os.path.isdir(path) and not os.path.islink(path):
+                old = f"{path}{OLD_TAG}{uuid.uuid4().hex[:8]}"
+                os.replace(path, old)
+            else:
+                old = None
+            try:
+                os.replace(link, path)
+            except OSError:
+                continue  # a reader restored the plain directory first
+            if old is not None:
+                shutil.rmtree(old, ignore_errors=True)
+            break
+        else:
+            raise OSError(f"could not publish {path}")
+    except BaseException:
+        shutil.rmtree(version, ignore_errors=True)
+        if os.path.lexists(link):
+            os.remove(link)
+        raise
+    # The version just replaced stays for readers that resolved it a moment
+    # ago; anything older goes
+    keep = {os.path.realpath(version), previous}
+    for stale in glob.glob(glob.escape(path) + VERSION_TAG + "*"):
+        if os.path.realpath(stale) not in keep:
+            shutil.rmtree(stale, ignore_errors=True)
+
+
+def write_raw(df: pd.DataFrame, path: str) -> str:
+    """
+    Saves a bar frame at `path`. Stores are written to a new version
+    directory and published by an atomic link swap (see _swap_dir), so
+    readers never see a half-written or missing ticker.
+    """
+    frame = normalize_frame(df)
+    parent = os.path.dirname(path) or "."
+    os.makedirs(parent, exist_ok=True)
+
+    if not is_store(path):
+        frame.to_csv(path)
+        return path
+
+    tmp = f"{path.rstrip(os.sep)}.tmp-{uuid.uuid4().hex[:8]}"
+    os.makedirs(tmp)
+    try:
+        np.save(os.path.join(tmp, INDEX_FILE),
+                frame.index.to_numpy(dtype="datetime64[ns]"))
+        files: dict[str, str] = {}
+        taken: set[str] = set()
+        for col in frame.columns:
+            fname = _column_file(col, taken)
+            np.save(os.path.join(tmp, fname),
+                    np.ascontiguousarray(frame[col].to_numpy(dtype=np.float64)))
+            files[col] = fname
+
+        meta = {"version": FORMAT_VERSION, "rows": int(len(frame)),
+                "columns": list(frame.columns), "files": files}
+        with open(os.path.join(tmp, META_FILE), "w") as f:
+            json.dump(meta, f)
+        _swap_dir(tmp, path.rstrip(os.sep))
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    return path
+
+
+# -----------------------------
+# CSV reader
+# -----------------------------
+SNIFF_BYTES = 4096
+MAX_HEADER_ROWS = 4  # column names + the 'Ticker'/'Date' rows of yfinance MultiIndex CSVs
+
+# Date shapes (digits masked as 9) parsed with an explicit format;
+# anything else is left to pandas' inference
+DATE_FORMATS = {
+    "9999-99-99": "%Y-%m-%d",
+    "9999-99-99 99:99:99": "%Y-%m-%d %H:%M:%S",
+    "9999-99-99T99:99:99": "%Y-%m-%dT%H:%M:%S",
+}
+
+
+def _norm_name(name: str) -> str:
+    return name.strip().lower().replace("_", "").replace(" ", "")
+
+
+@dataclass(frozen=True)
+class CsvSchema:
+    columns: tuple[str, ...]     # stripped names, first column = date index
+    skiprows: int                # header lines before the first bar
+    date_format: Optional[str]   # strptime format of the (<=19 char) date field
+    date_width: int              # length of the first date field
+
+    def find(self, candidates: Iterable[str]) -> Optional[str]:
+        """First column whose name matches a candidate, ignoring case, '_' and ' '."""
+        want = {_norm_name(c) for c in candidates}
+        return next((c for c in self.columns if _norm_name(c) in want), None)
+
+
+def _is_header_row(row: list[str]) -> bool:
+    """A 'Ticker,AAPL,AAPL' or 'Date,,' row: no date first, no numbers after."""
+    if not row:
+        return False
+    if not pd.isna(pd.to_datetime(row[0].strip() or None, errors="coerce")):
+        return False
+    for cell in row[1:]:
+        try:
+            float(cell)
+            return False
+        except ValueError:
+            pass
+    return True
+
+
+@functools.lru_cache(maxsize=256)
+def _schema_for(lines: tuple[str, ...]) -> CsvSchema:
+    rows = list(csv.reader(lines))
+    if not rows:
+        raise ValueError("empty csv")
+    columns = [c.strip() for c in rows[0]]
+
+    skip = 1
+    while skip < min(len(rows), MAX_HEADER_ROWS) and _is_header_row(rows[skip]):
+        skip += 1
+    if skip > 1 and rows[skip - 1][0].strip():
+        columns[0] = rows[skip - 1][0].strip()  # the index name row ('Date,,,')
+
+    first = rows[skip][0].strip() if len(rows) > skip and rows[skip] else ""
+    shape = re.sub(r"\d", "9", first[:19])
+    return CsvSchema(tuple(columns), skip, DATE_FORMATS.get(shape), len(first))
+
+
+def sniff_csv(path: str) -> CsvSchema:
+    """
+    Schema of a raw CSV from its first lines. Files written by the same
+    code share their header, so the parsed schema is cached per header.
+    """
+    with open(path, newline="") as f:
+        head = f.read(SNIFF_BYTES)
+    lines = head.splitlines(keepends=True)
+    if len(lines) > 1 and not head.endswith(("\n", "\r")):
+        lines = lines[:-1]  # drop a partial last line
+    return _schema_for(tuple(lines[:MAX_HEADER_ROWS + 1]))
+
+
+def _csv_engine() -> str:
+    if config.CSV_ENGINE != "auto":
+        return config.CSV_ENGINE
+    return "pyarrow" if importlib.util.find_spec("pyarrow") else "c"
+
+
+def _read_typed(path: str, schema: CsvSchema, positions: list[int]) -> pd.DataFrame:
+    """Date column as text, the others as float64; columns labelled by position."""
+    if _csv_engine() == "pyarrow":
+        import pyarrow as pa
+        from pyarrow import csv as pa_csv
+
+        names = [f"f{p}" for p in positions]  # pyarrow's generated names
+        types = {n: pa.float64() for n in names[1:]} | {names[0]: pa.string()}
+        table = pa_csv.read_csv(
+            path,
+            read_options=pa_csv.ReadOptions(skip_rows=schema.skiprows,
+                                            autogenerate_column_names=True),
+            convert_options=pa_csv.ConvertOptions(include_columns=names, column_types=types))
+        df = table.to_pandas()
+        df.columns = positions
+        return df
+
+    dtype = {p: "float64" for p in positions[1:]} | {positions[0]: str}
+    return pd.read_csv(path, header=None, skiprows=schema.skiprows, usecols=positions,
+                       dtype=dtype)
+
+
+def _parse_dates(raw: pd.Series, schema: CsvSchema) -> np.ndarray:
+    text = raw.astype(str)
+    if schema.date_width > 19:
+        text = text.str.slice(0, 19)  # drop UTC offsets / fractions: wall-clock time
+    return pd.to_datetime(text, format=schema.date_format, errors="coerce").to_numpy(
+        dtype="datetime64[ns]")
+
+
+def read_csv_columns(path: str, columns: Optional[Iterable[str]] = None,
+                     date_col: Optional[str] = None, schema: Optional[CsvSchema] = None
+                     ) -> tuple[np.ndarray, dict[str, np.ndarray]]:
+    """
+    Returns (dates, {column: float64 values}) from a raw CSV, like
+    read_columns does for a store. Only the requested columns are parsed,
+    with explicit dtypes; rows without a valid date are dropped and rows
+    are sorted by date (stable) unless the file already is.
+    """
+    schema = schema or sniff_csv(path)
+    date_pos = schema.columns.index(date_col) if date_col else 0
+    wanted = [c for c in (schema.columns if columns is None else columns)
+              if c in schema.columns and c != schema.columns[date_pos]]
+    positions = [date_pos] + [schema.columns.index(c) for c in wanted]
+
+    try:
+        df = _read_typed(path, schema, positions)
+    except ValueError:
+        # Non-numeric cells ('-', 'n/a '): read as text and coerce them to NaN
+        df = pd.read_csv(path, header=None, skiprows=schema.skiprows, usecols=positions,
+                         dtype=str)
+        for p in positions[1:]:
+            df[p] = pd.to_numeric(df[p], errors="coerce")
+
+    dates = _parse_dates(df[date_pos], schema)
+    data = {c: df[p].to_numpy(dtype=np.float64) for c, p in zip(wanted, positions[1:])}
+
+    keep = ~np.isnat(dates)
+    if not keep.all():
+        dates = dates[keep]
+        data = {c: v[keep] for c, v in data.items()}
+    if dates.size > 1 and (np.diff(dates) < np.timedelta64(0)).any():
+        order = np.argsort(dates, kind="stable")
+        dates = dates[order]
+        data = {c: v[order] for c, v in data.items()}
+    return dates, data
+
+
+# -----------------------------
+# Readers
+# -----------------------------
+def read_meta(path: str) -> dict:
+    with open(os.path.join(path, META_FILE)) as f:
+        return json.load(f)
+
+
+def read_columns(path: str, columns: Optional[Iterable[str]] = None,
+                 mmap: bool = True) -> tuple[np.ndarray, dict[str, np.ndarray]]:
+    """
+    Returns (dates, {column: values}) straight from a store.
+    With mmap=True the arrays are read-only views of the files on disk.
+    """
+    mode = "r" if mmap else None
+    while True:
+        # One version throughout, even if a rewrite swaps the link meanwhile;
+        # a version pruned under us (two rewrites since) means resolve again
+        version = os.path.realpath(path)
+        try:
+            meta = read_meta(version)
+            dates = np.load(os.path.join(version, INDEX_FILE), mmap_mode=mode)
+            wanted = meta["columns"] if columns is None else [
+                c for c in columns if c in meta["files"]]
+            data = {c: np.load(os.path.join(version, meta["files"][c]), mmap_mode=mode)
+                    for c in wanted}
+            return dates, data
+        except FileNotFoundError:
+            if version == os.path.realpath(path):
+                raise
+
+
+def read_raw(path: str, columns: Optional[Iterable[str]] = None) -> pd.DataFrame:
+    """
+    Loads a raw file (store or CSV) as a frame indexed by Date.
+    Store columns are wrapped without copying.
+    """
+    if is_store(path):
+        dates, data = read_columns(path, columns)
+        index = pd.DatetimeIndex(dates, name="Date")
+        return pd.DataFrame(data, index=index, copy=False)
+
+    dates, data = read_csv_columns(path, columns)
+    index = pd.DatetimeIndex(dates, name="Date")
+    df = pd.DataFrame(data, index=index, copy=False)
+    if index.has_duplicates:
+        df = df[~index.duplicated(keep="last")]
+    return df
+
+
+def last_date(path: str) -> Optional[pd.Timestamp]:
+    """Date of the newest stored bar, or None for a missing/empty file."""
+    found = resolve_path(path)
+    if found is None:
+        return None
+    if is_store(found):
+        dates, _ = read_columns(found, ())
+        return pd.Timestamp(dates[-1]) if dates.size else None
+    df = read_raw(found)
+    return df.index[-1] if len(df) else None
+
+
+# -----------------------------
+# Migration
+# -----------------------------
+def migrate_csvs(raw_dir: Optional[str] = None, delete_csv: bool = False) -> int:
+    """Converts every CSV in raw_dir into a store next to it."""
+    raw_dir = raw_dir or config.RAW_DIR
+    if not os.path.isdir(raw_dir):
+        print(f"❌ Could not find {raw_dir}.")
+        return 0
+
+    converted = 0
+    for name in sorted(os.listdir(raw_dir)):
+        if not name.lower().endswith(CSV_SUFFIX):
+            continue
+        csv_path = os.path.join(raw_dir, name)
+        store_path = strip_suffix(csv_path) + STORE_SUFFIX
+        try:
+            df = read_raw(csv_path)
+            if df.empty:
+                print(f"⚠️ {name}: empty, skipped.")
+                continue
+            write_raw(df, store_path)
+            converted += 1
+            if delete_csv:
+                os.remove(csv_path)
+            print(f"✅ {name} -> {os.path.basename(store_path)} ({len(df)} rows)")
+        except Exception as e:
+            print(f"❌ {name}: {e}")
+
+    print(f"\nMigrated {converted} file(s) in {raw_dir}")
+    return converted
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Columnar raw store tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+    mig = sub.add_parser("migrate", help="Convert data/raw/*.csv into column stores")
+    mig.add_argument("--raw-dir", default=None)
+    mig.add_argument("--delete-csv", action="store_true",
+                     help="Remove each CSV once its store is written")
+
+    args = parser.parse_args()
+    if args.command == "migrate":
+        migrate_csvs(args.raw_dir, args.delete_csv)
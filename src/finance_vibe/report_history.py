@@ -0,0 +1,420 @@
+"""
+Partitioned history of the vibe reports.
+
+Every scan appends its report as one part, partitioned by engine and
+month of the report date:
+
+    data/history/reports/<engine>/<YYYY-MM>/
+        part-<written>-<id>.cols/   one report (append-only)
+        compact.cols/               earlier parts merged, sorted by Date, Ticker
+            000.npy, 001.npy, ...   one NumPy file per column (Date, Ticker, ...)
+            _meta.json              column -> file mapping, rows, first/last date
+
+Queries only open the months that overlap the requested range, read the
+Ticker column first and load the other columns for the matching rows.
+Appending a report for a day that is already stored replaces that day:
+its rows are dropped from the month's other parts (tickers missing from
+the new report disappear too). Should that be interrupted, a (Date, Ticker)
+still keeps its newest value. `compact` merges a month's parts into
+compact.cols; appends do it once a month holds REPORT_HISTORY_MAX_PARTS.
+
+    python src/finance_vibe/report_history.py import        # existing CSV reports
+    python src/finance_vibe/report_history.py history NVDA --days 180
+    python src/finance_vibe/report_history.py transitions NVDA AMD --start 2025-01-01
+    python src/finance_vibe/report_history.py top -n 20 --start 2025-06-01 --end 2025-06-30
+    python src/finance_vibe/report_history.py compact
+    python src/finance_vibe/report_history.py stats
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import shutil
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+import config
+
+
+ENGINES = ("vibe", "local")
+STORE_SUFFIX = ".cols"
+COMPACT = "compact" + STORE_SUFFIX
+META_FILE = "_meta.json"
+FORMAT_VERSION = 1
+KEY = ["Date", "Ticker"]
+_MONTH = re.compile(r"^\d{4}-\d{2}$")
+# report file name (see analysis_engine.report_path / analysis_engine_local.report_path)
+_REPORT_FILE = re.compile(r"^vibe_report_(?:(local)_)?(\d{4}-\d{2}-\d{2})\.csv$")
+
+
+# -----------------------------
+# Paths
+# -----------------------------
+def _check_engine(engine: str) -> str:
+    if engine not in ENGINES:
+        raise ValueError(f"unknown engine: {engine} (expected one of {ENGINES})")
+    return engine
+
+
+def engine_dir(engine: str, root: Optional[str] = None) -> str:
+    return os.path.join(root or config.REPORT_HISTORY_DIR, _check_engine(engine))
+
+
+def months(engine: str, root: Optional[str] = None) -> list[str]:
+    """Month partitions (YYYY-MM) holding reports of `engine`, oldest first."""
+    base = engine_dir(engine, root)
+    if not os.path.isdir(base):
+        return []
+    return sorted(n for n in os.listdir(base)
+                  if _MONTH.match(n) and os.path.isdir(os.path.join(base, n)))
+
+
+def _parts(month_dir: str) -> list[str]:
+    """compact.cols first, then parts in the order they were written."""
+    if not os.path.isdir(month_dir):
+        return []
+    names = sorted(n for n in os.listdir(month_dir)
+                   if n.startswith("part-") and n.endswith(STORE_SUFFIX))
+    if os.path.isdir(os.path.join(month_dir, COMPACT)):
+        names.insert(0, COMPACT)
+    return [os.path.join(month_dir, n) for n in names]
+
+
+# -----------------------------
+# Column parts
+# -----------------------------
+def _column_array(s: pd.Series) -> np.ndarray:
+    if s.name == "Date":
+        return s.to_numpy(dtype="datetime64[ns]")
+    if pd.api.types.is_bool_dtype(s) or pd.api.types.is_integer_dtype(s):
+        return s.to_numpy()
+    if pd.api.types.is_numeric_dtype(s):
+        return s.to_numpy(dtype=np.float64)
+    return s.fillna("").astype(str).to_numpy(dtype=str)  # fixed-width unicode
+
+
+def _write_part(frame: pd.DataFrame, path: str) -> str:
+    """Writes `frame` as a column directory; readers never see a partial one."""
+    tmp = f"{path}.tmp-{uuid.uuid4().hex[:8]}"
+    os.makedirs(tmp)
+    try:
+        files: dict[str, str] = {}
+        for i, col in enumerate(frame.columns):
+            files[col] = f"{i:03d}.npy"
+            np.save(os.path.join(tmp, files[col]), np.ascontiguousarray(_column_array(frame[col])))
+        dates = frame["Date"].to_numpy(dtype="datetime64[ns]")
+        meta = {"version": FORMAT_VERSION, "rows": int(len(frame)),
+                "columns": list(frame.columns), "files": files,
+                "first": str(dates.min()) if len(dates) else None,
+                "last": str(dates.max()) if len(dates) else None}
+        with open(os.path.join(tmp, META_FILE), "w") as f:
+            json.dump(meta, f)
+        if os.path.exists(path):
+            old = f"{path}.old-{uuid.uuid4().hex[:8]}"
+            os.replace(path, old)
+            os.replace(tmp, path)
+            shutil.rmtree(old, ignore_errors=True)
+        else:
+            os.replace(tmp, path)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    return path
+
+
+def _read_meta(path: str) -> dict:
+    with open(os.path.join(path, META_FILE)) as f:
+        return json.load(f)
+
+
+def _read_part(path: str, start: Optional[np.datetime64], end: Optional[np.datetime64],
+               tickers: Optional[np.ndarray], columns: Optional[list[str]]) -> pd.DataFrame:
+    """Rows of one part inside [start, end] (and `tickers`), only `columns`."""
+    meta = _read_meta(path)
+    if meta["rows"] == 0 or (start is not None and np.datetime64(meta["last"]) < start) \
+            or (end is not None and np.datetime64(meta["first"]) > end):
+        return pd.DataFrame()
+
+    def load(col: str) -> np.ndarray:
+        return np.load(os.path.join(path, meta["files"][col]), mmap_mode="r")
+
+    dates = load("Date")
+    keep = np.ones(len(dates), dtype=bool)
+    if start is not None:
+        keep &= dates >= start
+    if end is not None:
+        keep &= dates <= end
+    if tickers is not None:
+        keep &= np.isin(load("Ticker"), tickers)
+    rows = np.flatnonzero(keep)
+    if not len(rows):
+        return pd.DataFrame()
+
+    wanted = meta["columns"] if columns is None else [
+        c for c in dict.fromkeys(KEY + columns) if c in meta["files"]]
+    data = {}
+    for col in wanted:
+        values = load(col)[rows]
+        data[col] = values.astype(object) if values.dtype.kind == "U" else values
+    return pd.DataFrame(data)
+
+
+def _dedupe(frame: pd.DataFrame) -> pd.DataFrame:
+    """Newest row per (Date, Ticker) (later rows win), sorted by Date, Ticker."""
+    frame = frame[~frame.duplicated(KEY, keep="last")]
+    return frame.sort_values(KEY, kind="stable").reset_index(drop=True)
+
+
+# -----------------------------
+# Writing
+# -----------------------------
+def _drop_day(month_dir: str, when: np.datetime64, keep: str) -> None:
+    """Removes the rows dated `when` from every part of the month but `keep`."""
+    for p in _parts(month_dir):
+        if p == keep:
+            continue
+        meta = _read_meta(p)
+        if meta["rows"] == 0 or not (np.datetime64(meta["first"]) <= when
+                                     <= np.datetime64(meta["last"])):
+            continue
+        frame = _read_part(p, None, None, None, None)
+        rest = frame[frame["Date"].to_numpy() != when].reset_index(drop=True)
+        if rest.empty:
+            shutil.rmtree(p, ignore_errors=True)
+        elif len(rest) < len(frame):
+            _write_part(rest, p)
+
+
+def append(report: pd.DataFrame, engine: str, day: Optional[str] = None,
+           root: Optional[str] = None, replace: bool = True) -> Optional[str]:
+    """
+    Adds one report (one row per ticker, as the engines save it) dated
+    `day` (default: today). With replace=True the rows already stored for
+    that day are dropped; replace=False adds to them (a report appended in
+    chunks). Returns the part written, or None for an empty report.
+    """
+    if report is None or report.empty:
+        return None
+    when = pd.Timestamp(day or datetime.now().strftime("%Y-%m-%d")).normalize()
+    frame = report.reset_index(drop=True).drop(columns=["Date"], errors="ignore")
+    frame.insert(0, "Date", np.full(len(frame), when.to_datetime64(), dtype="datetime64[ns]"))
+
+    month_dir = config.ensure_dir(os.path.join(engine_dir(engine, root), when.strftime("%Y-%m")))
+    stamp = datetime.now().strftime("%Y%m%dT%H%M%S%f")
+    path = _write_part(frame, os.path.join(month_dir, f"part-{stamp}-{uuid.uuid4().hex[:6]}"
+                                                      f"{STORE_SUFFIX}"))
+    if replace:
+        # After the new part is in place, so a crash never loses the day
+        _drop_day(month_dir, when.to_datetime64(), keep=path)
+    if len(_parts(month_dir)) > config.REPORT_HISTORY_MAX_PARTS:
+        compact_month(month_dir)
+    return path
+
+
+def record(report: pd.DataFrame, engine: str, replace: bool = True) -> None:
+    """append() for the engines: a no-op when disabled, never fails the scan."""
+    if not config.REPORT_HISTORY:
+        return
+    try:
+        append(report, engine, replace=replace)
+    except Exception as e:  # the report itself is already saved
+        print(f"⚠️ Report history not updated: {e}")
+
+
+def compact_month(month_dir: str) -> int:
+    """Merges a month's parts into compact.cols; returns the parts merged."""
+    paths = _parts(month_dir)
+    parts = [p for p in paths if os.path.basename(p) != COMPACT]
+    if not parts:
+        return 0
+    frames = [_read_part(p, None, None, None, None) for p in paths]
+    merged = _dedupe(pd.concat([f for f in frames if not f.empty], ignore_index=True))
+    _write_part(merged, os.path.join(month_dir, COMPACT))
+    # A crash before this point leaves parts whose rows are also in
+    # compact.cols; they are the newest copies, so queries are unchanged
+    for p in parts:
+        shutil.rmtree(p, ignore_errors=True)
+    return len(parts)
+
+
+def compact(engine: Optional[str] = None, root: Optional[str] = None) -> int:
+    """compact_month for every month of `engine` (default: all engines)."""
+    merged = 0
+    for eng in [engine] if engine else ENGINES:
+        for month in months(eng, root):
+            merged += compact_month(os.path.join(engine_dir(eng, root), month))
+    return merged
+
+
+def import_reports(logs_dir: Optional[str] = None, root: Optional[str] = None) -> int:
+    """Appends every dated report CSV in logs_dir, oldest first; returns how many."""
+    logs_dir = logs_dir or config.LOGS_DIR
+    if not os.path.isdir(logs_dir):
+        return 0
+    found = []
+    for name in os.listdir(logs_dir):
+        m = _REPORT_FILE.match(name)
+        if m:
+            found.append((m.group(2), "local" if m.group(1) else "vibe", name))
+    for day, engine, name in sorted(found):
+        append(pd.read_csv(os.path.join(logs_dir, name)), engine, day=day, root=root)
+    compact(root=root)
+    return len(found)
+
+
+# -----------------------------
+# Queries
+# -----------------------------
+def _as_date(value) -> Optional[np.datetime64]:
+    return None if value is None else pd.Timestamp(value).normalize().to_datetime64()
+
+
+def query(engine: str = "local", start=None, end=None, tickers: Optional[Iterable[str]] = None,
+          columns: Optional[list[str]] = None, root: Optional[str] = None) -> pd.DataFrame:
+    """
+    Report rows of `engine` dated within [start, end] (inclusive, either
+    open), optionally only `tickers` and `columns` (Date and Ticker are
+    always included). Sorted by Date, Ticker.
+    """
+    lo, hi = _as_date(start), _as_date(end)
+    wanted = None if tickers is None else np.array([t.upper() for t in tickers], dtype=str)
+    lo_month = None if lo is None else pd.Timestamp(lo).strftime("%Y-%m")
+    hi_month = None if hi is None else pd.Timestamp(hi).strftime("%Y-%m")
+
+    frames = []
+    for month in months(engine, root):
+        if (lo_month and month < lo_month) or (hi_month and month > hi_month):
+            continue
+        for p in _parts(os.path.join(engine_dir(engine, root), month)):
+            f = _read_part(p, lo, hi, wanted, columns)
+            if not f.empty:
+                frames.append(f)
+    if not frames:
+        return pd.DataFrame(columns=KEY + (columns or []))
+    return _dedupe(pd.concat(frames, ignore_index=True))
+
+
+def ticker_history(ticker: str, engine: str = "local", start=None, end=None,
+                   root: Optional[str] = None) -> pd.DataFrame:
+    """Every saved report row of one ticker, oldest first."""
+    return query(engine, start, end, [ticker], root=root)
+
+
+def transitions(engine: str = "local", start=None, end=None,
+                tickers: Optional[Iterable[str]] = None, on: str = "Action",
+                root: Optional[str] = None) -> pd.DataFrame:
+    """
+    Reports where a ticker's `on` column (Action or Sentiment) changed
+    from its previous report in the range: Ticker, Date, From/To score
+    and From/To value.
+    """
+    h = query(engine, start, end, tickers, columns=["Score", on], root=root)
+    out_cols = ["Ticker", "Date", "From Score", "To Score", f"From {on}", f"To {on}"]
+    if h.empty:
+        return pd.DataFrame(columns=out_cols)
+    h = h.sort_values(["Ticker", "Date"], kind="stable").reset_index(drop=True)
+    same_ticker = h["Ticker"].eq(h["Ticker"].shift())
+    rows = np.flatnonzero(same_ticker & h[on].ne(h[on].shift()))
+    prev, cur = h.iloc[rows - 1], h.iloc[rows]
+    return pd.DataFrame({"Ticker": cur["Ticker"].to_numpy(), "Date": cur["Date"].to_numpy(),
+                         "From Score": prev["Score"].to_numpy(), "To Score": cur["Score"].to_numpy(),
+                         f"From {on}": prev[on].to_numpy(), f"To {on}": cur[on].to_numpy()},
+                        columns=out_cols)
+
+
+def top(engine: str = "local", start=None, end=None, n: int = 20,
+        root: Optional[str] = None) -> pd.DataFrame:
+    """
+    Tickers ranked by mean score over the reports in [start, end], with
+    how many reports they appear in and their latest score and action.
+    With start == end this is that day's top N.
+    """
+    h = query(engine, start, end, columns=["Score", "Action"], root=root)
+    if h.empty:
+        return pd.DataFrame(columns=["Ticker", "Reports", "Mean Score", "Last Score", "Last Action"])
+    g = h.groupby("Ticker", sort=False)
+    out = pd.DataFrame({"Reports": g["Score"].size(), "Mean Score": g["Score"].mean(),
+                        "Last Score": g["Score"].last(), "Last Action": g["Action"].last()})
+    out = out.reset_index().sort_values(["Mean Score", "Ticker"], ascending=[False, True])
+    return out.head(n).reset_index(drop=True)
+
+
+def stats(root: Optional[str] = None) -> list[dict]:
+    """Per engine and month: parts, rows, report dates and size on disk."""
+    out = []
+    for engine in ENGINES:
+        for month in months(engine, root):
+            paths = _parts(os.path.join(engine_dir(engine, root), month))
+            rows, size, days = 0, 0, set()
+            for p in paths:
+                meta = _read_meta(p)
+                rows += meta["rows"]
+                dates = np.load(os.path.join(p, meta["files"]["Date"]), mmap_mode="r")
+                days.update(np.unique(dates).tolist())
+                size += sum(e.stat().st_size for e in os.scandir(p))
+            out.append({"engine": engine, "month": month, "parts": len(paths),
+                        "rows": rows, "reports": len(days), "mb": size / 2**20})
+    return out
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report history store and queries")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def add_range(p: argparse.ArgumentParser) -> None:
+        p.add_argument("--engine", choices=ENGINES, default="local")
+        p.add_argument("--start", default=None, help="First report date (YYYY-MM-DD)")
+        p.add_argument("--end", default=None, help="Last report date (YYYY-MM-DD)")
+        p.add_argument("--days", type=int, default=None, help="Only the last N days")
+
+    p = sub.add_parser("history", help="One ticker's saved reports")
+    p.add_argument("ticker")
+    add_range(p)
+    p = sub.add_parser("transitions", help="Action (or sentiment) changes")
+    p.add_argument("tickers", nargs="*")
+    p.add_argument("--on", choices=["Action", "Sentiment"], default="Action")
+    add_range(p)
+    p = sub.add_parser("top", help="Best mean score over a date range")
+    p.add_argument("-n", type=int, default=20)
+    add_range(p)
+    sub.add_parser("import", help=f"Append every dated report CSV in {config.LOGS_DIR}")
+    p = sub.add_parser("compact", help="Merge each month's parts")
+    p.add_argument("--engine", choices=ENGINES, default=None)
+    sub.add_parser("stats", help="Parts, rows and size per month")
+    args = parser.parse_args()
+
+    if getattr(args, "days", None):
+        args.start = (datetime.now() - timedelta(days=args.days)).strftime("%Y-%m-%d")
+
+    started = time.perf_counter()
+    if args.command == "import":
+        print(f"✅ Imported {import_reports()} report(s) into {config.REPORT_HISTORY_DIR}")
+    elif args.command == "compact":
+        print(f"🧹 Merged {compact(args.engine)} part(s)")
+    elif args.command == "stats":
+        rows = stats()
+        if rows:
+            print(pd.DataFrame(rows).to_markdown(index=False, floatfmt=".2f"))
+        else:
+            print(f"No report history under {config.REPORT_HISTORY_DIR}")
+    else:
+        if args.command == "history":
+            out = ticker_history(args.ticker, args.engine, args.start, args.end)
+        elif args.command == "transitions":
+            out = transitions(args.engine, args.start, args.end, args.tickers or None, args.on)
+        else:
+            out = top(args.engine, args.start, args.end, args.n)
+        if out.empty:
+            print("No matching reports.")
+        else:
+            if "Date" in out.columns:
+                out["Date"] = pd.to_datetime(out["Date"]).dt.strftime("%Y-%m-%d")
+            print(out.to_markdown(index=False, floatfmt=".2f"))
+        print(f"\n{len(out)} row(s) in {time.perf_counter() - started:.3f}s")
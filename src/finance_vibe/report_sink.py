@@ -0,0 +1,199 @@
+"""
+Streaming report output for large scans.
+
+A ReportSink takes report rows one at a time, as the scan produces them:
+
+- each row is appended to a spill file straight away, so nothing but the
+  current run of RUN_ROWS rows is held in memory;
+- a Leaderboard keeps the running top-N and bottom-N in two bounded heaps,
+  for a live view while the scan is still going;
+- close() sorts each spill run on its own and k-way merges the runs into
+  the final report (an external merge sort), then removes the spill files.
+
+Rows are ordered by Score descending, then Ticker, like the in-memory
+report. Values are written as pandas' to_csv writes them (NaN as empty).
+
+    with ReportSink(path, columns) as sink:
+        for row in rows:
+            sink.add(row)
+        sink.close()
+"""
+from __future__ import annotations
+
+import csv
+import heapq
+import math
+import os
+import shutil
+import uuid
+from typing import Any, Iterable, Optional
+
+import pandas as pd
+
+
+RUN_ROWS = 100_000  # rows per spill run (sorted in memory at close)
+
+
+def _cell(value: Any) -> str:
+    if isinstance(value, float) and math.isnan(value):
+        return ""
+    return str(value)
+
+
+class _Reversed:
+    """Inverts the order of a sort key (for a max-heap over tuples of str)."""
+    __slots__ = ("key",)
+
+    def __init__(self, key: tuple):
+        self.key = key
+
+    def __lt__(self, other: "_Reversed") -> bool:
+        return other.key < self.key
+
+
+# -----------------------------
+# Running top-N / bottom-N
+# -----------------------------
+class Leaderboard:
+    """
+    The n best and n worst rows seen so far by (-score, ticker), in
+    O(log n) per row. The head of each heap is the row that drops out
+    first when a better (or worse) one arrives.
+    """
+
+    def __init__(self, n: int, score: str = "Score", ticker: str = "Ticker"):
+        self.n = n
+        self.score, self.ticker = score, ticker
+        self.seen = 0
+        self._top: list = []      # worst of the best on top
+        self._bottom: list = []   # best of the worst on top
+        self._order = 0           # tie-breaker: rows never get compared
+
+    def rank(self, row: dict) -> tuple:
+        return (-row[self.score], row[self.ticker])
+
+    def push(self, row: dict) -> None:
+        self.seen += 1
+        if self.n <= 0:
+            return
+        key = self.rank(row)
+        self._order += 1
+        for heap, item in ((self._top, (_Reversed(key), self._order, row)),
+                           (self._bottom, (key, self._order, row))):
+            if len(heap) < self.n:
+                heapq.heappush(heap, item)
+            elif heap[0] < item:
+                heapq.heapreplace(heap, item)
+
+    def top(self) -> list[dict]:
+        """Best rows first."""
+        return [r for _, _, r in sorted(self._top, reverse=True)]
+
+    def bottom(self) -> list[dict]:
+        """In report order (the last row is the worst)."""
+        return [r for _, _, r in sorted(self._bottom)]
+
+    def summary(self, k: int = 5) -> str:
+        def fmt(rows: list[dict]) -> str:
+            return ", ".join(f"{r[self.ticker]} {r[self.score]:g}" for r in rows) or "-"
+        return (f"{self.seen} scored | top: {fmt(self.top()[:k])} | "
+                f"bottom: {fmt(self.bottom()[-k:][::-1])}")
+
+
+# -----------------------------
+# Sink
+# -----------------------------
+class ReportSink:
+    def __init__(self, path: str, columns: list[str], top_n: int = 50,
+                 run_rows: int = RUN_ROWS, score: str = "Score", ticker: str = "Ticker"):
+        self.path = path
+        self.columns = list(columns)
+        self.run_rows = run_rows
+        self.board = Leaderboard(top_n, score, ticker)
+        self.rows = 0
+        self._score = self.columns.index(score)
+        self._ticker = self.columns.index(ticker)
+        self._spill = f"{path}.runs-{uuid.uuid4().hex[:8]}"
+        self._runs: list[str] = []
+        self._file = None
+        self._writer = None
+        self._in_run = 0
+
+    def __enter__(self) -> "ReportSink":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is not None or self._spill is not None:
+            self.abort()
+
+    def _rotate(self) -> None:
+        if self._file is not None:
+            self._file.close()
+        if not self._runs:
+            os.makedirs(self._spill)
+        run = os.path.join(self._spill, f"run-{len(self._runs):05d}.csv")
+        self._runs.append(run)
+        self._file = open(run, "w", newline="")
+        self._writer = csv.writer(self._file, lineterminator="\n")
+        self._in_run = 0
+
+    def add(self, row: dict) -> None:
+        if self._file is None or self._in_run >= self.run_rows:
+            self._rotate()
+        self._writer.writerow([_cell(row[c]) for c in self.columns])
+        self._in_run += 1
+        self.rows += 1
+        self.board.push(row)
+
+    def add_many(self, rows: Iterable[dict]) -> None:
+        for row in rows:
+            self.add(row)
+
+    def _key(self, cells: list[str]) -> tuple:
+        return (-float(cells[self._score]), cells[self._ticker])
+
+    def _sort_run(self, run: str) -> None:
+        with open(run, newline="") as f:
+            rows = sorted(csv.reader(f), key=self._key)
+        with open(run, "w", newline="") as f:
+            csv.writer(f, lineterminator="\n").writerows(rows)
+
+    def close(self) -> str:
+        """Writes the sorted report at self.path and drops the spill files."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        # One run in memory at a time, then a streaming k-way merge
+        for run in self._runs:
+            self._sort_run(run)
+        tmp = f"{self.path}.tmp-{uuid.uuid4().hex[:8]}"
+        readers = [open(run, newline="") for run in self._runs]
+        try:
+            with open(tmp, "w", newline="") as out:
+                writer = csv.writer(out, lineterminator="\n")
+                writer.writerow(self.columns)
+                writer.writerows(heapq.merge(*(csv.reader(f) for f in readers), key=self._key))
+            os.replace(tmp, self.path)
+        finally:
+            for f in readers:
+                f.close()
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            self.abort()
+        return self.path
+
+    def abort(self) -> None:
+        """Drops the spill files without writing a report."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self._spill is not None:
+            shutil.rmtree(self._spill, ignore_errors=True)
+            self._spill = None
+
+    def top_frame(self, n: Optional[int] = None) -> pd.DataFrame:
+        return pd.DataFrame(self.board.top()[:n], columns=self.columns)
+
+    def bottom_frame(self, n: Optional[int] = None) -> pd.DataFrame:
+        rows = self.board.bottom()
+        return pd.DataFrame(rows[-n:] if n else rows, columns=self.columns)
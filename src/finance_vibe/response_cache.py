@@ -0,0 +1,346 @@
+"""
+Persistent cache for upstream responses (screeners, search, bar history).
+
+Entries are pickles under data/cache/responses/<endpoint>/<key>.pkl, where
+the key is a digest of the request. Each endpoint has its own lifetime
+(config.RESPONSE_TTL):
+
+    - a number of seconds (screener and search results: minutes);
+    - "close": until the bar being requested can next change, i.e. the
+      next market close for daily bars, the next Friday close for weekly
+      bars, the month's last weekday close for monthly bars and one bar
+      length for intraday intervals.
+
+Concurrent identical requests are coalesced: the first caller fetches,
+the others wait for its result instead of sending the same request.
+Failures and empty results are not stored.
+
+    data = response_cache.cached("screener", {"ids": ids, "count": 50},
+                                 lambda: Screener().get_screeners(ids, count=50))
+
+    python src/finance_vibe/response_cache.py stats
+    python src/finance_vibe/response_cache.py purge    # drop expired entries
+    python src/finance_vibe/response_cache.py clear
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import re
+import shutil
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Optional
+from zoneinfo import ZoneInfo
+
+import config
+
+
+ENTRY_SUFFIX = ".pkl"
+MISS = object()
+_INTRADAY = re.compile(r"^(\d+)(m|h)$")
+_WEEKLY = ("1wk", "5d")
+_MONTHLY = ("1mo", "3mo")
+
+
+# -----------------------------
+# Lifetimes
+# -----------------------------
+def _is_close_day(d: date, interval: str) -> bool:
+    if d.weekday() >= 5:
+        return False
+    if interval in _WEEKLY:
+        return d.weekday() == 4
+    if interval in _MONTHLY:  # last weekday of the month
+        return (d + timedelta(days=3 if d.weekday() == 4 else 1)).month != d.month
+    return True
+
+
+def next_close(interval: str = "1d", now: Optional[float] = None) -> float:
+    """Epoch seconds of the next close of an `interval` bar after `now`."""
+    now = time.time() if now is None else now
+    intraday = _INTRADAY.match(interval)
+    if intraday:
+        n, unit = int(intraday.group(1)), intraday.group(2)
+        return now + n * (60 if unit == "m" else 3600)
+
+    tz = ZoneInfo(config.MARKET_TZ)
+    close = datetime.strptime(config.MARKET_CLOSE, "%H:%M").time()
+    current = datetime.fromtimestamp(now, tz)
+    day = current.date()
+    while True:
+        candidate = datetime.combine(day, close, tzinfo=tz)
+        if candidate > current and _is_close_day(day, interval):
+            return candidate.timestamp()
+        day += timedelta(days=1)
+
+
+def expires_at(endpoint: str, request: dict, now: Optional[float] = None) -> float:
+    now = time.time() if now is None else now
+    if endpoint not in config.RESPONSE_TTL:
+        raise ValueError(f"unknown endpoint: {endpoint} (expected one of {list(config.RESPONSE_TTL)})")
+    ttl = config.RESPONSE_TTL[endpoint]
+    if ttl == "close":
+        return next_close(request.get("interval") or "1d", now)
+    return now + float(ttl)
+
+
+def _worth_keeping(value: Any) -> bool:
+    """No None and no empty frames/lists/dicts (those may be transient)."""
+    if value is None:
+        return False
+    empty = getattr(value, "empty", None)
+    if isinstance(empty, bool):
+        return not empty
+    try:
+        return len(value) > 0
+    except TypeError:
+        return True
+
+
+def _digest(obj: Any) -> str:
+    payload = json.dumps(obj, sort_keys=True, default=str).encode()
+    return hashlib.sha1(payload).hexdigest()[:24]
+
+
+# -----------------------------
+# Cache
+# -----------------------------
+class _Call:
+    """One in-flight fetch that identical requests wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.payload: Optional[bytes] = None
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class ResponseCache:
+    def __init__(self, root: Optional[str] = None, enabled: Optional[bool] = None):
+        self.root = root or config.RESPONSE_CACHE_DIR
+        self.enabled = config.RESPONSE_CACHE if enabled is None else enabled
+        # key -> (expires, pickled value); values are unpickled per hit so
+        # callers may modify what they get back
+        self._memory: dict[str, tuple[float, bytes]] = {}
+        self._inflight: dict[str, _Call] = {}
+        self._lock = threading.Lock()
+        self.counts: dict[str, Counter] = defaultdict(Counter)
+
+    def _count(self, endpoint: str, what: str) -> None:
+        with self._lock:
+            self.counts[endpoint][what] += 1
+
+    def _entry(self, endpoint: str, key: str) -> str:
+        return os.path.join(self.root, endpoint, key + ENTRY_SUFFIX)
+
+    def _load(self, endpoint: str, key: str) -> Optional[tuple[float, bytes]]:
+        with self._lock:
+            found = self._memory.get(key)
+        if found is not None:
+            return found
+        try:
+            with open(self._entry(endpoint, key), "rb") as f:
+                entry = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        found = (entry["expires"], entry["payload"])
+        with self._lock:
+            self._memory[key] = found
+        return found
+
+    def _lookup(self, endpoint: str, key: str) -> Any:
+        found = self._load(endpoint, key)
+        if found is None:
+            return MISS
+        expires, payload = found
+        if time.time() >= expires:
+            self._count(endpoint, "expired")
+            self._drop(endpoint, key)
+            return MISS
+        return pickle.loads(payload)
+
+    def _drop(self, endpoint: str, key: str) -> None:
+        with self._lock:
+            self._memory.pop(key, None)
+        try:
+            os.remove(self._entry(endpoint, key))
+        except OSError:
+            pass
+
+    def _store(self, endpoint: str, request: dict, key: str, payload: bytes) -> None:
+        expires = expires_at(endpoint, request)
+        with self._lock:
+            self._memory[key] = (expires, payload)
+        entry_dir = config.ensure_dir(os.path.join(self.root, endpoint))
+        tmp = os.path.join(entry_dir, f".tmp-{uuid.uuid4().hex[:8]}")
+        with open(tmp, "wb") as f:
+            pickle.dump({"expires": expires, "stored": time.time(), "request": request,
+                         "payload": payload}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self._entry(endpoint, key))
+        self._count(endpoint, "stored")
+
+    def get(self, endpoint: str, request: dict) -> Any:
+        """Fresh cached response, or MISS (counted as a hit or a miss)."""
+        if not self.enabled:
+            return MISS
+        value = self._lookup(endpoint, _digest([endpoint, request]))
+        self._count(endpoint, "misses" if value is MISS else "hits")
+        return value
+
+    def put(self, endpoint: str, request: dict, value: Any) -> None:
+        if self.enabled and _worth_keeping(value):
+            payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+            self._store(endpoint, request, _digest([endpoint, request]), payload)
+
+    def get_or_fetch(self, endpoint: str, request: dict, fetch: Callable[[], Any]) -> Any:
+        """
+        Cached response for `request`, else fetch() once: concurrent callers
+        with the same request wait for that fetch rather than repeating it.
+        """
+        if not self.enabled:
+            return fetch()
+        key = _digest([endpoint, request])
+        value = self._lookup(endpoint, key)
+        if value is not MISS:
+            self._count(endpoint, "hits")
+            return value
+
+        with self._lock:
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                call = self._inflight[key] = _Call()
+        if not leader:
+            call.done.wait()
+            self._count(endpoint, "coalesced")
+            if call.error is not None:
+                raise call.error
+            return call.value if call.payload is None else pickle.loads(call.payload)
+
+        try:
+            # A fetch for this key may have finished since the lookup above
+            value = self._lookup(endpoint, key)
+            if value is not MISS:
+                self._count(endpoint, "hits")
+            else:
+                self._count(endpoint, "misses")
+                value = fetch()
+                if _worth_keeping(value):
+                    call.payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+                    self._store(endpoint, request, key, call.payload)
+                else:
+                    call.value = value
+            return value
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            call.done.set()
+
+    # -----------------------------
+    # Stats / housekeeping
+    # -----------------------------
+    def stats(self) -> dict[str, dict[str, int]]:
+        with self._lock:
+            return {ep: dict(c) for ep, c in sorted(self.counts.items())}
+
+    def print_stats(self) -> None:
+        for endpoint, c in self.stats().items():
+            lookups = c.get("hits", 0) + c.get("misses", 0) + c.get("coalesced", 0)
+            if lookups:
+                saved = c.get("hits", 0) + c.get("coalesced", 0)
+                print(f"🗄️ {endpoint}: {c.get('hits', 0)} hit(s), {c.get('misses', 0)} "
+                      f"miss(es), {c.get('coalesced', 0)} coalesced "
+                      f"({saved / lookups:.0%} without a request)")
+
+    def entries(self) -> list[tuple[str, float, int, str]]:
+        """(endpoint, expires, size, path) of every entry on disk."""
+        out = []
+        if not os.path.isdir(self.root):
+            return out
+        for d in os.scandir(self.root):
+            if not d.is_dir():
+                continue
+            for e in os.scandir(d.path):
+                if not e.name.endswith(ENTRY_SUFFIX):
+                    continue
+                try:
+                    with open(e.path, "rb") as f:
+                        expires = pickle.load(f)["expires"]
+                except (OSError, EOFError, pickle.UnpicklingError, KeyError):
+                    expires = 0.0
+                out.append((d.name, expires, e.stat().st_size, e.path))
+        return out
+
+    def purge(self) -> int:
+        """Removes expired (or unreadable) entries; returns how many."""
+        now = time.time()
+        removed = 0
+        for _, expires, _, path in self.entries():
+            if expires <= now:
+                try:
+                    os.remove(path)
+                    removed += 1
+                except OSError:
+                    pass
+        with self._lock:
+            self._memory = {k: v for k, v in self._memory.items() if v[0] > now}
+        return removed
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+_SHARED: Optional[ResponseCache] = None
+_SHARED_LOCK = threading.Lock()
+
+
+def shared() -> ResponseCache:
+    """The process-wide cache (one memory layer and one set of counters)."""
+    global _SHARED
+    with _SHARED_LOCK:
+        if _SHARED is None:
+            _SHARED = ResponseCache()
+        return _SHARED
+
+
+def cached(endpoint: str, request: dict, fetch: Callable[[], Any]) -> Any:
+    return shared().get_or_fetch(endpoint, request, fetch)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Response cache tools")
+    parser.add_argument("command", choices=["stats", "purge", "clear"])
+    args = parser.parse_args()
+
+    cache = ResponseCache()
+    if args.command == "clear":
+        cache.clear()
+        print(f"🧹 Cleared {cache.root}")
+    elif args.command == "purge":
+        print(f"🧹 Removed {cache.purge()} expired entr(ies)")
+    else:
+        now = time.time()
+        by_endpoint: dict[str, list] = defaultdict(list)
+        for endpoint, expires, size, _ in cache.entries():
+            by_endpoint[endpoint].append((expires, size))
+        for endpoint, items in sorted(by_endpoint.items()):
+            fresh = [e for e, _ in items if e > now]
+            size_mb = sum(s for _, s in items) / 2**20
+            soonest = (f", next expiry {datetime.fromtimestamp(min(fresh)):%Y-%m-%d %H:%M}"
+                       if fresh else "")
+            print(f"{endpoint}: {len(fresh)} fresh, {len(items) - len(fresh)} expired, "
+                  f"{size_mb:.1f} MB{soonest}")
+        if not by_endpoint:
+            print(f"No response cache under {cache.root}")
@@ -0,0 +1,164 @@
+"""
+Rolling-window kernels with bounded memory.
+
+All kernels work down axis 0 of a 1-D series or a 2-D (dates x tickers)
+panel and follow pandas' `rolling(window)` conventions: the first
+window-1 rows and any window containing NaN come out NaN.
+
+    rolling_mean_mad   mean and mean absolute deviation (CCI)
+    rolling_std        standard deviation, two-pass per window (Bollinger, Dist_Std)
+    rolling_max/min    van Herk/Gil-Werman, O(n) regardless of the window
+    cci                (x - mean) / (0.015 * MAD), optionally floored
+
+Windowed kernels never materialize the full (rows x window) matrix: rows
+are processed in blocks of at most BLOCK_ELEMENTS window elements, each
+block being one vectorized NumPy pass.
+"""
+from __future__ import annotations
+
+from typing import Callable, Optional
+
+import numpy as np
+import pandas as pd
+
+
+# Upper bound on window elements held per block (x 8 bytes, per temporary)
+BLOCK_ELEMENTS = 1 << 20
+
+
+def _as_float(x) -> tuple[np.ndarray, Optional[pd.Index], Optional[str]]:
+    if isinstance(x, pd.Series):
+        return x.to_numpy(dtype=np.float64), x.index, x.name
+    return np.asarray(x, dtype=np.float64), None, None
+
+
+def _wrap(out: np.ndarray, index: Optional[pd.Index], name: Optional[str]):
+    return pd.Series(out, index=index, name=name) if index is not None else out
+
+
+def _blocked(x: np.ndarray, window: int, fn: Callable[[np.ndarray], tuple],
+             n_out: int) -> tuple[np.ndarray, ...]:
+    """
+    Applies fn to (rows, ..., window) sliding-window views, block by block.
+    fn returns n_out arrays shaped (rows, ...); results are NaN-padded.
+    """
+    if window < 1:
+        raise ValueError("window must be >= 1")
+    outs = tuple(np.full(x.shape, np.nan) for _ in range(n_out))
+    t = x.shape[0]
+    if t < window:
+        return outs
+
+    width = int(np.prod(x.shape[1:], dtype=np.int64)) if x.ndim > 1 else 1
+    rows = max(1, BLOCK_ELEMENTS // (window * max(width, 1)))
+    n_win = t - window + 1
+    for start in range(0, n_win, rows):
+        stop = min(start + rows, n_win)
+        w = np.lib.stride_tricks.sliding_window_view(
+            x[start:stop + window - 1], window, axis=0)
+        for out, res in zip(outs, fn(w)):
+            out[start + window - 1:stop + window - 1] = res
+    return outs
+
+
+# -----------------------------
+# Mean / MAD / CCI
+# -----------------------------
+def _mean_mad(w: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    mean = w.mean(axis=-1)
+    return mean, np.mean(np.abs(w - mean[..., None]), axis=-1)
+
+
+def rolling_mean_mad(x, window: int) -> tuple:
+    """(rolling mean, rolling mean absolute deviation around it)."""
+    arr, index, name = _as_float(x)
+    mean, mad = _blocked(arr, window, _mean_mad, 2)
+    return _wrap(mean, index, name), _wrap(mad, index, name)
+
+
+def rolling_mad(x, window: int):
+    return rolling_mean_mad(x, window)[1]
+
+
+def cci(tp, window: int = 20, floor: Optional[float] = None):
+    """
+    Commodity Channel Index of a typical-price series/panel.
+    floor=1e-9 clamps tiny denominators (analysis_engine_local); floor=None
+    divides as-is like the rolling().apply version (flat windows -> inf/NaN).
+    """
+    arr, index, name = _as_float(tp)
+
+    def fn(w: np.ndarray) -> tuple[np.ndarray]:
+        mean, mad = _mean_mad(w)
+        denom = 0.015 * mad
+        with np.errstate(divide="ignore", invalid="ignore"):
+            if floor is not None:
+                denom = np.where(np.abs(denom) > floor, denom, floor)
+            return ((w[..., -1] - mean) / denom,)
+
+    (out,) = _blocked(arr, window, fn, 1)
+    return _wrap(out, index, name)
+
+
+# -----------------------------
+# Standard deviation
+# -----------------------------
+def rolling_std(x, window: int, ddof: int = 1):
+    """
+    Rolling standard deviation. Each window is centered on its own mean
+    before squaring (two-pass), so there is no cancellation on price-level
+    series and flat windows give exactly 0.
+    """
+    arr, index, name = _as_float(x)
+    if window - ddof <= 0:
+        return _wrap(np.full(arr.shape, np.nan), index, name)
+
+    def fn(w: np.ndarray) -> tuple[np.ndarray]:
+        dev = w - w.mean(axis=-1)[..., None]
+        return (np.sqrt(np.einsum("...i,...i->...", dev, dev) / (window - ddof)),)
+
+    (out,) = _blocked(arr, window, fn, 1)
+    return _wrap(out, index, name)
+
+
+# -----------------------------
+# Min / Max
+# -----------------------------
+def _rolling_extreme(x, window: int, op: np.ufunc, fill: float):
+    """
+    van Herk/Gil-Werman: split the series into window-sized blocks, take
+    prefix and suffix running extremes per block, then every window is
+    op(suffix at its start, prefix at its end). O(n) time and memory.
+    """
+    if window < 1:
+        raise ValueError("window must be >= 1")
+    arr, index, name = _as_float(x)
+    t = arr.shape[0]
+    out = np.full(arr.shape, np.nan)
+    if t < window:
+        return _wrap(out, index, name)
+
+    nan = np.isnan(arr)
+    vals = np.where(nan, fill, arr)
+    pad = (-t) % window
+    if pad:
+        vals = np.concatenate([vals, np.full((pad,) + arr.shape[1:], fill)])
+    blocks = vals.reshape((-1, window) + arr.shape[1:])
+    prefix = op.accumulate(blocks, axis=1).reshape(vals.shape)
+    suffix = op.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].reshape(vals.shape)
+    res = op(suffix[:t - window + 1], prefix[window - 1:t])
+
+    # A window holding any NaN is NaN (pandas min_periods=window)
+    counts = np.concatenate([np.zeros((1,) + arr.shape[1:], dtype=np.int64),
+                             np.cumsum(nan, axis=0)])
+    has_nan = (counts[window:] - counts[:-window]) > 0
+    out[window - 1:] = np.where(has_nan, np.nan, res)
+    return _wrap(out, index, name)
+
+
+def rolling_max(x, window: int):
+    return _rolling_extreme(x, window, np.maximum, -np.inf)
+
+
+def rolling_min(x, window: int):
+    return _rolling_extreme(x, window, np.minimum, np.inf)
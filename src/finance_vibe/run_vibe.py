@@ -1,31 +1,337 @@
-import subprocess
+"""
+Finance-Vibe pipeline orchestrator.
+
+Runs the stages in one process as a dependency graph:
+
+    discovery -> ingestion -> analysis       -> comparison
+                           -> analysis_local ->
+
+Each stage receives its dependencies' results in memory. A stage whose
+inputs (ticker list, raw files, upstream reports) have the same
+fingerprint as on its last successful run is skipped and its previous
+output is reused; fingerprints live in data/pipeline_state.json.
+Stages whose dependencies are done run concurrently (the two engines).
+
+    python src/finance_vibe/run_vibe.py            # skip fresh stages
+    python src/finance_vibe/run_vibe.py --force    # rerun everything
+
+Stage and engine timings go to data/logs/metrics_<time>_pipeline.json
+(see metrics.py).
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
 import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Optional
+
+import config
+import metrics
+
+
+STATE_PATH = os.path.join(config.BASE_DIR, "pipeline_state.json")
+# The screener is only queried again once the saved list is this old
+DISCOVERY_MAX_AGE_HOURS = 12
+
+
+# -----------------------------
+# Graph model
+# -----------------------------
+@dataclass
+class Stage:
+    name: str
+    run: Callable[[dict], Any]                          # results of deps -> output
+    deps: tuple[str, ...] = ()
+    fingerprint: Optional[Callable[[dict], Any]] = None  # None: always run
+    reuse: Optional[Callable[[dict], Any]] = None        # previous output when skipped
+
+
+@dataclass
+class StageOutcome:
+    name: str
+    status: str           # "ran", "skipped", "failed"
+    seconds: float = 0.0
+    error: str = ""
+    output: Any = field(default=None, repr=False)
+
+
+def _digest(obj: Any) -> str:
+    return hashlib.sha1(json.dumps(obj, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def load_state(path: str = STATE_PATH) -> dict:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(state: dict, path: str = STATE_PATH) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp, path)
+
+
+def _order(stages: list[Stage]) -> list[Stage]:
+    """Topological order; raises on unknown dependencies or cycles."""
+    by_name = {s.name: s for s in stages}
+    done: list[Stage] = []
+    seen: set[str] = set()
+    visiting: set[str] = set()
+
+    def visit(s: Stage) -> None:
+        if s.name in seen:
+            return
+        if s.name in visiting:
+            raise ValueError(f"dependency cycle at stage '{s.name}'")
+        visiting.add(s.name)
+        for d in s.deps:
+            if d not in by_name:
+                raise ValueError(f"stage '{s.name}' depends on unknown stage '{d}'")
+            visit(by_name[d])
+        visiting.discard(s.name)
+        seen.add(s.name)
+        done.append(s)
+
+    for s in stages:
+        visit(s)
+    return done
+
+
+def run_graph(stages: list[Stage], force: bool = False, max_workers: int = 2,
+              state_path: str = STATE_PATH) -> dict[str, StageOutcome]:
+    """
+    Runs every stage once its dependencies have finished. A failed stage
+    marks everything downstream as failed without running it.
+    """
+    stages = _order(stages)
+    state = load_state(state_path)
+    outcomes: dict[str, StageOutcome] = {}
+    pending = list(stages)
+
+    def execute(stage: Stage) -> StageOutcome:
+        with metrics.stage(stage.name) as record:
+            outcome = run_stage(stage)
+            record["status"] = outcome.status
+        return outcome
+
+    def run_stage(stage: Stage) -> StageOutcome:
+        inputs = {d: outcomes[d].output for d in stage.deps}
+        start = time.perf_counter()
+        try:
+            fp = _digest(stage.fingerprint(inputs)) if stage.fingerprint else None
+            prev = state.get(stage.name, {})
+            if (not force and fp is not None and stage.reuse is not None
+                    and prev.get("fingerprint") == fp):
+                output = stage.reuse(inputs)
+                if output is not None:
+                    return StageOutcome(stage.name, "skipped",
+                                        time.perf_counter() - start, output=output)
+
+            output = stage.run(inputs)
+            # Recorded after the run: a stage may change its own inputs (ingestion)
+            if stage.fingerprint:
+                fp = _digest(stage.fingerprint(inputs))
+            state[stage.name] = {"fingerprint": fp,
+                                 "finished": datetime.now().isoformat(timespec="seconds")}
+            return StageOutcome(stage.name, "ran", time.perf_counter() - start, output=output)
+        except Exception as e:
+            return StageOutcome(stage.name, "failed", time.perf_counter() - start, error=str(e))
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as ex:
+        running = {}
+        while pending or running:
+            for stage in list(pending):
+                dep_status = [outcomes[d].status if d in outcomes else None for d in stage.deps]
+                if "failed" in dep_status:
+                    pending.remove(stage)
+                    outcomes[stage.name] = StageOutcome(stage.name, "failed",
+                                                        error="upstream stage failed")
+                elif all(dep_status):
+                    pending.remove(stage)
+                    print(f"🔹 Stage: {stage.name}")
+                    running[ex.submit(execute, stage)] = stage
+            if not running:
+                continue
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                outcome = fut.result()
+                outcomes[outcome.name] = outcome
+                del running[fut]
+                if outcome.status == "failed":
+                    print(f"❌ {outcome.name}: {outcome.error}")
+                elif outcome.status == "skipped":
+                    print(f"⏭️ {outcome.name}: inputs unchanged, reused previous output")
+                else:
+                    print(f"✅ {outcome.name} ({outcome.seconds:.1f}s)")
+
+    save_state(state, state_path)
+    return outcomes
+
+
+# -----------------------------
+# Fingerprints
+# -----------------------------
+def raw_fingerprint() -> list:
+    """(name, size, mtime) of every raw file; changes whenever ingestion writes."""
+    import feature_cache
+    import raw_store
+
+    try:
+        paths = raw_store.iter_raw_paths()
+    except FileNotFoundError:
+        return []
+    return [[os.path.basename(p), feature_cache.file_fingerprint(p, "stat")] for p in paths]
 
 
-def run_workflow():
-    # Added analysis_engine_local.py to the sequence
-    scripts = [
-        "src/finance_vibe/ticker_provider.py",
-        "src/finance_vibe/data_ingestor.py",
-        "src/finance_vibe/analysis_engine.py",
-        "src/finance_vibe/analysis_engine_local.py"
+def _read_tickers() -> Optional[list[str]]:
+    import pandas as pd
+
+    if not os.path.exists(config.TICKER_LIST_PATH):
+        return None
+    return pd.read_csv(config.TICKER_LIST_PATH)["Ticker"].tolist()
+
+
+def _reuse_report(module_name: str) -> Callable[[dict], Any]:
+    """Today's saved report of an engine, or None so the stage runs."""
+    def reuse(_inputs: dict):
+        import importlib
+        import pandas as pd
+
+        path = importlib.import_module(module_name).report_path()
+        return pd.read_csv(path) if os.path.exists(path) else None
+    return reuse
+
+
+# -----------------------------
+# Stages
+# -----------------------------
+def discovery(_inputs: dict) -> list[str]:
+    from ticker_provider import refresh_active_tickers
+
+    tickers = refresh_active_tickers()
+    if tickers is None:
+        tickers = _read_tickers()  # keep the last good list
+    if not tickers:
+        raise RuntimeError("no ticker list available")
+    return tickers
+
+
+def discovery_fingerprint(_inputs: dict) -> Any:
+    # Fresh while the saved list is younger than DISCOVERY_MAX_AGE_HOURS
+    if not os.path.exists(config.TICKER_LIST_PATH):
+        return None
+    age_hours = (time.time() - os.path.getmtime(config.TICKER_LIST_PATH)) / 3600
+    return "fresh" if age_hours < DISCOVERY_MAX_AGE_HOURS else None
+
+
+def ingestion(inputs: dict) -> list:
+    from data_ingestor import ingest_weekly_data
+
+    ingest_weekly_data(tickers=inputs["discovery"])
+    return raw_fingerprint()
+
+
+def ingestion_fingerprint(inputs: dict) -> Any:
+    # One incremental ingest per ticker list per day, redone if raw files change
+    return {"tickers": inputs["discovery"], "day": datetime.now().strftime("%Y-%m-%d"),
+            "raw": raw_fingerprint()}
+
+
+def analysis(inputs: dict):
+    from analysis_engine import run_scanner
+
+    return run_scanner(tickers=inputs["discovery"])
+
+
+def analysis_local(_inputs: dict):
+    from analysis_engine_local import run_scan
+
+    return run_scan()
+
+
+def analysis_fingerprint(inputs: dict) -> Any:
+    return {"tickers": inputs["discovery"], "raw": inputs["ingestion"]}
+
+
+def comparison(inputs: dict):
+    """Joins the two reports on Ticker and lists score disagreements."""
+    import pandas as pd
+
+    main, local = inputs["analysis"], inputs["analysis_local"]
+    merged = pd.merge(main[["Ticker", "Score", "Sentiment"]],
+                      local[["Ticker", "Score", "Sentiment"]],
+                      on="Ticker", suffixes=("_Main", "_Local"))
+    merged["Score_Diff"] = merged["Score_Local"] - merged["Score_Main"]
+    merged = merged.sort_values("Ticker").reset_index(drop=True)
+
+    out_path = os.path.join(config.LOGS_DIR, f"vibe_compare_{datetime.now():%Y-%m-%d}.csv")
+    config.ensure_dir(config.LOGS_DIR)
+    merged.to_csv(out_path, index=False)
+
+    differ = merged[merged["Score_Diff"] != 0]
+    print(f"🔍 {len(merged)} ticker(s) in both reports, {len(differ)} with different scores")
+    if not differ.empty:
+        print(differ.to_markdown(index=False))
+    print(f"📁 Comparison saved: {out_path}")
+    return merged
+
+
+def build_pipeline() -> list[Stage]:
+    return [
+        Stage("discovery", discovery, fingerprint=discovery_fingerprint,
+              reuse=lambda _: _read_tickers()),
+        Stage("ingestion", ingestion, deps=("discovery",),
+              fingerprint=ingestion_fingerprint, reuse=lambda _: raw_fingerprint()),
+        Stage("analysis", analysis, deps=("discovery", "ingestion"),
+              fingerprint=analysis_fingerprint,
+              reuse=_reuse_report("analysis_engine")),
+        Stage("analysis_local", analysis_local, deps=("discovery", "ingestion"),
+              fingerprint=analysis_fingerprint,
+              reuse=_reuse_report("analysis_engine_local")),
+        Stage("comparison", comparison, deps=("analysis", "analysis_local")),
     ]
 
+
+def run_workflow(force: bool = False, sequential: bool = False,
+                 profile: Optional[int] = None) -> bool:
     print("🚀 Starting Finance-Vibe Pipeline...\n")
 
-    for script in scripts:
-        print(f"🔹 Running: {script}...")
-        try:
-            # check=True ensures the master script stops if any sub-script fails
-            subprocess.run([sys.executable, script], check=True)
-            print(f"✅ Finished: {script}\n")
-        except subprocess.CalledProcessError:
-            print(f"❌ Error in {script}. Pipeline halted.")
-            sys.exit(1)  # Exit the master script on failure
-
-    print("🏁 Workflow Complete!")
+    # One metrics file for the whole run; the engines record into it
+    with metrics.session("pipeline", profile_top=profile):
+        outcomes = run_graph(build_pipeline(), force=force,
+                             max_workers=1 if sequential else 2)
+
+        import response_cache
+        response_cache.shared().print_stats()
+
+    failed = [o for o in outcomes.values() if o.status == "failed"]
+    if failed:
+        print(f"\n❌ Pipeline halted: {', '.join(o.name for o in failed)}")
+        return False
+
+    print("\n🏁 Workflow Complete!")
     print("📁 Reports saved to data/logs/")
+    return True
 
 
 if __name__ == "__main__":
-    run_workflow()
+    parser = argparse.ArgumentParser(description="Finance-Vibe pipeline")
+    parser.add_argument("--force", action="store_true",
+                        help="Run every stage even if its inputs are unchanged")
+    parser.add_argument("--sequential", action="store_true",
+                        help="Run one stage at a time (readable logs)")
+    parser.add_argument("--profile", type=int, default=None, metavar="N",
+                        help="Save cProfile output for each engine's N slowest tickers")
+    args = parser.parse_args()
+    ok = run_workflow(force=args.force, sequential=args.sequential, profile=args.profile)
+    sys.exit(0 if ok else 1)
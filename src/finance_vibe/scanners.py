@@ -0,0 +1,98 @@
+"""
+Runs several scanners over data/raw in one pass.
+
+Each raw file is read once and a single indicators.Resolver is shared by
+every selected scanner, so MA200, RSI(14), the MACD EMAs and the other
+common intermediates are computed once per ticker instead of once per
+script:
+
+    python src/finance_vibe/scanners.py                      # all scanners
+    python src/finance_vibe/scanners.py signals mean_reversion
+
+The tables are the same as running signals.py, volatility.py,
+mean_reversion.py and `backtest.py --all` one after another.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+from pathlib import Path
+from typing import Optional
+
+import pandas as pd
+
+import backtest
+import mean_reversion
+import raw_store
+import signals
+import volatility
+from indicators import Resolver
+
+
+SCANNERS = ("signals", "volatility", "mean_reversion", "backtest")
+
+
+def run_scanners(selected: Optional[list[str]] = None, raw_dir: Optional[str] = None) -> dict:
+    """Returns {scanner: rows} with rows in each scanner's own format."""
+    selected = list(selected or SCANNERS)
+    unknown = [s for s in selected if s not in SCANNERS]
+    if unknown:
+        raise ValueError(f"unknown scanner(s): {unknown} (expected some of {SCANNERS})")
+
+    out: dict[str, list] = {s: [] for s in selected}
+    for file in raw_store.iter_raw_paths(raw_dir):
+        ticker = Path(file).stem
+        df = raw_store.read_raw(file).ffill()
+        r = Resolver(df)
+        if "signals" in out:
+            out["signals"].append(signals.evaluate(ticker, df, r))
+        if "volatility" in out:
+            out["volatility"].append(volatility.evaluate(ticker, df, r))
+        if "mean_reversion" in out:
+            row = mean_reversion.evaluate(ticker, df, r)
+            if row is not None:
+                out["mean_reversion"].append(row)
+        if "backtest" in out:
+            name = os.path.basename(raw_store.strip_suffix(file))
+            try:
+                stats = backtest.backtest_frame(df, name, r=r).stats
+                out["backtest"].append({"Ticker": name, **stats})
+            except Exception as e:
+                print(f"❌ {name}: {e}")
+    return out
+
+
+def print_results(results: dict) -> None:
+    if "signals" in results:
+        print(signals.HEADER)
+        print("-" * 65)
+        print("\n".join(results["signals"]))
+        print()
+    if "volatility" in results:
+        print(volatility.HEADER)
+        print("-" * 55)
+        print("\n".join(results["volatility"]))
+        print()
+    if "mean_reversion" in results:
+        mean_reversion.print_table(results["mean_reversion"])
+        print()
+    if "backtest" in results:
+        summary = pd.DataFrame(results["backtest"])
+        if summary.empty:
+            print("No backtest results.")
+        else:
+            summary = summary.sort_values("total_return_pct", ascending=False)
+            print(summary.to_markdown(index=False, floatfmt=".2f"))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run scanners sharing one indicator pass")
+    parser.add_argument("scanners", nargs="*",
+                        help=f"Subset of {', '.join(SCANNERS)} (default: all)")
+    parser.add_argument("--raw-dir", default=None)
+    args = parser.parse_args()
+    try:
+        results = run_scanners(args.scanners or None, args.raw_dir)
+    except ValueError as e:
+        parser.error(str(e))
+    print_results(results)
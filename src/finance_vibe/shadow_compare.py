@@ -0,0 +1,285 @@
+"""
+Differential harness for the two scoring engines.
+
+Each raw file is read once; both engines' feature pipelines then run on
+that same in-memory frame, so any divergence comes from the math and not
+from loading. Tickers are spread over worker processes in chunks (like
+analysis_engine_local --mode chunked) and each engine is timed on its
+own. The feature caches are bypassed: the point is to run the code.
+
+Outputs, under data/logs/:
+
+    shadow_indicators_<day>.csv  one row per ticker and indicator: both
+                                 engines' last values, absolute/relative
+                                 error on the last bar and the largest
+                                 error over the shared history
+    shadow_scores_<day>.csv      one row per ticker: both scores and
+                                 actions, mismatches, per-engine seconds
+
+    python src/finance_vibe/shadow_compare.py
+    python src/finance_vibe/shadow_compare.py --workers 4 --rel-tol 1e-9
+
+The engines use different parameters on purpose (MACD 15/30/9 with EMA
+signals vs 12/26/9 with SMA signals), so MACD/RSI/CCI signal columns are
+expected to differ; SMA20/SMA50 and CCI should agree to the tolerance.
+ENGINES maps a name to a function so other variants can be compared the
+same way.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Optional
+
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import analysis_engine
+import analysis_engine_local
+import config
+import raw_store
+
+
+# Indicator columns compared, with the report's (local engine) names
+COMPARED = ["SMA20", "SMA50", "MACD_H", "MACD_S", "RSI", "RSI_S", "CCI", "CCI_S"]
+VIBE_COLUMNS = {"MACD_Hist": "MACD_H", "MACD_Hist_Signal": "MACD_S",
+                "RSI_Signal": "RSI_S", "CCI_Signal": "CCI_S"}
+# Both engines' action labels reduced to shared tiers (local merges the last two)
+ACTION_TIERS = {"GO ALL IN": "all in", "ACCUMULATE": "accumulate", "WAIT": "wait",
+                "DISTRIBUTE": "reduce", "AVOID": "reduce"}
+REL_TOL = 1e-6
+_TINY = 1e-12
+CHUNKS_PER_WORKER = 4
+
+
+# -----------------------------
+# Engines
+# -----------------------------
+# bars (Date-indexed OHLCV) -> (features with COMPARED columns on a Date index, score, action)
+EngineFn = Callable[[pd.DataFrame], tuple[pd.DataFrame, float, str]]
+
+
+def run_vibe_engine(bars: pd.DataFrame) -> tuple[pd.DataFrame, float, str]:
+    if len(bars) < analysis_engine.MIN_ROWS:
+        raise ValueError(f"not enough rows: {len(bars)} (<{analysis_engine.MIN_ROWS})")
+    feat = analysis_engine.compute_vibe_features(bars.copy())
+    score, _ = analysis_engine.score_vibe(feat)
+    feat = feat.rename(columns=VIBE_COLUMNS)[COMPARED]
+    return feat, float(score), analysis_engine.vibe_action(score)[1]
+
+
+def run_local_engine(bars: pd.DataFrame) -> tuple[pd.DataFrame, float, str]:
+    ohlc = analysis_engine_local.ohlc_frame(bars)
+    if len(ohlc) < analysis_engine_local.MIN_WEEKS:
+        raise ValueError(f"not enough rows: {len(ohlc)} (<{analysis_engine_local.MIN_WEEKS})")
+    feat = analysis_engine_local.build_features(ohlc)
+    score = analysis_engine_local.score_last_row(feat.iloc[-1])
+    feat = feat.set_index("Date")[COMPARED]
+    return feat, float(score), analysis_engine_local.sentiment_action(score)[1]
+
+
+ENGINES: dict[str, EngineFn] = {
+    "vibe": run_vibe_engine,
+    "local": run_local_engine,
+}
+
+
+def action_tier(action: str) -> str:
+    for words, tier in ACTION_TIERS.items():
+        if words in action:
+            return tier
+    return action
+
+
+# -----------------------------
+# Divergence
+# -----------------------------
+@dataclass
+class EngineRun:
+    features: Optional[pd.DataFrame] = None
+    score: float = float("nan")
+    action: str = ""
+    seconds: float = 0.0
+    error: str = ""
+
+
+def _run(fn: EngineFn, bars: pd.DataFrame) -> EngineRun:
+    start = time.perf_counter()
+    try:
+        feat, score, action = fn(bars)
+        return EngineRun(feat, score, action, time.perf_counter() - start)
+    except Exception as e:
+        return EngineRun(seconds=time.perf_counter() - start, error=str(e))
+
+
+def indicator_divergence(a: pd.DataFrame, b: pd.DataFrame,
+                         names: tuple[str, str]) -> list[dict]:
+    """Per-indicator errors between two feature frames on their shared dates."""
+    a, b = a.align(b, join="inner", axis=0)
+    rows = []
+    for col in COMPARED:
+        x, y = a[col].to_numpy(dtype=np.float64), b[col].to_numpy(dtype=np.float64)
+        both = ~(np.isnan(x) | np.isnan(y))
+        row = {"Indicator": col, names[0]: np.nan, names[1]: np.nan, "Abs_Err": np.nan,
+               "Rel_Err": np.nan, "Max_Abs_Err": np.nan, "Max_Rel_Err": np.nan,
+               "Rows": int(both.sum())}
+        if len(x):
+            row[names[0]], row[names[1]] = x[-1], y[-1]
+        if both.any():
+            abs_err = np.abs(x[both] - y[both])
+            rel_err = abs_err / np.maximum(np.maximum(np.abs(x[both]), np.abs(y[both])), _TINY)
+            row["Max_Abs_Err"], row["Max_Rel_Err"] = abs_err.max(), rel_err.max()
+            if both[-1]:
+                row["Abs_Err"], row["Rel_Err"] = abs_err[-1], rel_err[-1]
+        rows.append(row)
+    return rows
+
+
+def _score_row(ticker: str, engines: tuple[str, str], first: EngineRun, second: EngineRun,
+               load_seconds: float) -> dict:
+    a, b = engines
+    return {
+        "Ticker": ticker,
+        f"Score_{a}": first.score, f"Score_{b}": second.score,
+        "Score_Diff": second.score - first.score,
+        f"Action_{a}": first.action, f"Action_{b}": second.action,
+        "Score_Match": first.score == second.score,
+        "Action_Match": bool(first.action and second.action
+                             and action_tier(first.action) == action_tier(second.action)),
+        "Load_s": load_seconds, f"Seconds_{a}": first.seconds, f"Seconds_{b}": second.seconds,
+        "Error": "; ".join(f"{n}: {r.error}" for n, r in zip(engines, (first, second))
+                           if r.error),
+    }
+
+
+def compare_bars(ticker: str, bars: pd.DataFrame, engines: tuple[str, str],
+                 load_seconds: float = 0.0) -> tuple[dict, list[dict]]:
+    """Runs both engines on one frame: (score row, indicator rows)."""
+    first, second = (_run(ENGINES[name], bars) for name in engines)
+    score = _score_row(ticker, engines, first, second, load_seconds)
+    indicators = []
+    if first.features is not None and second.features is not None:
+        indicators = [{"Ticker": ticker, **row} for row in
+                      indicator_divergence(first.features, second.features, engines)]
+    return score, indicators
+
+
+def compare_path_chunk(paths: list[str], engines: tuple[str, str]) -> tuple[list, list]:
+    """Worker task: load each file once and compare both engines on it."""
+    scores, indicators = [], []
+    for p in paths:
+        ticker = analysis_engine_local.ticker_from_filename(p)
+        start = time.perf_counter()
+        try:
+            bars = raw_store.read_raw(p)
+        except Exception as e:
+            failed = EngineRun(error=f"load failed ({e})")
+            scores.append(_score_row(ticker, engines, failed, failed,
+                                     time.perf_counter() - start))
+            continue
+        score, rows = compare_bars(ticker, bars, engines, time.perf_counter() - start)
+        scores.append(score)
+        indicators.extend(rows)
+    return scores, indicators
+
+
+# -----------------------------
+# Orchestrator
+# -----------------------------
+def report_paths(day: Optional[str] = None) -> tuple[str, str]:
+    day = day or datetime.now().strftime("%Y-%m-%d")
+    return (os.path.join(config.LOGS_DIR, f"shadow_indicators_{day}.csv"),
+            os.path.join(config.LOGS_DIR, f"shadow_scores_{day}.csv"))
+
+
+def summarize(indicators: pd.DataFrame, rel_tol: float = REL_TOL) -> pd.DataFrame:
+    """One row per indicator: how many tickers diverge and by how much."""
+    if indicators.empty:
+        return pd.DataFrame()
+    g = indicators.groupby("Indicator", sort=False)
+    out = pd.DataFrame({
+        "Tickers": g.size(),
+        "Diverging": g["Max_Rel_Err"].apply(lambda s: int((s > rel_tol).sum())),
+        "Median_Abs_Err": g["Abs_Err"].median(),
+        "Max_Abs_Err": g["Max_Abs_Err"].max(),
+        "Max_Rel_Err": g["Max_Rel_Err"].max(),
+    })
+    return out.reindex([c for c in COMPARED if c in out.index]).reset_index()
+
+
+def run_compare(paths: Optional[list[str]] = None, engines: tuple[str, str] = ("vibe", "local"),
+                max_workers: Optional[int] = None, rel_tol: float = REL_TOL,
+                save: bool = True) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Returns (scores, indicators) frames and prints the divergence summary."""
+    for name in engines:
+        if name not in ENGINES:
+            raise ValueError(f"unknown engine: {name} (expected one of {list(ENGINES)})")
+    if paths is None:
+        paths = (list(raw_store.iter_raw_paths(config.RAW_DIR))
+                 if os.path.isdir(config.RAW_DIR) else [])
+    if not paths:
+        print(f"No raw files found in {config.RAW_DIR}")
+        return pd.DataFrame(), pd.DataFrame()
+
+    workers = max_workers or os.cpu_count() or 1
+    n_chunks = min(len(paths), workers * CHUNKS_PER_WORKER)
+    chunks = [list(c) for c in np.array_split(np.array(paths, dtype=object), n_chunks)]
+
+    started = time.perf_counter()
+    score_rows: list[dict] = []
+    indicator_rows: list[dict] = []
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        futures = [ex.submit(compare_path_chunk, c, engines) for c in chunks]
+        for fut in as_completed(futures):
+            s, i = fut.result()
+            score_rows.extend(s)
+            indicator_rows.extend(i)
+    wall = time.perf_counter() - started
+
+    scores = pd.DataFrame(score_rows).sort_values("Ticker").reset_index(drop=True)
+    indicators = pd.DataFrame(indicator_rows)
+    if not indicators.empty:
+        indicators = indicators.sort_values(["Ticker", "Indicator"]).reset_index(drop=True)
+
+    a, b = engines
+    compared = scores[scores["Error"] == ""]
+    print(f"⏱️ {len(paths)} file(s) in {wall:.1f}s with {workers} worker(s): "
+          f"load {scores['Load_s'].sum():.2f}s, "
+          + ", ".join(f"{n} {scores[f'Seconds_{n}'].sum():.2f}s "
+                      f"({scores[f'Seconds_{n}'].mean() * 1000:.1f} ms/ticker)"
+                      for n in engines))
+    print(f"🎯 {len(compared)} ticker(s) scored by both: "
+          f"{int((~compared['Score_Match']).sum())} score mismatch(es), "
+          f"{int((~compared['Action_Match']).sum())} action mismatch(es)")
+    summary = summarize(indicators, rel_tol)
+    if not summary.empty:
+        print(f"\nIndicator divergence ({a} vs {b}, rel tol {rel_tol:g}):")
+        print(summary.to_markdown(index=False, floatfmt=".3g"))
+    failed = scores[scores["Error"] != ""]
+    if not failed.empty:
+        print(f"\nNot compared: {len(failed)} ticker(s) (first 15):")
+        for _, r in failed.head(15).iterrows():
+            print(f" - {r['Ticker']}: {r['Error']}")
+
+    if save:
+        config.ensure_dir(config.LOGS_DIR)
+        ind_path, score_path = report_paths()
+        indicators.to_csv(ind_path, index=False)
+        scores.to_csv(score_path, index=False)
+        print(f"\n📁 Saved: {ind_path}\n📁 Saved: {score_path}")
+    return scores, indicators
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run both engines on one load and diff them")
+    parser.add_argument("--engines", nargs=2, default=["vibe", "local"], choices=list(ENGINES))
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Worker processes (default: os.cpu_count())")
+    parser.add_argument("--rel-tol", type=float, default=REL_TOL,
+                        help="Relative error above which an indicator counts as diverging")
+    args = parser.parse_args()
+    run_compare(engines=tuple(args.engines), max_workers=args.workers, rel_tol=args.rel_tol)
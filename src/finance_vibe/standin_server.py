@@ -0,0 +1,234 @@
+"""
+Local stand-in for a market-data HTTP API, for exercising ingestion
+without the network.
+
+    GET /history/<SYMBOL>?period=2y&interval=1d&start=YYYY-MM-DD  -> CSV bars
+    GET /stats                                                      -> JSON counters
+
+Bars are synthetic (deterministic per symbol, see synthetic.py) unless
+--root points at a raw folder, in which case files are served and
+unknown symbols get 404. Faults are injected on purpose:
+
+- latency: every response waits latency +/- jitter seconds;
+- rate limit: a server-side token bucket (--rate/--burst) answers
+  429 with Retry-After once it is exhausted, like a real upstream;
+- random 429s, 500s and hangs (no response until the client gives up).
+
+    python src/finance_vibe/standin_server.py --port 8765 --rate 40 --latency 0.05
+    FINANCE_VIBE_PROVIDER=http://127.0.0.1:8765 python src/finance_vibe/async_ingest.py --from-list
+
+In-process, for scripts and benchmarks:
+
+    with StandInServer(rate=40, latency=0.05) as server:
+        provider = get_provider(server.url)
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import threading
+import time
+import zlib
+from dataclasses import asdict, dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs, unquote, urlparse
+
+import pandas as pd
+
+import synthetic
+from providers import FileProvider, period_start
+
+
+@dataclass
+class Faults:
+    latency: float = 0.0         # seconds added to every response
+    jitter: float = 0.0          # +/- uniform seconds around latency
+    rate: float = 0.0            # requests/s allowed (0 = unlimited)
+    burst: float = 0.0           # bucket size (default: one second of rate)
+    retry_after: float = 1.0     # Retry-After sent with 429s
+    throttle_share: float = 0.0  # extra random 429s
+    error_share: float = 0.0     # random 500s
+    hang_share: float = 0.0      # requests that never get an answer in time
+    hang_seconds: float = 60.0
+    seed: int = 0
+
+
+@dataclass
+class ServerStats:
+    requests: int = 0
+    served: int = 0
+    throttled: int = 0
+    errors: int = 0
+    hangs: int = 0
+    not_found: int = 0
+    by_second: dict[int, int] = field(default_factory=dict)  # accepted bars per second
+
+
+class _Bucket:
+    def __init__(self, rate: float, burst: float):
+        self.rate, self.burst = rate, burst or max(1.0, rate)
+        self.tokens, self.stamp = self.burst, time.monotonic()
+        self.lock = threading.Lock()
+
+    def take(self) -> bool:
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+            self.stamp = now
+            if self.tokens < 1.0:
+                return False
+            self.tokens -= 1.0
+            return True
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024  # the default (5) drops connection bursts
+
+
+class StandInServer:
+    """Threaded HTTP server in a background thread; use as a context manager."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, root: Optional[str] = None,
+                 freq: str = "daily", **faults):
+        self.faults = Faults(**faults)
+        self.stats = ServerStats()
+        self.freq = freq
+        self.files = FileProvider(root) if root else None
+        self._bucket = _Bucket(self.faults.rate, self.faults.burst) if self.faults.rate else None
+        self._rng = random.Random(self.faults.seed)
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        self._httpd = _HTTPServer((host, port), self._handler())
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> "StandInServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def serve_forever(self) -> None:
+        self._httpd.serve_forever()
+
+    # -----------------------------
+    # Request handling
+    # -----------------------------
+    def _count(self, name: str) -> None:
+        with self._lock:
+            setattr(self.stats, name, getattr(self.stats, name) + 1)
+
+    def _roll(self) -> float:
+        with self._lock:
+            return self._rng.random()
+
+    def bars(self, symbol: str, period: Optional[str], interval: str,
+             start: Optional[str]) -> pd.DataFrame:
+        if self.files is not None:
+            return self.files.fetch_one(symbol, period, interval, start)
+        freq = "weekly" if interval in ("1wk", "1w") else self.freq
+        bars = 5 * 260 if freq == "daily" else 5 * 52
+        seed = zlib.crc32(symbol.encode())
+        df = synthetic.make_ohlc(bars, freq, seed=seed, start_price=5 + seed % 500)
+        if start:
+            return df[df.index >= pd.Timestamp(start)]
+        cutoff = period_start(df.index[-1], period)
+        return df if cutoff is None else df[df.index >= cutoff]
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args) -> None:  # keep stdout for the client
+                pass
+
+            def _send(self, code: int, body: bytes, content_type: str = "text/csv",
+                      headers: Optional[dict] = None) -> None:
+                self.send_response(code)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                for k, v in (headers or {}).items():
+                    self.send_header(k, v)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self) -> None:
+                url = urlparse(self.path)
+                if url.path == "/stats":
+                    body = json.dumps(asdict(server.stats)).encode()
+                    return self._send(200, body, "application/json")
+                if not url.path.startswith("/history/"):
+                    return self._send(404, b"unknown endpoint")
+
+                server._count("requests")
+                f = server.faults
+                if f.latency or f.jitter:
+                    time.sleep(max(0.0, f.latency + f.jitter * (2 * server._roll() - 1)))
+
+                limited = server._bucket is not None and not server._bucket.take()
+                if limited or server._roll() < f.throttle_share:
+                    server._count("throttled")
+                    return self._send(429, b"too many requests",
+                                      headers={"Retry-After": f"{f.retry_after:g}"})
+                roll = server._roll()
+                if roll < f.hang_share:
+                    server._count("hangs")
+                    time.sleep(f.hang_seconds)
+                    return self._send(504, b"gateway timeout")
+                if roll < f.hang_share + f.error_share:
+                    server._count("errors")
+                    return self._send(500, b"internal error")
+
+                query = {k: v[0] for k, v in parse_qs(url.query).items()}
+                symbol = unquote(url.path[len("/history/"):]).upper()
+                df = server.bars(symbol, query.get("period"), query.get("interval", "1d"),
+                                 query.get("start"))
+                if df.empty:
+                    server._count("not_found")
+                    return self._send(404, b"")
+                server._count("served")
+                second = int(time.monotonic() - server._started)
+                with server._lock:
+                    server.stats.by_second[second] = server.stats.by_second.get(second, 0) + 1
+                self._send(200, df.to_csv().encode())
+
+        return Handler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stand-in market-data server with faults")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--root", default=None, help="Serve raw files from this folder")
+    parser.add_argument("--freq", choices=list(synthetic.FREQUENCIES), default="daily")
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--jitter", type=float, default=0.02)
+    parser.add_argument("--rate", type=float, default=20.0, help="Requests/s before 429s (0 = off)")
+    parser.add_argument("--burst", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument("--throttle-share", type=float, default=0.0)
+    parser.add_argument("--error-share", type=float, default=0.0)
+    parser.add_argument("--hang-share", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    server = StandInServer(
+        args.host, args.port, root=args.root, freq=args.freq, latency=args.latency,
+        jitter=args.jitter, rate=args.rate, burst=args.burst, retry_after=args.retry_after,
+        throttle_share=args.throttle_share, error_share=args.error_share,
+        hang_share=args.hang_share, seed=args.seed)
+    print(f"🛰️ Serving on {server.url} (rate limit {args.rate:g}/s, latency {args.latency:g}s)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
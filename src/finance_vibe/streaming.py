@@ -0,0 +1,620 @@
+"""
+Stateful streaming indicators.
+
+Each indicator keeps only the state it needs (a ring buffer for windowed
+indicators, the recursive state for EMA/MACD/Wilder RSI), so adding one
+bar costs O(window) at most instead of recomputing the whole history.
+Outputs match the batch pandas functions used by the scanners to
+floating-point tolerance, NaN warm-up included.
+
+Feature streams bundle the indicators of one scanner, remember the last
+bar they processed and are saved as JSON under config.STATE_DIR:
+
+    python src/finance_vibe/streaming.py --preset local
+
+The first run seeds every ticker from its full history; later runs only
+feed the bars that arrived since. A stream whose last bars no longer
+match the file (dates relabelled, or prices re-adjusted for a split or
+dividend) is seeded again.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+from collections import deque
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+import bar_store
+import config
+import raw_store
+
+
+NAN = float("nan")
+
+
+def _isnan(x: float) -> bool:
+    return x != x
+
+
+# -----------------------------
+# Indicators
+# -----------------------------
+class StreamingIndicator:
+    kind = "base"
+
+    def update(self, x: float) -> float:
+        raise NotImplementedError
+
+    def to_state(self) -> dict:
+        raise NotImplementedError
+
+    @classmethod
+    def from_state(cls, state: dict) -> "StreamingIndicator":
+        raise NotImplementedError
+
+
+class _Window(StreamingIndicator):
+    """Ring buffer with NaN tracking (rolling(n, min_periods=n) semantics)."""
+
+    def __init__(self, period: int):
+        self.period = period
+        self.buf: deque[float] = deque(maxlen=period)
+        self.nans = 0
+
+    def _push(self, x: float) -> Optional[float]:
+        evicted = self.buf[0] if len(self.buf) == self.period else None
+        if evicted is not None and _isnan(evicted):
+            self.nans -= 1
+        if _isnan(x):
+            self.nans += 1
+        self.buf.append(x)
+        return evicted
+
+    @property
+    def ready(self) -> bool:
+        return len(self.buf) == self.period and self.nans == 0
+
+    def _window_state(self) -> dict:
+        return {"kind": self.kind, "period": self.period, "buf": list(self.buf)}
+
+    def _load_window(self, state: dict) -> None:
+        for x in state["buf"]:
+            self._push(float(x))
+
+
+class StreamingSMA(_Window):
+    """s.rolling(period, min_periods=period).mean()"""
+
+    kind = "sma"
+
+    def __init__(self, period: int):
+        super().__init__(period)
+        self.total = 0.0
+        self.updates = 0
+
+    def update(self, x: float) -> float:
+        evicted = self._push(x)
+        if not _isnan(x):
+            self.total += x
+        if evicted is not None and not _isnan(evicted):
+            self.total -= evicted
+
+        # Re-sum once per window so add/remove rounding cannot accumulate
+        self.updates += 1
+        if self.updates % self.period == 0:
+            self.total = math.fsum(v for v in self.buf if not _isnan(v))
+
+        return self.total / self.period if self.ready else NAN
+
+    def to_state(self) -> dict:
+        return self._window_state()
+
+    @classmethod
+    def from_state(cls, state: dict) -> "StreamingSMA":
+        obj = cls(state["period"])
+        obj._load_window(state)
+        obj.total = math.fsum(v for v in obj.buf if not _isnan(v))
+        return obj
+
+
+class StreamingStd(_Window):
+    """s.rolling(period).std(ddof) via Welford add/remove updates."""
+
+    kind = "std"
+
+    def __init__(self, period: int, ddof: int = 1):
+        super().__init__(period)
+        self.ddof = ddof
+        self.updates = 0
+        self._resync()
+
+    def _resync(self) -> None:
+        vals = [v for v in self.buf if not _isnan(v)]
+        self.n = len(vals)
+        self.mean = math.fsum(vals) / self.n if vals else 0.0
+        self.m2 = math.fsum((v - self.mean) ** 2 for v in vals)
+
+    def update(self, x: float) -> float:
+        evicted = self._push(x)
+        if evicted is not None and not _isnan(evicted):
+            self.n -= 1
+            if self.n == 0:
+                self.mean, self.m2 = 0.0, 0.0
+            else:
+                d = evicted - self.mean
+                self.mean -= d / self.n
+                self.m2 -= d * (evicted - self.mean)
+        if not _isnan(x):
+            self.n += 1
+            d = x - self.mean
+            self.mean += d / self.n
+            self.m2 += d * (x - self.mean)
+
+        self.updates += 1
+        if self.updates % self.period == 0:
+            self._resync()
+
+        if not self.ready or self.n <= self.ddof:
+            return NAN
+        return math.sqrt(max(self.m2, 0.0) / (self.n - self.ddof))
+
+    def to_state(self) -> dict:
+        return {**self._window_state(), "ddof": self.ddof}
+
+    @classmethod
+    def from_state(cls, state: dict) -> "StreamingStd":
+        obj = cls(state["period"], state.get("ddof", 1))
+        obj._load_window(state)
+        obj._resync()
+        return obj
+
+
+class StreamingEMA(StreamingIndicator):
+    """s.ewm(span=span | alpha=alpha, adjust=False).mean(), NaN handling included."""
+
+    kind = "ema"
+
+    def __init__(self, span: Optional[float] = None, alpha: Optional[float] = None):
+        if (span is None) == (alpha is None):
+            raise ValueError("pass exactly one of span or alpha")
+        self.span = span
+        self.alpha = alpha if alpha is not None else 2.0 / (span + 1.0)
+        self.weighted = NAN
+        self.old_wt = 1.0
+
+    def update(self, x: float) -> float:
+        if not _isnan(self.weighted):
+            self.old_wt *= 1.0 - self.alpha
+            if not _isnan(x):
+                if self.weighted != x:
+                    self.weighted = ((self.old_wt * self.weighted + self.alpha * x)
+                                     / (self.old_wt + self.alpha))
+                self.old_wt = 1.0
+        elif not _isnan(x):
+            self.weighted = x
+        return self.weighted
+
+    def to_state(self) -> dict:
+        return {"kind": self.kind, "span": self.span, "alpha": self.alpha,
+                "weighted": self.weighted, "old_wt": self.old_wt}
+
+    @classmethod
+    def from_state(cls, state: dict) -> "StreamingEMA":
+        if state.get("span") is not None:
+            obj = cls(span=state["span"])
+        else:
+            obj = cls(alpha=state["alpha"])
+        obj.weighted = state["weighted"]
+        obj.old_wt = state["old_wt"]
+        return obj
+
+
+class StreamingMACD(StreamingIndicator):
+    """MACD line, signal line and histogram (update returns the histogram)."""
+
+    kind = "macd"
+
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        self.fast_ema = StreamingEMA(span=fast)
+        self.slow_ema = StreamingEMA(span=slow)
+        self.signal_ema = StreamingEMA(span=signal)
+        self.line = self.signal = self.hist = NAN
+
+    def update(self, x: float) -> float:
+        self.line = self.fast_ema.update(x) - self.slow_ema.update(x)
+        self.signal = self.signal_ema.update(self.line)
+        self.hist = self.line - self.signal
+        return self.hist
+
+    def to_state(self) -> dict:
+        return {"kind": self.kind, "fast": self.fast_ema.to_state(),
+                "slow": self.slow_ema.to_state(), "signal": self.signal_ema.to_state(),
+                "last": [self.line, self.signal, self.hist]}
+
+    @classmethod
+    def from_state(cls, state: dict) -> "StreamingMACD":
+        obj = cls()
+        obj.fast_ema = StreamingEMA.from_state(state["fast"])
+        obj.slow_ema = StreamingEMA.from_state(state["slow"])
+        obj.signal_ema = StreamingEMA.from_state(state["signal"])
+        obj.line, obj.signal, obj.hist = state["last"]
+        return obj
+
+
+class StreamingRSIWilder(StreamingIndicator):
+    """analysis_engine_local.rsi_wilder"""
+
+    kind = "rsi_wilder"
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self.prev = NAN
+        self.gain = StreamingEMA(alpha=1.0 / period)
+        self.loss = StreamingEMA(alpha=1.0 / period)
+
+    def update(self, x: float) -> float:
+        delta = x - self.prev
+        self.prev = x
+        avg_gain = self.gain.update(max(delta, 0.0) if not _isnan(delta) else NAN)
+        avg_loss = self.loss.update(max(-delta, 0.0) if not _isnan(delta) else NAN)
+        if _isnan(avg_gain) or _isnan(avg_loss) or avg_loss == 0:
+            return NAN
+        return 100 - (100 / (1 + avg_gain / avg_loss))
+
+    def to_state(self) -> dict:
+        return {"kind": self.kind, "period": self.period, "prev": self.prev,
+                "gain": self.gain.to_state(), "loss": self.loss.to_state()}
+
+    @classmethod
+    def from_state(cls, state: dict) -> "StreamingRSIWilder":
+        obj = cls(state["period"])
+        obj.prev = state["prev"]
+        obj.gain = StreamingEMA.from_state(state["gain"])
+        obj.loss = StreamingEMA.from_state(state["loss"])
+        return obj
+
+
+class StreamingRSISimple(StreamingIndicator):
+    """Simple-rolling RSI used by signals/mean_reversion/backtest/volatility."""
+
+    kind = "rsi_simple"
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self.prev = NAN
+        self.gain = StreamingSMA(period)
+        self.loss = StreamingSMA(period)
+
+    def update(self, x: float) -> float:
+        delta = x - self.prev
+        self.prev = x
+        # delta.where(delta > 0, 0): a NaN delta counts as 0
+        avg_gain = self.gain.update(delta if delta > 0 else 0.0)
+        avg_loss = self.loss.update(-delta if delta < 0 else 0.0)
+        if _isnan(avg_gain) or _isnan(avg_loss):
+            return NAN
+        if avg_loss == 0:
+            return 100.0 if avg_gain > 0 else NAN
+        return 100 - (100 / (1 + avg_gain / avg_loss))
+
+    def to_state(self) -> dict:
+        return {"kind": self.kind, "period": self.period, "prev": self.prev,
+                "gain": self.gain.to_state(), "loss": self.loss.to_state()}
+
+    @classmethod
+    def from_state(cls, state: dict) -> "StreamingRSISimple":
+        obj = cls(state["period"])
+        obj.prev = state["prev"]
+        obj.gain = StreamingSMA.from_state(state["gain"])
+        obj.loss = StreamingSMA.from_state(state["loss"])
+        return obj
+
+
+class StreamingCCI(_Window):
+    """
+    CCI over typical price. floor=1e-9 reproduces cci_fast; floor=None the
+    unfloored rolling-MAD version in analysis_engine/signals.
+    """
+
+    kind = "cci"
+
+    def __init__(self, period: int = 20, floor: Optional[float] = 1e-9):
+        super().__init__(period)
+        self.floor = floor
+
+    def update(self, x: float) -> float:
+        self._push(x)
+        if not self.ready:
+            return NAN
+        w = np.fromiter(self.buf, dtype=np.float64, count=self.period)
+        mean = w.mean()
+        md = np.mean(np.abs(w - mean))
+        denom = 0.015 * md
+        if self.floor is not None and abs(denom) <= self.floor:
+            denom = self.floor
+        if denom == 0:
+            return NAN if x == mean else math.copysign(math.inf, x - mean)
+        return (x - mean) / denom
+
+    def to_state(self) -> dict:
+        return {**self._window_state(), "floor": self.floor}
+
+    @classmethod
+    def from_state(cls, state: dict) -> "StreamingCCI":
+        obj = cls(state["period"], state.get("floor"))
+        obj._load_window(state)
+        return obj
+
+
+class StreamingBollinger(StreamingIndicator):
+    """MA(period) +/- k * std(period); update returns (mid, upper, lower)."""
+
+    kind = "bollinger"
+
+    def __init__(self, period: int = 20, k: float = 2.0):
+        self.k = k
+        self.ma = StreamingSMA(period)
+        self.std = StreamingStd(period)
+
+    def update(self, x: float) -> tuple[float, float, float]:
+        mid = self.ma.update(x)
+        sd = self.std.update(x)
+        return mid, mid + sd * self.k, mid - sd * self.k
+
+    def to_state(self) -> dict:
+        return {"kind": self.kind, "k": self.k,
+                "ma": self.ma.to_state(), "std": self.std.to_state()}
+
+    @classmethod
+    def from_state(cls, state: dict) -> "StreamingBollinger":
+        obj = cls(state["ma"]["period"], state["k"])
+        obj.ma = StreamingSMA.from_state(state["ma"])
+        obj.std = StreamingStd.from_state(state["std"])
+        return obj
+
+
+INDICATOR_KINDS = {cls.kind: cls for cls in (
+    StreamingSMA, StreamingStd, StreamingEMA, StreamingMACD, StreamingRSIWilder,
+    StreamingRSISimple, StreamingCCI, StreamingBollinger)}
+
+
+def indicator_from_state(state: dict) -> StreamingIndicator:
+    return INDICATOR_KINDS[state["kind"]].from_state(state)
+
+
+# -----------------------------
+# Feature streams (one per scanner)
+# -----------------------------
+class FeatureStream:
+    """
+    Named indicators fed one bar at a time. Subclasses declare the
+    indicators in `_build` and compute the output row in `_step`.
+    """
+
+    preset = "base"
+
+    def __init__(self):
+        self.ind: dict[str, StreamingIndicator] = self._build()
+        self.last_date: Optional[pd.Timestamp] = None
+        self.last_row: dict[str, float] = {}
+        self.has_hl = True  # source has High/Low columns
+        # (date, close) of the last bars fed, to detect a rewritten history
+        self.tail: deque = deque(maxlen=bar_store.OVERLAP_BARS)
+
+    def _build(self) -> dict[str, StreamingIndicator]:
+        raise NotImplementedError
+
+    def _step(self, close: float, high: float, low: float) -> dict[str, float]:
+        raise NotImplementedError
+
+    def update(self, date, close: float, high: float = NAN, low: float = NAN) -> dict[str, float]:
+        self.last_row = self._step(float(close), float(high), float(low))
+        self.last_date = pd.Timestamp(date)
+        self.tail.append((self.last_date, float(close)))
+        return self.last_row
+
+    def matches(self, df: pd.DataFrame) -> bool:
+        """
+        True when the last bars this stream saw are still in `df` with the
+        same closes (to bar_store.ADJUSTMENT_RTOL), i.e. `df` only adds bars.
+        """
+        if self.last_date is None:
+            return True
+        if not self.tail or any(d not in df.index for d, _ in self.tail):
+            return False
+        seen = np.array([c for _, c in self.tail])
+        now = df.loc[[d for d, _ in self.tail], "Close"].to_numpy(dtype=np.float64)
+        return bool(np.allclose(seen, now, rtol=bar_store.ADJUSTMENT_RTOL, equal_nan=True))
+
+    def advance(self, df: pd.DataFrame) -> int:
+        """Feeds the rows of a Date-indexed frame newer than last_date."""
+        if self.last_date is not None:
+            df = df[df.index > self.last_date]
+        self.has_hl = "High" in df and "Low" in df
+        close = df["Close"].to_numpy(dtype=np.float64)
+        high = df["High"].to_numpy(dtype=np.float64) if "High" in df else np.full(len(df), NAN)
+        low = df["Low"].to_numpy(dtype=np.float64) if "Low" in df else np.full(len(df), NAN)
+        for i, date in enumerate(df.index):
+            self.update(date, close[i], high[i], low[i])
+        return len(df)
+
+    def to_state(self) -> dict:
+        return {"preset": self.preset,
+                "last_date": None if self.last_date is None else self.last_date.isoformat(),
+                "last_row": self.last_row,
+                "tail": [[d.isoformat(), c] for d, c in self.tail],
+                "indicators": {k: v.to_state() for k, v in self.ind.items()},
+                "extra": self._extra_state()}
+
+    def _extra_state(self) -> dict:
+        return {}
+
+    def _load_extra(self, extra: dict) -> None:
+        pass
+
+    @classmethod
+    def from_state(cls, state: dict) -> "FeatureStream":
+        obj = STREAM_PRESETS[state["preset"]]()
+        obj.ind = {k: indicator_from_state(v) for k, v in state["indicators"].items()}
+        obj.last_date = pd.Timestamp(state["last_date"]) if state["last_date"] else None
+        obj.last_row = state["last_row"]
+        obj.tail.extend((pd.Timestamp(d), c) for d, c in state.get("tail", []))
+        obj._load_extra(state.get("extra", {}))
+        return obj
+
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.to_state(), f)
+        os.replace(tmp, path)
+
+    @staticmethod
+    def load(path: str) -> "FeatureStream":
+        with open(path) as f:
+            return FeatureStream.from_state(json.load(f))
+
+
+class LocalEngineStream(FeatureStream):
+    """analysis_engine_local.build_features"""
+
+    preset = "local"
+
+    def _build(self):
+        return {"SMA20": StreamingSMA(20), "SMA50": StreamingSMA(50),
+                "MACD": StreamingMACD(12, 26, 9), "MACD_S": StreamingEMA(span=9),
+                "RSI": StreamingRSIWilder(14), "RSI_S": StreamingSMA(10),
+                "CCI": StreamingCCI(20, floor=1e-9), "CCI_S": StreamingSMA(10)}
+
+    def _step(self, close, high, low):
+        if _isnan(close):  # load_ohlc drops rows without a close
+            return self.last_row
+        ind = self.ind
+        tp = (high + low + close) / 3.0 if self.has_hl else close
+        macd_h = ind["MACD"].update(close)
+        rsi = ind["RSI"].update(close)
+        cci = ind["CCI"].update(tp)
+        return {"Close": close,
+                "SMA20": ind["SMA20"].update(close), "SMA50": ind["SMA50"].update(close),
+                "MACD_H": macd_h, "MACD_S": ind["MACD_S"].update(macd_h),
+                "RSI": rsi, "RSI_S": ind["RSI_S"].update(rsi),
+                "CCI": cci, "CCI_S": ind["CCI_S"].update(cci)}
+
+
+class _FilledStream(FeatureStream):
+    """Streams for scanners that ffill() the raw frame before computing."""
+
+    def __init__(self):
+        super().__init__()
+        self.filled = {"Close": NAN, "High": NAN, "Low": NAN}
+
+    def _fill(self, close, high, low) -> tuple[float, float, float]:
+        for k, v in (("Close", close), ("High", high), ("Low", low)):
+            if not _isnan(v):
+                self.filled[k] = v
+        return self.filled["Close"], self.filled["High"], self.filled["Low"]
+
+    def _extra_state(self):
+        return {"filled": self.filled}
+
+    def _load_extra(self, extra):
+        self.filled.update(extra.get("filled", {}))
+
+
+class SignalsStream(_FilledStream):
+    """signals.calculate_indicators + MA200"""
+
+    preset = "signals"
+
+    def _build(self):
+        return {"RSI": StreamingRSISimple(14), "MACD": StreamingMACD(12, 26, 9),
+                "CCI": StreamingCCI(20, floor=None), "MA200": StreamingSMA(200)}
+
+    def _step(self, close, high, low):
+        close, high, low = self._fill(close, high, low)
+        ind = self.ind
+        macd = ind["MACD"]
+        macd.update(close)
+        return {"Close": close, "RSI": ind["RSI"].update(close),
+                "MACD": macd.line, "Signal_Line": macd.signal,
+                "CCI": ind["CCI"].update((high + low + close) / 3),
+                "MA200": ind["MA200"].update(close)}
+
+
+class MeanReversionStream(_FilledStream):
+    """mean_reversion.calculate_indicators"""
+
+    preset = "mean_reversion"
+
+    def _build(self):
+        return {"MA200": StreamingSMA(200), "Dist_Std": StreamingStd(50),
+                "RSI": StreamingRSISimple(14), "BB": StreamingBollinger(20, 2.0)}
+
+    def _step(self, close, high, low):
+        close, _, _ = self._fill(close, high, low)
+        ind = self.ind
+        ma200 = ind["MA200"].update(close)
+        dist = ((close - ma200) / ma200) * 100
+        mid, upper, lower = ind["BB"].update(close)
+        return {"Close": close, "MA200": ma200, "Dist_200": dist,
+                "Dist_Std": ind["Dist_Std"].update(dist),
+                "RSI": ind["RSI"].update(close),
+                "MA20": mid, "Upper_BB": upper, "Lower_BB": lower}
+
+
+STREAM_PRESETS = {cls.preset: cls for cls in (
+    LocalEngineStream, SignalsStream, MeanReversionStream)}
+
+
+# -----------------------------
+# Runner
+# -----------------------------
+def state_path(raw_path: str, preset: str, state_dir: Optional[str] = None) -> str:
+    stem = os.path.basename(raw_store.strip_suffix(raw_path))
+    return os.path.join(state_dir or config.STATE_DIR, preset, f"{stem}.json")
+
+
+def update_streams(preset: str = "local", raw_dir: Optional[str] = None,
+                   state_dir: Optional[str] = None) -> dict[str, dict[str, float]]:
+    """
+    Advances the saved stream of every raw file by the bars it has not
+    seen yet (seeding from full history on first use) and returns the
+    latest feature row per file stem.
+    """
+    latest: dict[str, dict[str, float]] = {}
+    fed = seeded = 0
+    for path in raw_store.iter_raw_paths(raw_dir):
+        spath = state_path(path, preset, state_dir)
+        stream = FeatureStream.load(spath) if os.path.exists(spath) else None
+        df = raw_store.read_raw(path, ["Close", "High", "Low"])
+        # A rewritten history (bars labelled differently, or closes
+        # re-adjusted for a split or dividend) no longer matches the last
+        # bars the state saw: start over. States saved without those bars
+        # are seeded again once.
+        if stream is not None and not stream.matches(df):
+            stream = None
+        if stream is None:
+            stream = STREAM_PRESETS[preset]()
+            seeded += 1
+
+        new_bars = stream.advance(df)
+        fed += new_bars
+        if new_bars:
+            stream.save(spath)
+        latest[os.path.basename(raw_store.strip_suffix(path))] = stream.last_row
+
+    print(f"✅ {preset}: {len(latest)} ticker(s), {seeded} seeded, {fed} bar(s) processed")
+    return latest
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Incremental indicator state")
+    parser.add_argument("--preset", choices=sorted(STREAM_PRESETS), default="local")
+    parser.add_argument("--raw-dir", default=None)
+    args = parser.parse_args()
+    update_streams(args.preset, args.raw_dir)
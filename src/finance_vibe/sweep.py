@@ -0,0 +1,165 @@
+"""
+Parameter sweep for the backtest strategy.
+
+Evaluates a grid (or a random sample of it) of BacktestParams across
+every file in data/raw and writes a ranked table to data/logs/:
+
+    python src/finance_vibe/sweep.py --grid macd_fast=12,15 macd_slow=26,30 \\
+        rsi_entry_max=60,65,70 rsi_exit_min=70,75,80
+    python src/finance_vibe/sweep.py --grid ma_len=100,150,200 --random 20 --seed 7
+
+Each worker process handles whole tickers: the close series is loaded
+once and every indicator is computed once per distinct parameter value
+(one EMA per span, one MA per length, one RSI per length), then shared
+by all combinations that use it.
+"""
+from __future__ import annotations
+
+import argparse
+import itertools
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import fields, replace
+from datetime import datetime
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+import backtest
+import config
+import raw_store
+from backtest import DEFAULT_PARAMS, BacktestParams
+from indicators import Resolver
+
+
+RANK_METRICS = ("mean_cagr_pct", "median_return_pct", "mean_return_pct",
+                "mean_max_drawdown_pct", "mean_win_rate_pct")
+PRINT_TOP_N = 20
+
+
+# -----------------------------
+# Grid
+# -----------------------------
+def parse_grid(specs: list[str]) -> dict[str, list]:
+    """["macd_fast=12,15", ...] -> {"macd_fast": [12, 15], ...}"""
+    known = [f.name for f in fields(BacktestParams)]
+    grid: dict[str, list] = {}
+    for spec in specs:
+        name, _, values = spec.partition("=")
+        if name not in known or not values:
+            raise ValueError(f"bad grid entry '{spec}' (known: {', '.join(known)})")
+        cast = type(getattr(DEFAULT_PARAMS, name))
+        grid[name] = [cast(v) for v in values.split(",")]
+    return grid
+
+
+def expand_grid(grid: dict[str, list], sample: Optional[int] = None,
+                seed: Optional[int] = None) -> list[BacktestParams]:
+    """All valid combinations (fast < slow), or a random sample of them."""
+    names = list(grid)
+    combos = [replace(DEFAULT_PARAMS, **dict(zip(names, values)))
+              for values in itertools.product(*(grid[n] for n in names))]
+    combos = [p for p in combos if p.macd_fast < p.macd_slow]
+    if sample is not None and sample < len(combos):
+        combos = random.Random(seed).sample(combos, sample)
+    return combos
+
+
+# -----------------------------
+# Worker
+# -----------------------------
+def sweep_file(path: str, combos: list[BacktestParams]) -> list[dict]:
+    """Stats for every combination on one raw file."""
+    df = raw_store.read_raw(path, ["Close"]).ffill()
+    close = df["Close"]
+    close_np = close.to_numpy(dtype=np.float64)
+    dates = df.index
+
+    # Every EMA/MA/RSI/signal line is computed once and shared by all combos
+    r = Resolver(df)
+
+    rows = []
+    for i, p in enumerate(combos):
+        entry, exit_ = backtest.compute_signals(close, p, r)
+        pos = backtest.resolve_positions(entry, exit_)
+        rows.append({"combo": i, **backtest.summarize(close_np, pos, dates)})
+    return rows
+
+
+# -----------------------------
+# Orchestrator
+# -----------------------------
+def aggregate(per_ticker: pd.DataFrame, combos: list[BacktestParams]) -> pd.DataFrame:
+    g = per_ticker.groupby("combo")
+    table = pd.DataFrame({
+        "tickers": g.size(),
+        "mean_return_pct": g["total_return_pct"].mean(),
+        "median_return_pct": g["total_return_pct"].median(),
+        "mean_cagr_pct": g["cagr_pct"].mean(),
+        "mean_max_drawdown_pct": g["max_drawdown_pct"].mean(),
+        "mean_win_rate_pct": g["win_rate_pct"].mean(),
+        "mean_exposure_pct": g["exposure_pct"].mean(),
+        "total_trades": g["trades"].sum(),
+    })
+    params = pd.DataFrame([c.as_dict() for c in combos])
+    return params.join(table, how="inner")
+
+
+def run_sweep(combos: list[BacktestParams], rank_by: str = "mean_cagr_pct",
+              max_workers: Optional[int] = None, raw_dir: Optional[str] = None) -> pd.DataFrame:
+    if rank_by not in RANK_METRICS:
+        raise ValueError(f"rank_by must be one of {RANK_METRICS}")
+    paths = raw_store.iter_raw_paths(raw_dir)
+    if not paths or not combos:
+        print("Nothing to sweep (no raw files or no valid combinations).")
+        return pd.DataFrame()
+
+    print(f"--- SWEEP: {len(combos)} combination(s) x {len(paths)} ticker(s) ---")
+    rows: list[dict] = []
+    failures: list[str] = []
+    with ProcessPoolExecutor(max_workers=max_workers) as ex:
+        futures = {ex.submit(sweep_file, p, combos): p for p in paths}
+        for fut in as_completed(futures):
+            try:
+                rows.extend(fut.result())
+            except Exception as e:
+                failures.append(f"{os.path.basename(futures[fut])} -> {e}")
+
+    if not rows:
+        print("No results.")
+        return pd.DataFrame()
+
+    # Higher is better for every metric (drawdowns are negative percentages)
+    table = aggregate(pd.DataFrame(rows), combos)
+    table = table.sort_values(rank_by, ascending=False).reset_index(drop=True)
+    table.insert(0, "rank", np.arange(1, len(table) + 1))
+
+    config.ensure_dir(config.LOGS_DIR)
+    stamp = datetime.now().strftime("%Y-%m-%d_%H%M%S")
+    out_path = os.path.join(config.LOGS_DIR, f"sweep_{stamp}.csv")
+    table.to_csv(out_path, index=False)
+
+    print(table.head(PRINT_TOP_N).to_markdown(index=False, floatfmt=".2f"))
+    print(f"\nSaved: {out_path}")
+    if failures:
+        print(f"\nSkipped {len(failures)} file(s). Failures (first 15):")
+        for msg in failures[:15]:
+            print(" -", msg)
+    return table
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backtest parameter sweep")
+    parser.add_argument("--grid", nargs="*", default=[],
+                        help="name=v1,v2,... for any BacktestParams field")
+    parser.add_argument("--random", type=int, default=None,
+                        help="Evaluate a random sample of this many combinations")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--rank-by", choices=RANK_METRICS, default="mean_cagr_pct")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    combos = expand_grid(parse_grid(args.grid), args.random, args.seed)
+    run_sweep(combos, rank_by=args.rank_by, max_workers=args.workers)
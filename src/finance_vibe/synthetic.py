@@ -0,0 +1,93 @@
+"""
+Deterministic synthetic OHLCV data.
+
+Bars follow a geometric random walk per ticker, seeded from (seed, ticker
+index), so the same arguments always produce byte-identical files. Used
+by benchmark.py and for exercising the engines without a network:
+
+    python src/finance_vibe/synthetic.py --tickers 500 --bars 260 --out /tmp/raw
+    python src/finance_vibe/synthetic.py --tickers 50 --bars 1260 --freq daily --format csv
+"""
+from __future__ import annotations
+
+import argparse
+import os
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+import config
+import raw_store
+
+
+FREQUENCIES = {"weekly": "W-FRI", "daily": "B"}
+END_DATE = "2025-12-26"  # a Friday, fixed so output does not depend on today
+RAGGED_SHARE = 0.1       # share of tickers listed later than the rest
+
+
+def ticker_names(n: int) -> list[str]:
+    return [f"SYN{i:04d}" for i in range(n)]
+
+
+def make_ohlc(bars: int, freq: str = "weekly", seed: int = 0,
+              start_price: float = 100.0, vol: Optional[float] = None) -> pd.DataFrame:
+    """One ticker's bars indexed by Date (Open/High/Low/Close/Volume, float64)."""
+    if freq not in FREQUENCIES:
+        raise ValueError(f"unknown frequency: {freq} (expected one of {list(FREQUENCIES)})")
+    rng = np.random.default_rng(seed)
+    vol = vol if vol is not None else (0.03 if freq == "weekly" else 0.015)
+
+    idx = pd.date_range(end=END_DATE, periods=bars, freq=FREQUENCIES[freq], name="Date")
+    drift = rng.normal(0.0005, 0.001)
+    close = start_price * np.exp(np.cumsum(rng.normal(drift, vol, bars)))
+    open_ = np.concatenate([[start_price], close[:-1]]) * (1 + rng.normal(0, vol / 4, bars))
+    high = np.maximum(open_, close) * (1 + rng.uniform(0, vol, bars))
+    low = np.minimum(open_, close) * (1 - rng.uniform(0, vol, bars))
+    volume = rng.integers(100_000, 10_000_000, bars).astype(np.float64)
+    return pd.DataFrame({"Open": open_, "High": high, "Low": low,
+                         "Close": close, "Volume": volume}, index=idx)
+
+
+def make_universe(n_tickers: int, bars: int, freq: str = "weekly", seed: int = 0,
+                  ragged: bool = True) -> dict[str, pd.DataFrame]:
+    """
+    {ticker: bars}. With ragged=True about RAGGED_SHARE of the tickers
+    start later (shorter history), like recent listings.
+    """
+    out: dict[str, pd.DataFrame] = {}
+    pick = np.random.default_rng(seed)
+    for i, ticker in enumerate(ticker_names(n_tickers)):
+        n = bars
+        if ragged and pick.random() < RAGGED_SHARE:
+            n = int(pick.integers(max(bars // 4, 1), bars + 1))
+        start_price = float(pick.uniform(5, 500))
+        out[ticker] = make_ohlc(n, freq, seed=seed * 1_000_003 + i, start_price=start_price)
+    return out
+
+
+def write_universe(raw_dir: str, n_tickers: int, bars: int, freq: str = "weekly",
+                   seed: int = 0, fmt: Optional[str] = None, ragged: bool = True) -> list[str]:
+    """Writes the universe with the pipeline's file naming; returns the tickers."""
+    os.makedirs(raw_dir, exist_ok=True)
+    universe = make_universe(n_tickers, bars, freq, seed, ragged)
+    for ticker, df in universe.items():
+        path = os.path.join(raw_dir, config.get_raw_filename(ticker, fmt))
+        raw_store.write_raw(df, path)
+    return list(universe)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write deterministic synthetic raw files")
+    parser.add_argument("--tickers", type=int, default=100)
+    parser.add_argument("--bars", type=int, default=260)
+    parser.add_argument("--freq", choices=list(FREQUENCIES), default="weekly")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--format", choices=list(config.RAW_EXTENSIONS), default=None)
+    parser.add_argument("--out", default=os.path.join(config.BASE_DIR, "synthetic", "raw"))
+    parser.add_argument("--no-ragged", action="store_true", help="Every ticker gets --bars bars")
+    args = parser.parse_args()
+
+    tickers = write_universe(args.out, args.tickers, args.bars, args.freq, args.seed,
+                             args.format, ragged=not args.no_ragged)
+    print(f"✅ Wrote {len(tickers)} synthetic ticker(s) to {args.out}")
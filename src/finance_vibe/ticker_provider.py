@@ -1,17 +1,23 @@
-from yahooquery import Screener
 import pandas as pd
 import os
+import config
+import response_cache
 from config import STATIC_TICKERS, TICKER_LIST_PATH
 
 def refresh_active_tickers():
+    """Writes the ticker list and returns it (None if discovery failed)."""
     print("--- STEP 1: Discovering Tickers (Static + Active) ---")
-    s = Screener()
-    
     ids = ['most_actives', 'day_gainers']
     discovered_tickers = []
-    
+
+    def fetch_screeners():
+        from yahooquery import Screener
+
+        return Screener().get_screeners(ids, count=50)
+
     try:
-        data = s.get_screeners(ids, count=50)
+        # Reused for a few minutes (config.RESPONSE_TTL), see response_cache.py
+        data = response_cache.cached("screener", {"ids": ids, "count": 50}, fetch_screeners)
         for screen_id in ids:
             if screen_id in data and 'quotes' in data[screen_id]:
                 discovered_tickers.extend([q['symbol'] for q in data[screen_id]['quotes']])
@@ -24,14 +30,16 @@ def refresh_active_tickers():
         seen = set()
         final_list = [x for x in combined if not (x in seen or seen.add(x))][:30] # Top 30 total
         
-        os.makedirs('data', exist_ok=True)
+        config.ensure_dir(os.path.dirname(TICKER_LIST_PATH) or ".")
         pd.Series(final_list, name='Ticker').to_csv(TICKER_LIST_PATH, index=False)
         
         print(f"✅ Success! Saved {len(final_list)} tickers to {TICKER_LIST_PATH}")
         print(f"Indices included: {STATIC_TICKERS}")
+        return final_list
             
     except Exception as e:
         print(f"❌ Error during ticker discovery: {e}")
+        return None
 
 if __name__ == "__main__":
     refresh_active_tickers()
\ No newline at end of file